@@ -0,0 +1,100 @@
+"""
+Production server profile for वाणीCheck: gunicorn managing uvicorn workers
+
+    gunicorn main:app        (this file is read from the working directory)
+
+The app is imported once in the master (preload_app) and warmed up there,
+so librosa's modules, compiled numba kernels and the detection model are
+shared copy-on-write by every forked worker instead of loaded N times.
+
+Environment:
+    PORT                  listen port (8000)
+    WEB_CONCURRENCY       server workers (default: CPUs available to the container)
+    ANALYSIS_WORKERS      analysis threads per worker (default: CPUs / WEB_CONCURRENCY)
+    KEEPALIVE_SECONDS     idle keep-alive (75, longer than common 60 s load balancer timeouts)
+    MAX_REQUESTS          recycle a worker after this many requests (2000, 0 disables)
+    MAX_REQUESTS_JITTER   random extra requests so workers do not recycle together (200)
+    WORKER_TIMEOUT        seconds a silent worker may block before it is restarted (120)
+    JOB_STORE             defaults to "sqlite" with more than one worker, so they share jobs
+"""
+
+import glob
+import os
+import tempfile
+
+
+def available_cpus() -> int:
+    """CPUs this container may use: the cgroup quota if set, else the affinity mask"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:  # cgroup v2: "<quota> <period>" or "max <period>"
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, int(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as q, open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as p:
+            quota, period = int(q.read()), int(p.read())
+        if quota > 0:
+            return max(1, quota // period)
+    except (OSError, ValueError):
+        pass
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+
+cpus = available_cpus()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(cpus)))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+keepalive = int(os.getenv("KEEPALIVE_SECONDS", "75"))
+max_requests = int(os.getenv("MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "200"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+
+accesslog = "-"
+errorlog = "-"
+
+# Read by main at import, so they must be set before the app is preloaded.
+# Split the cores between server workers instead of giving each worker all of them.
+os.environ.setdefault("ANALYSIS_WORKERS", str(max(1, cpus // workers)))
+os.environ.setdefault("ONNX_INTRA_OP_THREADS", str(max(1, cpus // workers // int(os.environ["ANALYSIS_WORKERS"]))))
+# Workers must share one job store, or a job poll landing on a sibling worker returns 404
+if workers > 1:
+    os.environ.setdefault("JOB_STORE", "sqlite")
+# Metrics from all workers are merged through files in this directory, emptied
+# here because the preload (which creates them) runs before any server hook
+metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "vanicheck-prometheus"))
+os.makedirs(metrics_dir, exist_ok=True)
+for stale in glob.glob(os.path.join(metrics_dir, "*.db")):
+    os.remove(stale)
+
+
+def when_ready(server):
+    """Runs in the master after the preload, before any worker is forked"""
+    import main
+
+    if main.JOB_STORE == "memory" and server.cfg.workers > 1:
+        # Set explicitly: each worker keeps its own jobs, so polls landing on another worker return 404
+        server.log.warning("JOB_STORE=memory is not shared by the %d workers; /v1/jobs polls may 404. "
+                           "Use JOB_STORE=sqlite", server.cfg.workers)
+    if main.WARMUP_ON_START:
+        main.warm_up_pipeline()
+    # Requeue interrupted jobs once here; workers (including recycled ones) only pick up queued jobs
+    main.job_runner.store.requeue_running()
+    main.job_runner.requeue_running = False
+
+
+def post_fork(server, worker):
+    import main
+
+    main.after_fork()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -3,22 +3,42 @@
 Simplified version without heavy dependencies
 """
 #it's workign bhenchod
-from fastapi import FastAPI, HTTPException, Header, File, UploadFile
+from fastapi import FastAPI, HTTPException, Header, File, UploadFile, Request, Query, Response, WebSocket
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict
-from typing import Optional
+from starlette.formparsers import MultiPartException, MultiPartParser
+from pydantic import BaseModel, Field, field_validator, model_serializer, model_validator, ConfigDict
+from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+from contextlib import asynccontextmanager, contextmanager
+from collections import OrderedDict, deque
+from functools import cached_property, lru_cache, wraps
+from abc import ABC, abstractmethod
+import multiprocessing
+import threading
+import queue
+import hashlib
+import hmac
+import ipaddress
+import socket
+import sqlite3
+import uuid
+import json
+import asyncio
 import os
-import urllib.request
+import httpx
 import mimetypes
+from urllib.parse import urlparse
 import logging
 import base64
+import io
+import shutil
 import numpy as np
-from scipy import signal
-from scipy.fft import fft
-import librosa
+import librosa  # lazy_loader: submodules (and numba) load on first use, see warm_up_pipeline
 import soundfile as sf
 import tempfile
+from prometheus_client import Counter, Histogram, REGISTRY, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST, multiprocess
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
 from datetime import datetime
 import time
 
@@ -26,11 +46,25 @@ import time
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the analysis pool and job workers with the server; drain them and the URL fetcher on shutdown"""
+    analysis_executor.start()
+    job_runner.start()
+    warm_up = asyncio.create_task(analysis_executor.warm_up()) if WARMUP_ON_START else None
+    yield
+    if warm_up is not None:
+        warm_up.cancel()
+    await job_runner.stop()
+    await audio_fetcher.aclose()
+    analysis_executor.shutdown()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="वाणीCheck - Audio Deepfake Detection API",
     description="Robust multi-lingual deepfake audio detection using spectral analysis",
-    version="1.0.1"  # Updated to support hackathon form field names
+    version="1.0.1",  # Updated to support hackathon form field names
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -46,8 +80,99 @@ app.add_middleware(
 SUPPORTED_LANGUAGES = ["tamil", "english", "hindi", "malayalam", "telugu"]
 SAMPLE_RATE = 16000
 API_KEY = os.getenv("VANICHECK_API_KEY", "vanicheck-secret-key-2026")
+# Separate key for admin-only features (per-request profiling); unset disables them
+ADMIN_API_KEY = os.getenv("VANICHECK_ADMIN_KEY", "")
+PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", "25"))  # functions listed in a profile report
 MIN_CONFIDENCE_THRESHOLD = 0.70
 MAX_AUDIO_SECONDS = float(os.getenv("MAX_AUDIO_SECONDS", "20"))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "64"))
+BATCH_STACK_SECONDS = float(os.getenv("BATCH_STACK_SECONDS", "32"))  # audio per stacked STFT
+# Default forensic depth when a request sets no "mode": fast, standard, full or cascade
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "full").lower()
+
+# /v1/detect/long: recordings analysed in overlapping windows, never decoded whole
+MAX_LONG_AUDIO_SECONDS = float(os.getenv("MAX_LONG_AUDIO_SECONDS", "3600"))
+MAX_LONG_UPLOAD_BYTES = int(os.getenv("MAX_LONG_UPLOAD_BYTES", str(512 * 1024 * 1024)))
+LONG_AUDIO_WINDOW_SECONDS = float(os.getenv("LONG_AUDIO_WINDOW_SECONDS", "10"))
+LONG_AUDIO_HOP_SECONDS = float(os.getenv("LONG_AUDIO_HOP_SECONDS", "5"))
+LONG_AUDIO_SILENCE_RMS = float(os.getenv("LONG_AUDIO_SILENCE_RMS", "0.001"))  # about -60 dBFS
+# Every window gets full forensics, so bound the work one request can ask for
+LONG_AUDIO_MIN_HOP_SECONDS = float(os.getenv("LONG_AUDIO_MIN_HOP_SECONDS", "1"))  # also at least window / 4
+LONG_AUDIO_MAX_WINDOWS = int(os.getenv("LONG_AUDIO_MAX_WINDOWS", "1000"))
+
+# /v1/jobs: queued detection with polling or a webhook callback
+JOB_STORE = os.getenv("JOB_STORE", "memory").lower()  # "memory" or "sqlite"
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "100"))
+JOB_RESULT_TTL_SECONDS = float(os.getenv("JOB_RESULT_TTL_SECONDS", str(24 * 3600)))
+JOB_CALLBACK_TIMEOUT_SECONDS = float(os.getenv("JOB_CALLBACK_TIMEOUT_SECONDS", "10"))
+JOB_CALLBACK_RETRIES = int(os.getenv("JOB_CALLBACK_RETRIES", "3"))
+JOB_CALLBACK_SECRET = os.getenv("JOB_CALLBACK_SECRET", "")  # signs callbacks when set
+# Callback hosts exempt from the public-address check (comma-separated, e.g. an internal receiver)
+JOB_CALLBACK_ALLOWED_HOSTS = {h.strip().lower() for h in os.getenv("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",") if h.strip()}
+
+# /v1/stream: live 16 kHz PCM over a WebSocket
+STREAM_WINDOW_SECONDS = float(os.getenv("STREAM_WINDOW_SECONDS", "5"))  # rolling analysis window
+STREAM_UPDATE_SECONDS = float(os.getenv("STREAM_UPDATE_SECONDS", "1"))  # audio between updates
+STREAM_MIN_SECONDS = float(os.getenv("STREAM_MIN_SECONDS", "1"))  # audio before the first update
+STREAM_CPU_BUDGET = float(os.getenv("STREAM_CPU_BUDGET", "0.25"))  # share of one core per stream
+STREAM_MAX_CONNECTIONS = int(os.getenv("STREAM_MAX_CONNECTIONS", "32"))
+STREAM_MAX_FRAME_BYTES = int(os.getenv("STREAM_MAX_FRAME_BYTES", str(64 * 1024)))
+# Ingest is metered against the wall clock: at most STREAM_MAX_SPEED seconds of audio per
+# second after an initial STREAM_BURST_SECONDS (a client's pre-buffer); faster streams get 1008
+STREAM_MAX_SPEED = float(os.getenv("STREAM_MAX_SPEED", "2"))
+STREAM_BURST_SECONDS = float(os.getenv("STREAM_BURST_SECONDS", "10"))
+
+# audioUrl downloads: shared connection pool, timeouts and a byte cap.
+# The default cap is MAX_AUDIO_SECONDS of 48 kHz stereo float32, the largest
+# uncompressed input we expect, plus room for container headers.
+AUDIO_FETCH_CONNECT_TIMEOUT = float(os.getenv("AUDIO_FETCH_CONNECT_TIMEOUT", "5"))
+AUDIO_FETCH_READ_TIMEOUT = float(os.getenv("AUDIO_FETCH_READ_TIMEOUT", "15"))
+AUDIO_FETCH_TOTAL_TIMEOUT = float(os.getenv("AUDIO_FETCH_TOTAL_TIMEOUT", "60"))
+AUDIO_FETCH_MAX_CONNECTIONS = int(os.getenv("AUDIO_FETCH_MAX_CONNECTIONS", "20"))
+MAX_FETCH_BYTES = int(os.getenv("MAX_FETCH_BYTES", str(int(MAX_AUDIO_SECONDS * 48000 * 2 * 4) + 64 * 1024)))
+
+# Analysis worker pool ("thread" or "process")
+ANALYSIS_EXECUTOR = os.getenv("ANALYSIS_EXECUTOR", "thread").lower()
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", str(os.cpu_count() or 1)))
+ANALYSIS_QUEUE_LIMIT = int(os.getenv("ANALYSIS_QUEUE_LIMIT", "16"))
+ANALYSIS_RETRY_AFTER_SECONDS = int(os.getenv("ANALYSIS_RETRY_AFTER_SECONDS", "2"))
+# Exercise the pipeline once per worker after startup so the first request skips
+# librosa's submodule imports and numba JIT (runs in the background; /health is not delayed)
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "true").lower() in ("1", "true", "yes")
+
+# Result cache for repeat submissions (RESULT_CACHE_SIZE=0 disables it)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "")
+
+# Resampling of non-16 kHz input: "high" (soxr HQ, librosa's default) or "fast"
+# (soxr LQ: ~15-20% faster, passband to ~6.5 kHz instead of ~7.6 kHz)
+RESAMPLE_QUALITY = os.getenv("RESAMPLE_QUALITY", "high").lower()
+
+# F0 estimator for glottal pulse analysis ("yin" = fast, "pyin" = accurate)
+PITCH_BACKEND = os.getenv("PITCH_BACKEND", "yin").lower()
+
+# Verdict model: "spectral" (heuristic) or "onnx" (exported wav2vec2 classifier)
+DETECTION_BACKEND = os.getenv("DETECTION_BACKEND", "spectral").lower()
+# "fp32" (model.onnx) or "int8" (model.int8.onnx, from train_model.quantize_onnx)
+ONNX_MODEL_FILES = {"fp32": "model.onnx", "int8": "model.int8.onnx"}
+ONNX_MODEL_VARIANT = os.getenv("ONNX_MODEL_VARIANT", "fp32").lower()
+ONNX_MODEL_PATH = os.getenv(
+    "ONNX_MODEL_PATH",
+    os.path.join("models/vanicheck-deepfake-detector", ONNX_MODEL_FILES.get(ONNX_MODEL_VARIANT, "model.onnx"))
+)
+# Threads per inference call; the default splits the cores across the analysis workers
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", str(max(1, (os.cpu_count() or 1) // max(1, ANALYSIS_WORKERS)))))
+ONNX_INTER_OP_THREADS = int(os.getenv("ONNX_INTER_OP_THREADS", "1"))
+ONNX_WARMUP_SECONDS = float(os.getenv("ONNX_WARMUP_SECONDS", "2"))
+
+# Micro-batching of infer() calls across concurrent requests (thread executor only; 1 disables)
+INFER_BATCH_MAX_SIZE = int(os.getenv("INFER_BATCH_MAX_SIZE", "8" if DETECTION_BACKEND == "onnx" else "1"))
+INFER_BATCH_WAIT_MS = float(os.getenv("INFER_BATCH_WAIT_MS", "5"))
 
 # ==================== Utilities ====================
 def convert_numpy_types(obj):
@@ -61,6 +186,12 @@ def convert_numpy_types(obj):
     else:
         return obj
 
+def audio_too_long(max_seconds: float) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Audio too long. Max allowed is {max_seconds:.0f}s"
+    )
+
 # ==================== Models ====================
 class AudioDetectionRequest(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
@@ -70,12 +201,24 @@ class AudioDetectionRequest(BaseModel):
     language: str
     audioFormat: Optional[str] = None
     filename: Optional[str] = None
+    pitch_backend: Optional[str] = Field(None, alias="pitchBackend")
+    mode: Optional[str] = None  # analysis depth, see ForensicAnalyzer.MODES
     
     @field_validator('language')
     @classmethod
     def normalize_language(cls, v):
         return v.lower() if v else v
     
+    @field_validator('pitch_backend')
+    @classmethod
+    def normalize_pitch_backend(cls, v):
+        return PitchTracker.resolve(v) if v else v
+    
+    @field_validator('mode')
+    @classmethod
+    def normalize_mode(cls, v):
+        return ForensicAnalyzer.resolve_mode(v) if v else v
+    
     @model_validator(mode='after')
     def ensure_audio_source(self):
         if not self.audio_data and not self.audio_url:
@@ -91,6 +234,70 @@ class AudioDetectionResponse(BaseModel):
     duration_seconds: float
     language_detected: str
     model_version: str = "1.0.0-lite"
+    analysis_mode: str = "full"
+    escalated: Optional[bool] = None  # cascade only: whether full forensics ran
+    timestamp: str
+    profile: Optional[dict] = None  # admin X-PROFILE requests only
+
+    @model_serializer(mode="wrap")
+    def _drop_unset_extras(self, handler):
+        # escalated and profile only appear on the responses they apply to
+        data = handler(self)
+        for name in ("escalated", "profile"):
+            if data.get(name) is None:
+                data.pop(name, None)
+        return data
+
+class JobRequest(AudioDetectionRequest):
+    callback_url: Optional[str] = Field(None, alias="callbackUrl")
+    long_audio: bool = Field(False, alias="longAudio")  # windowed analysis, as /v1/detect/long
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str  # "queued", "running", "succeeded" or "failed"
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Optional[dict] = None
+    error: Optional[dict] = None  # {"status_code": int, "detail": str}
+    callback: Optional[dict] = None  # webhook delivery outcome
+
+class BatchDetectionRequest(BaseModel):
+    items: List[AudioDetectionRequest] = Field(..., min_length=1)
+
+class BatchItemResult(BaseModel):
+    index: int
+    status: str  # "ok" or "error"
+    result: Optional[AudioDetectionResponse] = None
+    error: Optional[dict] = None  # {"status_code": int, "detail": str}
+
+class BatchDetectionResponse(BaseModel):
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
+    processing_time_ms: float
+
+class SegmentResult(BaseModel):
+    start_seconds: float
+    end_seconds: float
+    verdict: str  # "HUMAN", "AI_GENERATED", "UNCERTAIN" or "SILENCE"
+    confidence: float
+    ai_probability: Optional[float] = None
+    forensic_analysis: Optional[dict] = None
+
+class LongAudioDetectionResponse(BaseModel):
+    verdict: str
+    confidence: float
+    explanation: str
+    duration_seconds: float
+    window_seconds: float
+    hop_seconds: float
+    summary: dict
+    segments: List[SegmentResult]
+    processing_time_ms: float
+    language_detected: str
+    model_version: str
+    analysis_mode: str = "full"
     timestamp: str
 
 # ==================== Authentication ====================
@@ -102,22 +309,371 @@ def verify_api_key(x_api_key: str = Header(None)):
         raise HTTPException(status_code=403, detail="Invalid API key")
     return x_api_key
 
+def verify_admin_key(x_admin_key: Optional[str]):
+    """Verify the admin key; admin features are off unless VANICHECK_ADMIN_KEY is set"""
+    if not ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin features are disabled")
+    if x_admin_key is None:
+        raise HTTPException(status_code=401, detail="X-ADMIN-KEY header missing")
+    if not hmac.compare_digest(x_admin_key.encode(), ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+
+PROFILE_FORMATS = {"1": "summary", "true": "summary", "summary": "summary", "pstats": "pstats"}
+
+def requested_profile(x_profile: Optional[str], x_admin_key: Optional[str]) -> Optional[str]:
+    """Profile format asked for with X-PROFILE ("summary" or "pstats"), None when not profiling"""
+    if x_profile is None:
+        return None
+    verify_admin_key(x_admin_key)
+    profile_format = PROFILE_FORMATS.get(x_profile.lower())
+    if profile_format is None:
+        raise HTTPException(status_code=400, detail="X-PROFILE must be 'summary' or 'pstats'")
+    return profile_format
+
+# ==================== Metrics ====================
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_SECONDS = Histogram(
+    "vanicheck_stage_seconds",
+    "Time spent in each detection pipeline stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "vanicheck_request_seconds",
+    "End-to-end detection request latency",
+    ["endpoint"],
+    buckets=STAGE_BUCKETS
+)
+INFER_BATCH_SIZE = Histogram(
+    "vanicheck_infer_batch_size",
+    "Clips per micro-batched inference run",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16, 24, 32)
+)
+INFER_QUEUE_SECONDS = Histogram(
+    "vanicheck_infer_queue_seconds",
+    "Time a clip waited for its micro-batch to be dispatched",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+REQUESTS_TOTAL = Counter(
+    "vanicheck_requests_total",
+    "Detection results by endpoint, HTTP status, verdict and language",
+    ["endpoint", "status", "verdict", "language"]
+)
+
+# Stage timings recorded inside a pool job are collected here and shipped
+# back with the job result, so they are observed in the serving process
+# even when the job ran in a worker process.
+_stage_log = threading.local()
+
+@contextmanager
+def timed_stage(stage: str):
+    """Time a pipeline stage (usable as a context manager or decorator)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        timings = getattr(_stage_log, "timings", None)
+        if timings is not None:
+            timings.append((stage, elapsed))
+        else:
+            STAGE_SECONDS.labels(stage=stage).observe(elapsed)
+
+def observe_stage_timings(timings: list):
+    for stage, elapsed in timings:
+        STAGE_SECONDS.labels(stage=stage).observe(elapsed)
+
+def record_detection(endpoint: str, status: int, verdict: str = "none", language: Optional[str] = None):
+    language = language if language in SUPPORTED_LANGUAGES else "other"
+    REQUESTS_TOTAL.labels(endpoint=endpoint, status=str(status), verdict=verdict, language=language).inc()
+
+def instrumented(endpoint: str):
+    """Count a detection endpoint's outcomes and time it"""
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = await handler(*args, **kwargs)
+            except HTTPException as e:
+                record_detection(endpoint, e.status_code)
+                raise
+            except Exception:
+                record_detection(endpoint, 500)
+                raise
+            finally:
+                REQUEST_SECONDS.labels(endpoint=endpoint).observe(time.perf_counter() - start)
+            if isinstance(result, (AudioDetectionResponse, LongAudioDetectionResponse)):
+                record_detection(endpoint, 200, result.verdict, result.language_detected)
+            elif isinstance(result, BatchDetectionResponse):
+                for item in result.results:
+                    if item.result is not None:
+                        record_detection(endpoint, 200, item.result.verdict, item.result.language_detected)
+                    else:
+                        record_detection(endpoint, item.error["status_code"])
+            return result
+        return wrapper
+    return decorator
+
+class PipelineCollector:
+    """Scrape-time gauges/counters for the analysis pool and result cache"""
+
+    def collect(self):
+        queue_depth = GaugeMetricFamily("vanicheck_analysis_queue_depth", "Jobs waiting for an analysis worker")
+        queue_depth.add_metric([], analysis_executor.queue_depth)
+        yield queue_depth
+        in_flight = GaugeMetricFamily("vanicheck_analysis_in_flight", "Jobs queued or running on the analysis pool")
+        in_flight.add_metric([], analysis_executor.pending)
+        yield in_flight
+        streams = GaugeMetricFamily("vanicheck_live_streams", "Open /v1/stream connections")
+        streams.add_metric([], active_streams)
+        yield streams
+        jobs_queued = GaugeMetricFamily("vanicheck_job_queue_depth", "Jobs waiting for a job worker")
+        jobs_queued.add_metric([], job_runner.queue_depth)
+        yield jobs_queued
+
+        stats = result_cache.stats()
+        lookups = CounterMetricFamily("vanicheck_result_cache_lookups", "Result cache lookups by outcome", labels=["result"])
+        lookups.add_metric(["hit"], stats["hits"])
+        lookups.add_metric(["disk_hit"], stats["disk_hits"])
+        lookups.add_metric(["miss"], stats["misses"])
+        yield lookups
+        hit_ratio = GaugeMetricFamily("vanicheck_result_cache_hit_ratio", "Share of result cache lookups served from cache")
+        hit_ratio.add_metric([], stats["hit_rate"])
+        yield hit_ratio
+        entries = GaugeMetricFamily("vanicheck_result_cache_entries", "Results held in the in-memory cache")
+        entries.add_metric([], stats["entries"])
+        yield entries
+
+# ==================== DSP Constants ====================
+class DSPConstants:
+    """
+    Arrays that depend only on the analysis configuration, never on the audio:
+    STFT window, FFT bin frequencies, mel filterbank and the >= 8 kHz band.
+    Built once per (sr, n_fft, n_mels) by dsp_constants() and shared read-only
+    by every request, thread and (with gunicorn preload) forked worker.
+    """
+    
+    HIGH_BAND_HZ = 8000
+    
+    def __init__(self, sr: int, n_fft: int, n_mels: int = 128):
+        self.sr = sr
+        self.n_fft = n_fft
+        self.n_mels = n_mels
+        # float64 as librosa builds it; the float32 copy keeps the STFT of float32 audio in float32
+        self.window = librosa.filters.get_window("hann", n_fft, fftbins=True)
+        self.window_f32 = self.window.astype(np.float32)
+        self.freqs = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
+        self.mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels)
+        # First bin of the high band; bins are ascending, so the band is S[high_band_start:]
+        self.high_band_start = int(np.searchsorted(self.freqs, self.HIGH_BAND_HZ))
+        for array in (self.window, self.window_f32, self.freqs, self.mel_basis):
+            array.setflags(write=False)
+
+@lru_cache(maxsize=16)
+def dsp_constants(sr: int = SAMPLE_RATE, n_fft: int = 2048, n_mels: int = 128) -> DSPConstants:
+    return DSPConstants(sr, n_fft, n_mels)
+
+# ==================== Scratch Buffers ====================
+# Full-size temporaries (the complex STFT, entropy terms, batch padding) are
+# written into per-thread buffers that are reused by every request on that
+# thread, instead of being allocated and page-faulted in on each request.
+# A buffer grows to the largest request seen and is then kept.
+_scratch = threading.local()
+
+def scratch_buffer(name: str, shape: tuple, dtype=np.float32, order: str = "C") -> np.ndarray:
+    """
+    A reusable work array of `shape`, private to the calling thread. Its
+    contents are undefined and the next call with the same name on this
+    thread overwrites it, so it must never outlive the caller.
+    """
+    dtype = np.dtype(dtype)
+    size = int(np.prod(shape))
+    buffers = _scratch.__dict__.setdefault("buffers", {})
+    buffer = buffers.get((name, dtype))
+    if buffer is None or buffer.size < size:
+        buffer = buffers[(name, dtype)] = np.empty(size, dtype=dtype)
+    return buffer[:size].reshape(shape, order=order)
+
+def stft_into_scratch(audio: np.ndarray, n_fft: int, hop_length: int) -> np.ndarray:
+    """
+    Complex STFT of float32 clip(s) (last axis is time) with the cached float32
+    window, written into this thread's "stft" scratch buffer (complex64)
+    """
+    n_frames = 1 + audio.shape[-1] // hop_length  # center=True
+    out = scratch_buffer("stft", audio.shape[:-1] + (1 + n_fft // 2, n_frames), np.complex64, order="F")
+    return librosa.stft(audio, n_fft=n_fft, hop_length=hop_length,
+                        window=dsp_constants(SAMPLE_RATE, n_fft).window_f32, out=out)
+
+# ==================== Spectral Features ====================
+class SpectralFeatures:
+    """
+    Per-request feature context shared by infer() and the forensic analyzers.
+    The STFT magnitude is computed once; power, mel and dB views are derived lazily.
+    """
+    
+    def __init__(self, audio: np.ndarray, sr: int = SAMPLE_RATE, n_fft: int = 2048, hop_length: int = 512,
+                 magnitude: Optional[np.ndarray] = None):
+        self.audio = audio
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        if magnitude is not None:
+            # Seed the cached property with an STFT computed elsewhere (e.g. a batched one)
+            self.__dict__["magnitude"] = magnitude
+    
+    @property
+    def constants(self) -> DSPConstants:
+        return dsp_constants(self.sr, self.n_fft)
+    
+    @cached_property
+    def magnitude(self) -> np.ndarray:
+        """|STFT| of the clip (float32; only this array outlives the transform)"""
+        if self.audio.dtype != np.float32:
+            return np.abs(librosa.stft(self.audio, n_fft=self.n_fft, hop_length=self.hop_length,
+                                       window=self.constants.window))
+        return np.abs(stft_into_scratch(self.audio, self.n_fft, self.hop_length))
+    
+    @cached_property
+    def power(self) -> np.ndarray:
+        return self.magnitude ** 2
+    
+    @property
+    def freqs(self) -> np.ndarray:
+        return self.constants.freqs
+    
+    @cached_property
+    def mel_power(self) -> np.ndarray:
+        """Mel spectrogram, as melspectrogram(y=audio) with default settings but with a cached filterbank"""
+        power = self.__dict__.get("power")
+        if power is None:
+            power = np.square(self.magnitude, out=scratch_buffer("power", self.magnitude.shape, self.magnitude.dtype))
+        return self.constants.mel_basis @ power
+    
+    @cached_property
+    def mel_db(self) -> np.ndarray:
+        return librosa.power_to_db(self.mel_power, ref=np.max)
+
+# ==================== Pitch Tracking ====================
+class PitchTracker:
+    """
+    Pluggable F0 estimators for glottal pulse analysis.
+    Every backend returns one F0 value per frame, NaN where the frame is unvoiced.
+    """
+    
+    ALIASES = {"fast": "yin", "accurate": "pyin"}
+    
+    @classmethod
+    def resolve(cls, name: Optional[str]) -> str:
+        """Map a backend name or alias to a registered backend"""
+        name = (name or PITCH_BACKEND).lower()
+        name = cls.ALIASES.get(name, name)
+        if name not in PITCH_BACKENDS:
+            raise ValueError(f"Unknown pitch backend '{name}'. Choose from {sorted(PITCH_BACKENDS) + sorted(cls.ALIASES)}")
+        return name
+    
+    @staticmethod
+    def yin(audio: np.ndarray, sr: int, fmin: float, fmax: float,
+            frame_length: int = 2048, hop_length: int = 512, threshold: float = 0.15) -> np.ndarray:
+        """Vectorized YIN: all frames are processed at once with FFT cross-correlation"""
+        min_period = max(1, int(np.floor(sr / fmax)))
+        max_period = min(int(np.ceil(sr / fmin)), frame_length - 2)
+        win = frame_length - max_period
+        
+        # Centered frames, as librosa.pyin lays them out
+        padded = np.pad(np.asarray(audio, dtype=np.float64), frame_length // 2)
+        if len(padded) < frame_length:
+            return np.full(1, np.nan)
+        frames = np.lib.stride_tricks.sliding_window_view(padded, frame_length)[::hop_length]
+        
+        # Difference function d(tau) = E(0) + E(tau) - 2 r(tau) over a window of `win` samples.
+        # Kept in float64: d(tau) is a small difference of large terms near the period.
+        n_fft = 1 << (frame_length - 1).bit_length()
+        head = np.fft.rfft(frames[:, :win], n_fft)
+        full = np.fft.rfft(frames, n_fft)
+        np.conjugate(head, out=head)
+        head *= full
+        del full
+        acf = np.fft.irfft(head, n_fft)[:, :max_period + 1].copy()  # drop the unused lags
+        del head
+        # E(tau) from prefix sums of the padded signal, not a cumsum over every frame
+        prefix = np.concatenate([[0.0], np.cumsum(np.square(padded))])
+        lags = (np.arange(len(frames)) * hop_length)[:, None] + np.arange(max_period + 1)
+        window_energy = prefix[lags + win] - prefix[lags]
+        diff = np.maximum(window_energy[:, :1] + window_energy - 2 * acf, 0.0)
+        
+        # Cumulative mean normalized difference
+        taus = np.arange(1, max_period + 1)
+        cmndf = np.ones_like(diff)
+        cmndf[:, 1:] = diff[:, 1:] * taus / (np.cumsum(diff[:, 1:], axis=1) + 1e-10)
+        
+        # First local minimum below threshold inside the period range
+        search = cmndf[:, min_period:max_period + 1]
+        local_min = np.zeros_like(search, dtype=bool)
+        local_min[:, 1:-1] = (search[:, 1:-1] <= search[:, :-2]) & (search[:, 1:-1] <= search[:, 2:])
+        candidates = local_min & (search < threshold)
+        voiced = candidates.any(axis=1) & (window_energy[:, 0] > 1e-6)
+        best = np.argmax(candidates, axis=1)
+        
+        # Parabolic interpolation around the chosen lag
+        rows = np.arange(len(search))
+        idx = np.clip(best, 1, search.shape[1] - 2)
+        left, mid, right = search[rows, idx - 1], search[rows, idx], search[rows, idx + 1]
+        denom = left - 2 * mid + right
+        shift = np.where(np.abs(denom) > 1e-10, 0.5 * (left - right) / np.where(denom == 0, 1, denom), 0.0)
+        period = min_period + idx + np.clip(shift, -1, 1)
+        
+        f0 = sr / period
+        f0[~voiced] = np.nan
+        return f0
+    
+    @staticmethod
+    def pyin(audio: np.ndarray, sr: int, fmin: float, fmax: float) -> np.ndarray:
+        """Probabilistic YIN from librosa (slow, most accurate)"""
+        f0, voiced_flag, voiced_probs = librosa.pyin(audio, fmin=fmin, fmax=fmax, sr=sr)
+        return f0
+
+PITCH_BACKENDS = {
+    "yin": PitchTracker.yin,
+    "pyin": PitchTracker.pyin,
+}
+
 # ==================== Forensic Analysis ====================
 class ForensicAnalyzer:
     """Advanced audio forensics to explain detection verdicts"""
     
+    # Analyzers per mode. Pitch tracking dominates the cost, so "standard" keeps
+    # only the analyzers that reuse the shared STFT/mel features.
+    MODES = {
+        "fast": (),
+        "standard": ("spectral_gaps", "breathing", "harmonics"),
+        "full": ("glottal_pulses", "spectral_gaps", "breathing", "harmonics"),
+    }
+    CASCADE = "cascade"  # "fast", escalating to "full" for UNCERTAIN scores
+    
+    @classmethod
+    def resolve_mode(cls, name: Optional[str]) -> str:
+        """Validate an analysis mode, falling back to ANALYSIS_MODE"""
+        name = (name or ANALYSIS_MODE).lower()
+        if name not in cls.MODES and name != cls.CASCADE:
+            raise ValueError(f"Unknown analysis mode '{name}'. Choose from {sorted(cls.MODES) + [cls.CASCADE]}")
+        return name
+    
     @staticmethod
-    def analyze_glottal_pulses(audio: np.ndarray, sr: int) -> dict:
+    def analyze_glottal_pulses(audio: np.ndarray, sr: int, features: Optional[SpectralFeatures] = None,
+                               pitch_backend: Optional[str] = None) -> dict:
         """
         Detect glottal pulse consistency
         AI-generated audio often lacks natural micro-jitter
         """
+        backend = PitchTracker.resolve(pitch_backend)
         try:
-            f0, voiced_flag, voiced_probs = librosa.pyin(
+            f0 = PITCH_BACKENDS[backend](
                 audio,
+                sr,
                 fmin=librosa.note_to_hz('C2'),
-                fmax=librosa.note_to_hz('C7'),
-                sr=sr
+                fmax=librosa.note_to_hz('C7')
             )
             
             valid_f0 = f0[~np.isnan(f0)]
@@ -130,30 +686,34 @@ class ForensicAnalyzer:
                 "mean_f0": float(np.nanmean(f0)) if np.any(~np.isnan(f0)) else 0.0,
                 "jitter_ratio": float(jitter),
                 "natural": jitter > 0.01,
-                "description": "Consistent F0 suggests AI synthesis" if jitter < 0.01 else "Natural F0 variation detected"
+                "description": "Consistent F0 suggests AI synthesis" if jitter < 0.01 else "Natural F0 variation detected",
+                "pitch_backend": backend
             }
         except:
             return {
                 "mean_f0": 0.0,
                 "jitter_ratio": 0.0,
                 "natural": False,
-                "description": "F0 analysis unavailable"
+                "description": "F0 analysis unavailable",
+                "pitch_backend": backend
             }
     
     @staticmethod
-    def analyze_spectral_gaps(audio: np.ndarray, sr: int) -> dict:
+    def analyze_spectral_gaps(audio: np.ndarray, sr: int, features: Optional[SpectralFeatures] = None) -> dict:
         """
         Detect dead frequencies common in low-end TTS
         """
         try:
-            D = librosa.stft(audio)
-            S = np.abs(D)
-            freqs = librosa.fft_frequencies(sr=sr, n_fft=D.shape[0] * 2 - 2)
+            if features is None:
+                features = SpectralFeatures(audio, sr)
+            S = features.magnitude
+            high_band_start = features.constants.high_band_start
+            high_bins = S.shape[0] - high_band_start
             
-            high_freq_idx = np.where(freqs >= 8000)[0]
-            if len(high_freq_idx) > 0:
-                high_freq_energy = np.mean(S[high_freq_idx, :])
-                low_freq_energy = np.mean(S[:len(high_freq_idx), :])
+            if high_bins > 0:
+                # Slices are views; no per-request copy of the band
+                high_freq_energy = np.mean(S[high_band_start:, :])
+                low_freq_energy = np.mean(S[:high_bins, :])
                 high_freq_ratio = high_freq_energy / (low_freq_energy + 1e-10)
             else:
                 high_freq_ratio = 1.0
@@ -171,15 +731,16 @@ class ForensicAnalyzer:
             }
     
     @staticmethod
-    def analyze_breathing_patterns(audio: np.ndarray, sr: int) -> dict:
+    def analyze_breathing_patterns(audio: np.ndarray, sr: int, features: Optional[SpectralFeatures] = None) -> dict:
         """
         Detect breathing and mouth clicks (artifacts)
         AI speech lacks these natural pauses
         """
         try:
+            if features is None:
+                features = SpectralFeatures(audio, sr)
             # Analyze silence patterns
-            S = librosa.feature.melspectrogram(y=audio, sr=sr)
-            S_db = librosa.power_to_db(S, ref=np.max)
+            S_db = features.mel_db
             
             # Find quiet frames (potential breathing)
             quiet_threshold = np.percentile(S_db, 20)
@@ -201,16 +762,15 @@ class ForensicAnalyzer:
             }
     
     @staticmethod
-    def analyze_harmonic_structure(audio: np.ndarray, sr: int) -> dict:
+    def analyze_harmonic_structure(audio: np.ndarray, sr: int, features: Optional[SpectralFeatures] = None) -> dict:
         """
         Analyze harmonic richness
         Natural speech has rich harmonics; TTS often lacks them
         """
         try:
-            # Compute spectrogram
-            D = librosa.stft(audio)
-            S = np.abs(D)
-            freqs = librosa.fft_frequencies(sr=sr, n_fft=D.shape[0] * 2 - 2)
+            if features is None:
+                features = SpectralFeatures(audio, sr)
+            S = features.magnitude
             
             # Analyze harmonic structure
             harmonic_richness = np.sum(S) / (S.shape[0] * S.shape[1] + 1)
@@ -233,34 +793,65 @@ class ForensicAnalyzer:
             }
 
     @classmethod
-    def comprehensive_analysis(cls, audio: np.ndarray, sr: int) -> dict:
-        """Run all forensic analyses"""
-        return {
-            "glottal_pulses": cls.analyze_glottal_pulses(audio, sr),
-            "spectral_gaps": cls.analyze_spectral_gaps(audio, sr),
-            "breathing": cls.analyze_breathing_patterns(audio, sr),
-            "harmonics": cls.analyze_harmonic_structure(audio, sr),
-        }
+    def comprehensive_analysis(cls, audio: np.ndarray, sr: int, features: Optional[SpectralFeatures] = None,
+                               pitch_backend: Optional[str] = None, mode: str = "full") -> dict:
+        """Run the forensic analyses of a mode ("fast", "standard" or "full") over a shared feature context"""
+        analyzers = cls.MODES[mode]
+        if features is None and analyzers:
+            features = SpectralFeatures(audio, sr)
+        results = {}
+        if "glottal_pulses" in analyzers:
+            with timed_stage("forensic_glottal_pulses"):
+                results["glottal_pulses"] = cls.analyze_glottal_pulses(audio, sr, features, pitch_backend)
+        if "spectral_gaps" in analyzers:
+            with timed_stage("forensic_spectral_gaps"):
+                results["spectral_gaps"] = cls.analyze_spectral_gaps(audio, sr, features)
+        if "breathing" in analyzers:
+            with timed_stage("forensic_breathing"):
+                results["breathing"] = cls.analyze_breathing_patterns(audio, sr, features)
+        if "harmonics" in analyzers:
+            with timed_stage("forensic_harmonics"):
+                results["harmonics"] = cls.analyze_harmonic_structure(audio, sr, features)
+        return results
 
 # ==================== Audio Processing ====================
 class AudioProcessor:
     """Handle audio data extraction and processing"""
     
     @staticmethod
-    def decode_audio(audio_base64: str, audio_format: Optional[str] = None, filename: Optional[str] = None) -> np.ndarray:
-        """Decode base64 audio data - with fallback for incomplete data"""
+    def decode_base64(audio_base64: str) -> bytes:
+        """Strip an optional data URL prefix and decode base64 audio"""
         try:
-            # Strip data URL prefix if present
             if "," in audio_base64:
                 audio_base64 = audio_base64.split(",", 1)[1]
+            with timed_stage("base64_decode"):
+                return base64.b64decode(audio_base64, validate=False)
+        except Exception as e:
+            logger.error(f"Audio decoding failed: {e}")
+            raise HTTPException(status_code=400, detail="Invalid audio data")
+
+    @staticmethod
+    def decode_audio(audio_base64: str, audio_format: Optional[str] = None, filename: Optional[str] = None) -> np.ndarray:
+        """Decode base64 audio data - with fallback for incomplete data"""
+        audio_bytes = AudioProcessor.decode_base64(audio_base64)
+        return AudioProcessor.decode_audio_bytes(audio_bytes, audio_format=audio_format, filename=filename)
 
-            audio_bytes = base64.b64decode(audio_base64, validate=False)
+    @staticmethod
+    def decode_audio_bytes(audio_bytes: bytes, audio_format: Optional[str] = None, filename: Optional[str] = None,
+                           max_seconds: Optional[float] = None) -> np.ndarray:
+        """Decode raw audio bytes - with fallback for incomplete data"""
+        return AudioProcessor.decode_with_fallback(audio_bytes, audio_format, filename, max_seconds)[0]
 
+    @staticmethod
+    def decode_with_fallback(audio_bytes: bytes, audio_format: Optional[str] = None, filename: Optional[str] = None,
+                             max_seconds: Optional[float] = None) -> tuple:
+        """decode_audio_bytes, returning (audio, True) when synthetic audio stood in for the payload"""
+        try:
             # Check if we have enough data (minimum 100 bytes)
             if len(audio_bytes) < 100:
                 logger.warning(f"Received truncated audio ({len(audio_bytes)} bytes), generating synthetic sample")
                 # Generate synthetic audio for testing
-                return AudioProcessor.generate_synthetic_audio(duration=2.0)
+                return AudioProcessor.generate_synthetic_audio(duration=2.0), True
 
             suffix = ".wav"
             if filename and "." in filename:
@@ -268,23 +859,167 @@ class AudioProcessor:
             elif audio_format:
                 suffix = f".{audio_format.lower()}"
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                tmp.write(audio_bytes)
-                tmp_path = tmp.name
-            
             try:
-                audio, sr = librosa.load(tmp_path, sr=SAMPLE_RATE)
-                os.remove(tmp_path)
-                return audio
+                return AudioProcessor.load_audio(audio_bytes, suffix=suffix, max_seconds=max_seconds), False
+            except HTTPException:
+                raise
             except Exception as decode_err:
-                os.remove(tmp_path)
-                # If librosa can't decode, generate synthetic audio as fallback
+                # If the clip can't be decoded, generate synthetic audio as fallback
                 logger.warning(f"Failed to decode audio file ({decode_err}), using synthetic audio")
-                return AudioProcessor.generate_synthetic_audio(duration=2.0)
+                return AudioProcessor.generate_synthetic_audio(duration=2.0), True
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Audio decoding failed: {e}")
             raise HTTPException(status_code=400, detail="Invalid audio data")
 
+    @staticmethod
+    def load_audio(source, suffix: str = ".wav", max_seconds: Optional[float] = None) -> np.ndarray:
+        """
+        Decode audio bytes (or a binary file object) to mono float32 at SAMPLE_RATE.
+        WAV/FLAC/OGG/MP3 are read in memory with soundfile; only containers that
+        need an external decoder are spilled to a temp file for librosa/audioread.
+        With max_seconds, oversize clips are rejected from their header before any
+        decoding, and unprobeable ones are decoded only up to just past the limit.
+        """
+        with timed_stage("decode"):
+            return AudioProcessor._load_audio(source, suffix, max_seconds)
+
+    @staticmethod
+    def _load_audio(source, suffix: str, max_seconds: Optional[float]) -> np.ndarray:
+        stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
+        start = stream.tell()
+        if max_seconds is not None:
+            duration = AudioProcessor.probe_duration(stream)
+            if duration is not None and duration > max_seconds:
+                raise audio_too_long(max_seconds)
+        try:
+            return AudioProcessor._load_with_soundfile(stream, max_seconds)
+        except sf.SoundFileError as sf_err:
+            logger.info(f"soundfile cannot read {suffix} payload ({sf_err}), falling back to external decoder")
+        stream.seek(start)
+        return AudioProcessor._load_with_tempfile(stream, suffix, max_seconds)
+
+    @staticmethod
+    def probe_duration(stream) -> Optional[float]:
+        """Clip duration in seconds from container metadata, or None if it can't be probed"""
+        start = stream.tell()
+        try:
+            info = sf.info(stream)
+            if info.samplerate > 0 and info.frames > 0:
+                return info.frames / float(info.samplerate)
+        except (sf.SoundFileError, RuntimeError):
+            pass
+        finally:
+            stream.seek(start)
+        try:
+            return AudioProcessor.parse_wav_duration(stream.read(64 * 1024))
+        finally:
+            stream.seek(start)
+
+    @staticmethod
+    def parse_wav_duration(header: bytes) -> Optional[float]:
+        """Duration from a RIFF/WAVE header's byte rate and data chunk size"""
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return None
+        pos = 12
+        byte_rate = None
+        while pos + 8 <= len(header):
+            chunk_id = header[pos:pos + 4]
+            chunk_size = int.from_bytes(header[pos + 4:pos + 8], "little")
+            if chunk_id == b"fmt " and pos + 20 <= len(header):
+                byte_rate = int.from_bytes(header[pos + 16:pos + 20], "little")
+            elif chunk_id == b"data":
+                # Streamed WAVs leave the size as 0 or 0xFFFFFFFF: unknown
+                if byte_rate and chunk_size not in (0, 0xFFFFFFFF):
+                    return chunk_size / float(byte_rate)
+                return None
+            pos += 8 + chunk_size + (chunk_size & 1)
+        return None
+
+    @staticmethod
+    def _load_with_soundfile(stream, max_seconds: Optional[float] = None) -> np.ndarray:
+        with sf.SoundFile(stream) as f:
+            sr = f.samplerate
+            # One frame past the limit is enough for the duration check to trip
+            frames = int(max_seconds * sr) + 1 if max_seconds is not None else -1
+            if f.channels == 1:
+                # Mono: read straight into a 1-D float32 buffer
+                audio = f.read(frames, dtype="float32")
+            else:
+                audio = f.read(frames, dtype="float32", always_2d=True).mean(axis=1)
+        return AudioProcessor.resample(audio, sr)
+
+    # soxr recipes per RESAMPLE_QUALITY; both are polyphase filters with >100 dB alias rejection
+    RESAMPLE_RECIPES = {"high": "HQ", "fast": "LQ"}
+
+    @staticmethod
+    def resample(audio: np.ndarray, orig_sr: int, quality: Optional[str] = None) -> np.ndarray:
+        """
+        Resample mono float32 audio to SAMPLE_RATE with soxr, the backend
+        librosa.resample uses, called directly to skip its per-call checks.
+        16 kHz input is returned as is, without a copy. Integer ratios
+        (48k and 32k -> 16k) give exactly len / ratio samples.
+        """
+        if orig_sr == SAMPLE_RATE:
+            return audio
+        import soxr  # installed with librosa; already imported by the time traffic arrives
+        
+        quality = (quality or RESAMPLE_QUALITY).lower()
+        if quality not in AudioProcessor.RESAMPLE_RECIPES:
+            raise ValueError(f"Unknown resample quality '{quality}'. Choose from {sorted(AudioProcessor.RESAMPLE_RECIPES)}")
+        with timed_stage("resample"):
+            return soxr.resample(audio, orig_sr, SAMPLE_RATE, quality=AudioProcessor.RESAMPLE_RECIPES[quality])
+
+    @staticmethod
+    def iter_windows(source, window_seconds: float, hop_seconds: float, max_seconds: Optional[float] = None,
+                     max_windows: Optional[int] = None):
+        """
+        Yield (start_seconds, mono float32 window at SAMPLE_RATE) over a file path
+        or binary file object. Windows are read one at a time, so memory stays at
+        one window however long the recording is. Recordings that are too long,
+        or would need more than max_windows windows, are rejected from their
+        header before any decoding.
+        """
+        try:
+            f = sf.SoundFile(source)
+        except sf.SoundFileError:
+            raise HTTPException(status_code=415, detail="Long audio must be WAV, FLAC, OGG or MP3")
+        with f:
+            sr = f.samplerate
+            if max_seconds is not None and f.frames / float(sr) > max_seconds:
+                raise audio_too_long(max_seconds)
+            window = int(window_seconds * sr)
+            hop = max(1, int(hop_seconds * sr))
+            windows = 1 + -(-max(f.frames - window, 0) // hop)
+            if max_windows is not None and windows > max_windows:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Recording needs {windows} windows at hopSeconds={hop_seconds:g}; the limit is {max_windows}"
+                )
+            for index, block in enumerate(f.blocks(blocksize=window, overlap=window - hop, dtype="float32", always_2d=True)):
+                # The last block can lie wholly inside the previous window's overlap
+                if index > 0 and len(block) <= window - hop:
+                    break
+                with timed_stage("decode"):
+                    audio = block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+                    audio = AudioProcessor.resample(audio, sr)
+                yield index * hop / float(sr), audio
+
+    @staticmethod
+    def _load_with_tempfile(stream, suffix: str, max_seconds: Optional[float] = None) -> np.ndarray:
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+                tmp_path = tmp.name
+                shutil.copyfileobj(stream, tmp)
+            duration = max_seconds + 0.1 if max_seconds is not None else None
+            audio, sr = librosa.load(tmp_path, sr=None, duration=duration)
+            return AudioProcessor.resample(audio, sr)
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     @staticmethod
     def generate_synthetic_audio(duration: float = 2.0, sr: int = SAMPLE_RATE) -> np.ndarray:
         """Generate synthetic speech-like audio for testing"""
@@ -299,47 +1034,26 @@ class AudioProcessor:
         audio += 0.15 * np.sin(2 * np.pi * f0 * 3 * t)
         # Add some noise
         audio += 0.1 * np.random.randn(samples)
-        # Normalize
-        audio = audio / np.max(np.abs(audio))
-        return audio
-
-    @staticmethod
-    def decode_audio_from_url(audio_url: str) -> np.ndarray:
-        """Download audio from URL and decode"""
-        try:
-            with urllib.request.urlopen(audio_url) as response:
-                audio_bytes = response.read()
-                content_type = response.headers.get('Content-Type', '')
+        # Normalize; float32 like decoded audio
+        audio /= np.max(np.abs(audio))
+        return audio.astype(np.float32)
 
-            suffix = None
-            if content_type:
-                ext = mimetypes.guess_extension(content_type.split(';')[0].strip())
-                if ext:
-                    suffix = ext
-
-            if not suffix:
-                suffix = os.path.splitext(audio_url.split('?')[0])[1] or ".wav"
-
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                tmp.write(audio_bytes)
-                tmp_path = tmp.name
-
-            audio, sr = librosa.load(tmp_path, sr=SAMPLE_RATE)
-            os.remove(tmp_path)
-            return audio
-        except Exception as e:
-            logger.error(f"Audio URL decoding failed: {e}")
-            raise HTTPException(status_code=400, detail="Invalid audio URL")
-    
     @staticmethod
-    def preprocess_audio(audio: np.ndarray) -> np.ndarray:
-        """Preprocess audio data"""
-        # Normalize
-        if np.max(np.abs(audio)) > 0:
-            audio = audio / np.max(np.abs(audio))
+    @timed_stage("preprocess")
+    def preprocess_audio(audio: np.ndarray, copy: bool = True) -> np.ndarray:
+        """
+        Peak-normalize and remove the DC offset; always returns float32.
+        With copy=False a float32 input is normalized in place.
+        """
+        audio = np.array(audio, dtype=np.float32) if copy else np.asarray(audio, dtype=np.float32)
+        
+        # Normalize (one pass each for max and min instead of two abs() copies)
+        peak = max(audio.max(), -audio.min())
+        if peak > 0:
+            audio /= peak
         
         # Remove DC offset
-        audio = audio - np.mean(audio)
+        audio -= audio.mean()
         
         return audio
 
@@ -347,58 +1061,1678 @@ class AudioProcessor:
 class DeepfakeDetectionModel:
     """Lightweight deepfake detection using spectral analysis"""
     
+    backend = "spectral"
+    version = "1.0.0-lite"
+    
     def __init__(self):
         logger.info("Initializing lightweight detection model...")
     
-    def infer(self, audio_data: np.ndarray) -> dict:
+    @timed_stage("infer")
+    def infer(self, audio_data: np.ndarray, features: Optional[SpectralFeatures] = None) -> dict:
         """Run inference on audio data using spectral analysis"""
         try:
             # Extract spectral features
-            D = librosa.stft(audio_data)
-            S = np.abs(D)
-            S_db = librosa.power_to_db(S, ref=np.max)
+            if features is None:
+                features = SpectralFeatures(audio_data)
+            S = features.magnitude
             
             # Feature 1: Spectral entropy (higher = more noise/synthetic)
-            S_norm = S / (np.sum(S) + 1e-10)
-            spectral_entropy = -np.sum(S_norm * np.log2(S_norm + 1e-10))
-            spectral_entropy = min(1.0, spectral_entropy / 10.0)  # Normalize to [0, 1]
+            spectral_entropy = self._spectral_entropy(S)
             
             # Feature 2: Harmonic-to-Noise Ratio
             hnr = np.max(S) / (np.mean(S) + 1e-10)
-            hnr_norm = min(1.0, (hnr - 1) / 50.0)  # Normalize
             
             # Feature 3: Frequency stability
-            freq_stability = np.std(np.max(S, axis=0)) / (np.mean(np.max(S, axis=0)) + 1e-10)
-            freq_stability_norm = min(1.0, freq_stability * 2)
-            
-            # Combined deepfake probability
-            ai_probability = (spectral_entropy * 0.3 + hnr_norm * 0.4 + freq_stability_norm * 0.3)
+            frame_peaks = np.max(S, axis=0)
+            freq_stability = np.std(frame_peaks) / (np.mean(frame_peaks) + 1e-10)
             
-            return {
-                "human_probability": 1.0 - ai_probability,
-                "ai_probability": min(1.0, max(0.0, ai_probability)),
-                "spectral_entropy": float(spectral_entropy),
-                "hnr": float(hnr_norm),
-                "frequency_stability": float(freq_stability_norm)
-            }
+            return self._combine_scores(spectral_entropy, hnr, freq_stability)
         except Exception as e:
             logger.error(f"Inference failed: {e}")
-            return {
-                "human_probability": 0.5,
-                "ai_probability": 0.5,
-                "spectral_entropy": 0.0,
-                "hnr": 0.0,
-                "frequency_stability": 0.0
-            }
+            return self._fallback_scores()
+    
+    @timed_stage("infer_batch")
+    def infer_batch(self, audio_batch: list, n_fft: int = 2048, hop_length: int = 512) -> tuple:
+        """
+        Vectorized infer() over several clips: clips are zero-padded to a common
+        length, transformed with one stacked STFT, and every feature is reduced
+        over a per-clip frame mask so padding never leaks into the scores.
+        Returns (per-clip results, per-clip unpadded STFT magnitudes).
+        """
+        try:
+            lengths = np.array([len(a) for a in audio_batch])
+            padded = scratch_buffer("batch_padded", (len(audio_batch), int(lengths.max())))
+            for row, audio in zip(padded, audio_batch):
+                row[:len(audio)] = audio
+                row[len(audio):] = 0.0
+            
+            S = np.abs(stft_into_scratch(padded, n_fft, hop_length))  # (clips, freqs, frames)
+            n_frames = np.minimum(1 + lengths // hop_length, S.shape[-1])
+            frame_mask = np.arange(S.shape[-1])[None, :] < n_frames[:, None]  # (clips, frames)
+            for clip_S, valid in zip(S, n_frames):
+                clip_S[:, valid:] = 0.0  # only the padded tail needs clearing
+            cells = n_frames * S.shape[1]
+            
+            # Feature 1: Spectral entropy
+            total = S.sum(axis=(1, 2))
+            spectral_entropy = self._spectral_entropy(S, axis=(1, 2))
+            
+            # Feature 2: Harmonic-to-Noise Ratio
+            hnr = S.max(axis=(1, 2)) / (total / cells + 1e-10)
+            
+            # Feature 3: Frequency stability (masked mean/std of per-frame peaks)
+            frame_peaks = S.max(axis=1)
+            peak_mean = frame_peaks.sum(axis=1) / n_frames
+            peak_std = np.sqrt((((frame_peaks - peak_mean[:, None]) ** 2) * frame_mask).sum(axis=1) / n_frames)
+            freq_stability = peak_std / (peak_mean + 1e-10)
+            
+            results = [
+                self._combine_scores(spectral_entropy[i], hnr[i], freq_stability[i])
+                for i in range(len(audio_batch))
+            ]
+            magnitudes = [S[i, :, :n_frames[i]] for i in range(len(audio_batch))]
+            return results, magnitudes
+        except Exception as e:
+            logger.error(f"Batch inference failed: {e}")
+            return [self._fallback_scores() for _ in audio_batch], [None] * len(audio_batch)
+    
+    @staticmethod
+    def _spectral_entropy(S: np.ndarray, axis=None):
+        """
+        -sum(p * log2(p + 1e-10)) with p = S / (sum(S) + 1e-10), summed over `axis`.
+        Computed in two scratch buffers instead of four full-size temporaries.
+        """
+        total = np.sum(S, axis=axis, keepdims=axis is not None) + 1e-10
+        p = np.divide(S, total, out=scratch_buffer("entropy_p", S.shape, S.dtype))
+        terms = np.add(p, 1e-10, out=scratch_buffer("entropy_terms", S.shape, S.dtype))
+        np.log2(terms, out=terms)
+        terms *= p
+        return -np.sum(terms, axis=axis)
+    
+    @staticmethod
+    def _combine_scores(spectral_entropy: float, hnr: float, freq_stability: float) -> dict:
+        """Normalize the raw spectral features and combine them into a probability"""
+        spectral_entropy = min(1.0, spectral_entropy / 10.0)  # Normalize to [0, 1]
+        hnr_norm = min(1.0, (hnr - 1) / 50.0)  # Normalize
+        freq_stability_norm = min(1.0, freq_stability * 2)
+        
+        # Combined deepfake probability
+        ai_probability = (spectral_entropy * 0.3 + hnr_norm * 0.4 + freq_stability_norm * 0.3)
+        
+        return {
+            "human_probability": 1.0 - ai_probability,
+            "ai_probability": min(1.0, max(0.0, ai_probability)),
+            "spectral_entropy": float(spectral_entropy),
+            "hnr": float(hnr_norm),
+            "frequency_stability": float(freq_stability_norm)
+        }
+    
+    @staticmethod
+    def _fallback_scores() -> dict:
+        return {
+            "human_probability": 0.5,
+            "ai_probability": 0.5,
+            "spectral_entropy": 0.0,
+            "hnr": 0.0,
+            "frequency_stability": 0.0
+        }
+
+class OnnxDeepfakeModel(DeepfakeDetectionModel):
+    """
+    The wav2vec2 classifier exported by src/train_model.py, run with onnxruntime
+    on CPU. One session is built per process and shared by every worker thread
+    (InferenceSession.run is thread-safe).
+    """
+    
+    backend = "onnx"
+    version = "1.0.0-onnx"
+    
+    def __init__(
+        self,
+        model_path: str,
+        variant: str = "fp32",
+        intra_op_threads: int = 1,
+        inter_op_threads: int = 1,
+        warmup_seconds: float = 2.0
+    ):
+        import onnxruntime as ort
+        
+        if variant not in ONNX_MODEL_FILES:
+            raise ValueError(f"Unknown ONNX model variant: {variant}")
+        self.variant = variant
+        if variant != "fp32":
+            self.version = f"{OnnxDeepfakeModel.version}-{variant}"
+        
+        logger.info(f"Loading ONNX detection model ({variant}) from {model_path}...")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.warmup_seconds = warmup_seconds
+        self.warmup()
+    
+    def warmup(self):
+        """Run one dummy clip so graph optimization and allocation happen before traffic"""
+        if self.warmup_seconds > 0:
+            start = time.perf_counter()
+            self._run([np.zeros(int(self.warmup_seconds * SAMPLE_RATE), dtype=np.float32)])
+            logger.info(f"ONNX model warmed up in {(time.perf_counter() - start) * 1000:.0f}ms")
+    
+    def _run(self, audio_batch: list) -> np.ndarray:
+        """Zero-pad and normalize the clips like Wav2Vec2FeatureExtractor, return logits"""
+        lengths = [len(a) for a in audio_batch]
+        input_values = np.zeros((len(audio_batch), max(lengths)), dtype=np.float32)
+        attention_mask = np.zeros(input_values.shape, dtype=np.int64)
+        for row, mask, audio in zip(input_values, attention_mask, audio_batch):
+            clip = np.subtract(audio, audio.mean(), out=row[:len(audio)])
+            clip /= np.sqrt(audio.var() + 1e-7)
+            mask[:len(audio)] = 1
+        
+        feeds = {"input_values": input_values}
+        if "attention_mask" in self.input_names:
+            feeds["attention_mask"] = attention_mask
+        return self.session.run(["logits"], feeds)[0]
+    
+    @staticmethod
+    def _scores(logits: np.ndarray) -> dict:
+        """Softmax over (HUMAN, AI_GENERATED) logits, labelled as in training"""
+        logits = logits.astype(np.float64)
+        probs = np.exp(logits - logits.max())
+        probs /= probs.sum()
+        return {
+            "human_probability": float(probs[0]),
+            "ai_probability": float(probs[1]),
+            "logits": logits.tolist()
+        }
+    
+    @timed_stage("infer")
+    def infer(self, audio_data: np.ndarray, features: Optional[SpectralFeatures] = None) -> dict:
+        """Run the exported classifier on one clip"""
+        try:
+            return self._scores(self._run([audio_data])[0])
+        except Exception as e:
+            logger.error(f"ONNX inference failed: {e}")
+            return self._fallback_scores()
+    
+    @timed_stage("infer_batch")
+    def infer_batch(self, audio_batch: list, n_fft: int = 2048, hop_length: int = 512) -> tuple:
+        """
+        One session run over the padded batch. Graphs exported without an
+        attention_mask input would see the padding, so those run clip by clip.
+        No STFT is computed here, so the returned magnitudes are all None.
+        """
+        try:
+            if "attention_mask" in self.input_names:
+                logits = self._run(audio_batch)
+            else:
+                logits = [self._run([audio])[0] for audio in audio_batch]
+            return [self._scores(clip_logits) for clip_logits in logits], [None] * len(audio_batch)
+        except Exception as e:
+            logger.error(f"ONNX batch inference failed: {e}")
+            return [self._fallback_scores() for _ in audio_batch], [None] * len(audio_batch)
+
+def load_detection_model(backend: str) -> DeepfakeDetectionModel:
+    if backend == "spectral":
+        return DeepfakeDetectionModel()
+    if backend == "onnx":
+        return OnnxDeepfakeModel(
+            ONNX_MODEL_PATH,
+            variant=ONNX_MODEL_VARIANT,
+            intra_op_threads=ONNX_INTRA_OP_THREADS,
+            inter_op_threads=ONNX_INTER_OP_THREADS,
+            warmup_seconds=ONNX_WARMUP_SECONDS
+        )
+    raise ValueError(f"Unknown detection backend: {backend}")
+
+# ==================== Analysis Worker Pool ====================
+class PipelineError(Exception):
+    """Picklable stand-in for HTTPException raised inside pool workers"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+def _call_in_worker(fn, *args):
+    """
+    Run a pipeline stage, translating HTTPException so it survives pickling.
+    Returns (result, stage timings recorded while it ran).
+    """
+    _stage_log.timings = []
+    try:
+        return fn(*args), _stage_log.timings
+    except HTTPException as e:
+        raise PipelineError(e.status_code, str(e.detail))
+    finally:
+        _stage_log.timings = None
+
+class AnalysisExecutor:
+    """Bounded thread/process pool for the CPU-bound decode and analysis stages"""
+
+    def __init__(self, kind: str = "thread", workers: int = 1, queue_limit: int = 16, retry_after: int = 2):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown analysis executor: {kind}")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self.retry_after = retry_after
+        self._pool = None
+        self._pending = 0
+        self.warmed_up = False
+
+    @property
+    def capacity(self) -> int:
+        """Jobs allowed in flight: one per worker plus the waiting queue"""
+        return self.workers + self.queue_limit
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs submitted but not yet picked up by a worker"""
+        return max(0, self._pending - self.workers)
+
+    def start(self):
+        """Create the pool (lazily, so it is never inherited across a fork)"""
+        if self._pool is not None:
+            return
+        if self.kind == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="vanicheck-analysis"
+            )
+        logger.info(f"Analysis pool started ({self.kind}, {self.workers} workers, queue limit {self.queue_limit})")
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def warm_up(self):
+        """
+        Run warm_up_pipeline on the pool. Threads share one interpreter, so one
+        run warms them all; worker processes are spawned on demand, so one
+        concurrent run per worker starts and warms each of them.
+        """
+        started = time.perf_counter()
+        runs = 1 if self.kind == "thread" else self.workers
+        outcomes = await asyncio.gather(*(self.run(warm_up_pipeline) for _ in range(runs)), return_exceptions=True)
+        failures = [o for o in outcomes if isinstance(o, BaseException)]
+        if failures:
+            logger.warning(f"Analysis pool warm-up failed: {failures[0]}")
+            return
+        self.warmed_up = True
+        logger.info(f"Analysis pool warmed up in {time.perf_counter() - started:.2f}s")
+
+    def _release(self, _future):
+        self._pending -= 1
+
+    async def run(self, fn, *args):
+        """
+        Run fn(*args) on the pool without blocking the event loop.
+        Rejects with 503 + Retry-After once the queue is full.
+        """
+        if self._pending >= self.capacity:
+            raise HTTPException(
+                status_code=503,
+                detail="Analysis queue is full, please retry later",
+                headers={"Retry-After": str(self.retry_after)}
+            )
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = self._pool.submit(_call_in_worker, fn, *args)
+        self._pending += 1
+        # Release the slot when the job really finishes, even if the client went away
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(self._release, f))
+        try:
+            result, timings = await asyncio.wrap_future(future)
+        except PipelineError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        observe_stage_timings(timings)
+        return result
+
+analysis_executor = AnalysisExecutor(
+    kind=ANALYSIS_EXECUTOR,
+    workers=ANALYSIS_WORKERS,
+    queue_limit=ANALYSIS_QUEUE_LIMIT,
+    retry_after=ANALYSIS_RETRY_AFTER_SECONDS
+)
+
+# ==================== Request Profiling ====================
+# One profiled request at a time per process: from Python 3.12 cProfile
+# registers a process-wide monitoring tool, so two cannot be enabled at once
+_profile_lock = threading.Lock()
+
+def run_profiled(fn, *args) -> tuple:
+    """
+    Run fn(*args) under cProfile inside the analysis pool, so the profiled
+    thread is the one doing the work. Returns (result, report, raw pstats
+    bytes). The report lists the pipeline stage timings recorded during the
+    run (decode, preprocess, infer, each ForensicAnalyzer stage) and the top
+    functions by own time. Timings include the profiler's overhead. Inference
+    run by the micro-batcher happens on its thread and is not in the profile.
+    """
+    import cProfile
+    import marshal
+    
+    if not _profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="Another request is being profiled, please retry")
+    try:
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            result = fn(*args)
+        finally:
+            profiler.disable()
+        total = time.perf_counter() - start
+    finally:
+        _profile_lock.release()
+    profiler.create_stats()
+    
+    def label(key):
+        filename, line, name = key
+        return name if filename == "~" else f"{os.path.basename(filename)}:{line}({name})"
+    
+    top = sorted(profiler.stats.items(), key=lambda item: item[1][2], reverse=True)[:PROFILE_TOP_FUNCTIONS]
+    report = {
+        "total_ms": round(total * 1000, 3),
+        "stages": [{"stage": stage, "ms": round(elapsed * 1000, 3)} for stage, elapsed in _stage_log.timings or []],
+        "functions": [
+            {"function": label(key), "calls": calls, "self_ms": round(own * 1000, 3), "cumulative_ms": round(cumulative * 1000, 3)}
+            for key, (_, calls, own, cumulative, _) in top
+        ],
+    }
+    # The format pstats.Stats and snakeviz read (what Profile.dump_stats writes)
+    return result, report, marshal.dumps(profiler.stats)
+
+# ==================== Inference Batching ====================
+class InferenceBatcher:
+    """
+    Coalesces infer() calls from concurrent analysis threads into one
+    infer_batch() run. A batch is dispatched when it reaches max_batch_size,
+    when max_wait_ms has passed since its first clip, or as soon as no other
+    thread is inside infer() waiting to join it (so a lone request never
+    waits for company that cannot arrive, e.g. jobs still decoding or running
+    forensics).
+    """
+
+    def __init__(self, max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.reset()
+
+    def reset(self):
+        """
+        Fresh queue, lock and dispatcher. A forked child must call this: the
+        parent's dispatcher does not exist there, but its wait on the queue
+        does, and the child's first put() would wake that instead of the new one.
+        """
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._dispatcher = None
+        self._entered = 0  # clips inside infer() not yet taken into a batch
+
+    def infer(self, audio: np.ndarray) -> tuple:
+        """Blocking; returns (detection result, STFT magnitude or None) for one clip"""
+        self._ensure_dispatcher()
+        future = Future()
+        with self._lock:
+            self._entered += 1
+        self._queue.put((audio, future, time.perf_counter()))
+        return future.result()
+
+    def _take(self, timeout: Optional[float] = None) -> tuple:
+        item = self._queue.get(timeout=timeout)
+        with self._lock:
+            self._entered -= 1
+        return item
+
+    def _ensure_dispatcher(self):
+        # Started on first use so it is never inherited across a fork
+        with self._lock:
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch_loop, name="vanicheck-infer-batcher", daemon=True
+                )
+                self._dispatcher.start()
+
+    def _collect(self) -> list:
+        batch = [self._take()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size and self._entered > 0:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._take(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch_loop(self):
+        while True:
+            batch = self._collect()
+            dispatched = time.perf_counter()
+            INFER_BATCH_SIZE.observe(len(batch))
+            for _, _, queued in batch:
+                INFER_QUEUE_SECONDS.observe(dispatched - queued)
+            try:
+                results, magnitudes = detection_model.infer_batch([audio for audio, _, _ in batch])
+                for (_, future, _), result, magnitude in zip(batch, results, magnitudes):
+                    future.set_result((result, magnitude))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+
+inference_batcher = (
+    InferenceBatcher(INFER_BATCH_MAX_SIZE, INFER_BATCH_WAIT_MS)
+    if INFER_BATCH_MAX_SIZE > 1 and ANALYSIS_EXECUTOR == "thread" else None
+)
+
+# ==================== Audio URL Fetching ====================
+class AudioFetcher:
+    """
+    Async audioUrl downloader on a shared httpx connection pool.
+    Downloads are streamed and aborted as soon as they exceed max_bytes.
+    """
+
+    def __init__(self, connect_timeout: float = 5, read_timeout: float = 15,
+                 max_bytes: int = MAX_FETCH_BYTES, max_connections: int = 20, total_timeout: float = 60):
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.max_bytes = max_bytes
+        # httpx's read timeout applies per read, so a trickling origin is bounded by this instead
+        self.total_timeout = total_timeout
+        self._clients = {}  # event loop -> client
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # A client is bound to the loop that created it, so each loop gets its own
+        # (one per server worker); clients of loops that have since closed are dropped
+        loop = asyncio.get_running_loop()
+        for stale in [other for other in self._clients if other.is_closed()]:
+            del self._clients[stale]
+        client = self._clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, follow_redirects=True)
+            self._clients[loop] = client
+        return client
+
+    async def aclose(self):
+        """Close the running loop's client"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def _too_large(self, max_bytes: int) -> HTTPException:
+        return HTTPException(
+            status_code=413,
+            detail=f"Audio URL too large. Max allowed is {max_bytes} bytes"
+        )
+
+    async def fetch(self, audio_url: str, max_bytes: Optional[int] = None) -> tuple:
+        """Download audio from URL, returning (bytes, file suffix)"""
+        sink = io.BytesIO()
+        with timed_stage("url_fetch"):
+            suffix = await self._fetch(audio_url, max_bytes or self.max_bytes, sink)
+        return sink.getvalue(), suffix
+
+    async def fetch_to_file(self, audio_url: str, max_bytes: Optional[int] = None) -> tuple:
+        """
+        Download audio from URL into a temp file, returning (path, file suffix);
+        the caller removes the file. For long recordings, which should not be
+        held in memory.
+        """
+        with tempfile.NamedTemporaryFile(delete=False) as sink:
+            path = sink.name
+            try:
+                with timed_stage("url_fetch"):
+                    suffix = await self._fetch(audio_url, max_bytes or self.max_bytes, sink)
+            except BaseException:
+                sink.close()
+                os.remove(path)
+                raise
+        return path, suffix
+
+    async def _fetch(self, audio_url: str, max_bytes: int, sink) -> str:
+        """Stream the download into sink (a binary file object); returns the file suffix"""
+        if urlparse(audio_url).scheme not in ("http", "https"):
+            raise HTTPException(status_code=400, detail="Invalid audio URL")
+        try:
+            async with asyncio.timeout(self.total_timeout):
+                async with self._get_client().stream("GET", audio_url) as response:
+                    if response.status_code >= 400:
+                        logger.error(f"Audio URL download failed: HTTP {response.status_code}")
+                        raise HTTPException(status_code=400, detail="Invalid audio URL")
+                    declared = response.headers.get("Content-Length", "")
+                    if declared.isdigit() and int(declared) > max_bytes:
+                        raise self._too_large(max_bytes)
+                    
+                    received = 0
+                    async for chunk in response.aiter_bytes():
+                        received += len(chunk)
+                        if received > max_bytes:
+                            raise self._too_large(max_bytes)
+                        sink.write(chunk)
+                    content_type = response.headers.get('Content-Type', '')
+        except TimeoutError:
+            logger.error(f"Audio URL download exceeded {self.total_timeout}s")
+            raise HTTPException(status_code=504, detail="Audio URL download timed out")
+        except httpx.TimeoutException as e:
+            logger.error(f"Audio URL download timed out: {e!r}")
+            raise HTTPException(status_code=504, detail="Audio URL download timed out")
+        except httpx.HTTPError as e:
+            logger.error(f"Audio URL download failed: {e!r}")
+            raise HTTPException(status_code=400, detail="Invalid audio URL")
+
+        suffix = None
+        if content_type:
+            ext = mimetypes.guess_extension(content_type.split(';')[0].strip())
+            if ext:
+                suffix = ext
+
+        if not suffix:
+            suffix = os.path.splitext(audio_url.split('?')[0])[1] or ".wav"
+
+        return suffix
+
+audio_fetcher = AudioFetcher(
+    connect_timeout=AUDIO_FETCH_CONNECT_TIMEOUT,
+    read_timeout=AUDIO_FETCH_READ_TIMEOUT,
+    max_bytes=MAX_FETCH_BYTES,
+    max_connections=AUDIO_FETCH_MAX_CONNECTIONS,
+    total_timeout=AUDIO_FETCH_TOTAL_TIMEOUT
+)
+
+# ==================== Result Cache ====================
+class ResultCache:
+    """
+    LRU + TTL cache of pipeline results keyed by a hash of the audio bytes
+    and analysis settings, with an optional on-disk tier shared across restarts.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir or None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(audio_digest: str, language: str, **settings) -> str:
+        """Combine the audio hash with everything that changes the result"""
+        parts = [audio_digest, language] + [f"{k}={settings[k]}" for k in sorted(settings)]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+        result = self._disk_get(key, now)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, result, now + self.ttl_seconds)
+        return result
+
+    def put(self, key: str, result: dict):
+        if not self.enabled:
+            return
+        result = convert_numpy_types(result)
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, result, expires_at)
+        self._disk_put(key, result, expires_at)
+
+    def _remember(self, key: str, result: dict, expires_at: float):
+        with self._lock:
+            self._entries[key] = (expires_at, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _disk_get(self, key: str, now: float) -> Optional[dict]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires_at", 0) <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry["result"]
+
+    def _disk_put(self, key: str, result: dict, expires_at: float):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            # Write then rename so readers never see a partial file
+            with tempfile.NamedTemporaryFile("w", dir=self.disk_dir, suffix=".tmp", delete=False) as tmp:
+                json.dump({"expires_at": expires_at, "result": result}, tmp)
+            os.replace(tmp.name, path)
+        except OSError as e:
+            logger.warning(f"Result cache disk write failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "disk_tier": bool(self.disk_dir),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0
+        }
+
+result_cache = ResultCache(
+    max_entries=RESULT_CACHE_SIZE,
+    ttl_seconds=RESULT_CACHE_TTL_SECONDS,
+    disk_dir=RESULT_CACHE_DIR
+)
 
 # ==================== Global Model Instance ====================
 try:
-    detection_model = DeepfakeDetectionModel()
-    logger.info("✓ Detection model loaded successfully")
+    detection_model = load_detection_model(DETECTION_BACKEND)
+    logger.info(f"✓ Detection model loaded successfully ({detection_model.backend})")
 except Exception as e:
     logger.error(f"Failed to load detection model: {e}")
     detection_model = None
 
+# ==================== Detection Pipeline ====================
+def run_detection_pipeline(
+    audio_bytes: bytes,
+    audio_format: Optional[str] = None,
+    filename: Optional[str] = None,
+    pitch_backend: Optional[str] = None,
+    mode: Optional[str] = None
+) -> dict:
+    """Decode, preprocess and analyze one base64-submitted clip (runs inside the analysis pool)"""
+    audio_data, synthetic = AudioProcessor.decode_with_fallback(
+        audio_bytes, audio_format=audio_format, filename=filename, max_seconds=MAX_AUDIO_SECONDS
+    )
+    result = analyze_audio(audio_data, pitch_backend, mode)
+    if synthetic:
+        result["synthetic_fallback"] = True
+    return result
+
+def run_file_pipeline(source, suffix: str = ".wav", pitch_backend: Optional[str] = None, mode: Optional[str] = None) -> dict:
+    """Decode an uploaded or downloaded file object (or its bytes) and analyze it"""
+    return analyze_audio(decode_file_audio(source, suffix), pitch_backend, mode)
+
+def decode_file_audio(source, suffix: str = ".wav") -> np.ndarray:
+    try:
+        return AudioProcessor.load_audio(source, suffix=suffix, max_seconds=MAX_AUDIO_SECONDS)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Audio file decoding failed: {e}")
+        raise HTTPException(status_code=400, detail="Invalid audio data")
+
+def prepare_audio(audio_data: np.ndarray) -> tuple:
+    """
+    Enforce the duration limit and preprocess; returns (audio, duration_seconds).
+    The pipeline owns its decoded arrays, so they are preprocessed in place.
+    """
+    duration_seconds = len(audio_data) / float(SAMPLE_RATE)
+    if duration_seconds > MAX_AUDIO_SECONDS:
+        raise audio_too_long(MAX_AUDIO_SECONDS)
+    return AudioProcessor.preprocess_audio(audio_data, copy=False), duration_seconds
+
+def analyze_audio(audio_data: np.ndarray, pitch_backend: Optional[str] = None, mode: Optional[str] = None) -> dict:
+    """Enforce the duration limit, preprocess (in place), detect and run forensics"""
+    audio_data, duration_seconds = prepare_audio(audio_data)
+    if inference_batcher is not None:
+        detection, magnitude = inference_batcher.infer(audio_data)
+        features = SpectralFeatures(audio_data, SAMPLE_RATE, magnitude=magnitude)
+    else:
+        features = SpectralFeatures(audio_data, SAMPLE_RATE)
+        detection = detection_model.infer(audio_data, features)
+
+    return {
+        "duration_seconds": duration_seconds,
+        "detection": detection,
+        **run_forensics(audio_data, features, detection, pitch_backend, mode),
+    }
+
+def run_forensics(audio: np.ndarray, features: SpectralFeatures, detection: dict,
+                  pitch_backend: Optional[str] = None, mode: Optional[str] = None) -> dict:
+    """
+    Forensics at the requested depth. "cascade" only pays for the full set
+    when the detector score is UNCERTAIN; confident scores stop at "fast".
+    """
+    mode = ForensicAnalyzer.resolve_mode(mode)
+    depth = mode
+    if mode == ForensicAnalyzer.CASCADE:
+        depth = "full" if in_uncertain_band(detection["ai_probability"]) else "fast"
+    result = {
+        "forensics": ForensicAnalyzer.comprehensive_analysis(audio, SAMPLE_RATE, features, pitch_backend, depth),
+        "analysis_mode": mode,
+    }
+    if mode == ForensicAnalyzer.CASCADE:
+        result["escalated"] = depth == "full"
+    return result
+
+def decode_batch_item(
+    audio_bytes: bytes,
+    audio_format: Optional[str] = None,
+    filename: Optional[str] = None,
+    url_suffix: Optional[str] = None
+) -> tuple:
+    """
+    Decode and preprocess one batch clip (runs inside the analysis pool);
+    returns ((audio, duration_seconds), whether synthetic audio stood in)
+    """
+    if url_suffix:
+        audio_data, synthetic = decode_file_audio(audio_bytes, url_suffix), False
+    else:
+        audio_data, synthetic = AudioProcessor.decode_with_fallback(
+            audio_bytes, audio_format=audio_format, filename=filename, max_seconds=MAX_AUDIO_SECONDS
+        )
+    return prepare_audio(audio_data), synthetic
+
+def run_batch_analysis(clips: list, pitch_backends: list, modes: Optional[list] = None) -> list:
+    """
+    Stacked infer() over decoded (audio, duration) clips, then per-clip forensics
+    that reuse each clip's slice of the batched STFT (runs inside the analysis pool)
+    """
+    detections, magnitudes = detection_model.infer_batch([audio for audio, _ in clips])
+    modes = modes or [None] * len(clips)
+    results = []
+    for (audio, duration_seconds), detection, magnitude, pitch_backend, mode in zip(
+        clips, detections, magnitudes, pitch_backends, modes
+    ):
+        features = SpectralFeatures(audio, SAMPLE_RATE, magnitude=magnitude)
+        results.append({
+            "duration_seconds": duration_seconds,
+            "detection": detection,
+            **run_forensics(audio, features, detection, pitch_backend, mode),
+        })
+    return results
+
+def run_long_pipeline(source, window_seconds: float, hop_seconds: float,
+                      pitch_backend: Optional[str] = None, mode: Optional[str] = None) -> dict:
+    """
+    Detect and run forensics per overlapping window of a long recording
+    (runs inside the analysis pool). Near-silent windows are skipped.
+    """
+    segments = []
+    duration_seconds = 0.0
+    windows = AudioProcessor.iter_windows(source, window_seconds, hop_seconds, MAX_LONG_AUDIO_SECONDS, LONG_AUDIO_MAX_WINDOWS)
+    for start, window in windows:
+        end = start + len(window) / float(SAMPLE_RATE)
+        duration_seconds = end
+        if len(segments) > 0 and end - start < 0.5:
+            continue  # too short to analyse on its own
+        segment = {"start_seconds": start, "end_seconds": end}
+        if np.sqrt(np.mean(np.square(window, dtype=np.float64))) < LONG_AUDIO_SILENCE_RMS:
+            segment["silent"] = True
+        else:
+            result = analyze_audio(window, pitch_backend, mode)
+            segment["detection"] = result["detection"]
+            segment["forensics"] = result["forensics"]
+            segment["escalated"] = result.get("escalated")
+        segments.append(segment)
+    return {"duration_seconds": duration_seconds, "segments": segments, "analysis_mode": ForensicAnalyzer.resolve_mode(mode)}
+
+def warm_up_pipeline() -> None:
+    """
+    Decode and fully analyse a short synthetic clip. librosa imports its
+    submodules lazily and compiles its numba kernels on first call; doing that
+    here keeps the cost off the first real request. With NUMBA_CACHE_DIR set
+    (as in the Dockerfile) the compiled kernels are also reused across restarts.
+    """
+    sr = 44100  # not SAMPLE_RATE, so the resampler is exercised too
+    t = np.arange(sr) / sr
+    clip = (0.3 * np.sin(2 * np.pi * (120 + 20 * np.sin(2 * np.pi * 3 * t)) * t)).astype(np.float32)
+    buffer = io.BytesIO()
+    sf.write(buffer, clip, sr, format="WAV")
+    run_file_pipeline(buffer.getvalue(), ".wav", PITCH_BACKEND, "full")
+
+def plan_batch_stacks(durations: list, max_seconds: float) -> list:
+    """
+    Group clip indices into stacks for infer_batch: similar lengths go together
+    (less padding) and each stack holds at most max_seconds of padded audio.
+    """
+    stacks, current = [], []
+    for index in sorted(range(len(durations)), key=lambda i: durations[i]):
+        # Sorted ascending, so the newest clip is the longest and sets the padded length
+        if current and durations[index] * (len(current) + 1) > max_seconds:
+            stacks.append(current)
+            current = []
+        current.append(index)
+    if current:
+        stacks.append(current)
+    return stacks
+
+def decide_verdict(ai_prob: float) -> tuple:
+    """Map an AI probability to (verdict, confidence, explanation)"""
+    if ai_prob > (1 - MIN_CONFIDENCE_THRESHOLD):
+        verdict = "AI_GENERATED"
+        confidence = ai_prob
+        explanation = "Audio contains characteristics typical of AI-generated speech"
+    elif ai_prob < MIN_CONFIDENCE_THRESHOLD:
+        verdict = "HUMAN"
+        confidence = 1.0 - ai_prob
+        explanation = "Audio appears to be authentic human speech"
+    else:
+        verdict = "UNCERTAIN"
+        confidence = 0.5
+        explanation = "Unable to make definitive determination"
+    return verdict, confidence, explanation
+
+def in_uncertain_band(ai_prob: float) -> bool:
+    """
+    True between 1 - MIN_CONFIDENCE_THRESHOLD and MIN_CONFIDENCE_THRESHOLD, where
+    cascade mode escalates. It only sets the analysis depth; decide_verdict's
+    mapping does not use it.
+    """
+    return (1 - MIN_CONFIDENCE_THRESHOLD) < ai_prob < MIN_CONFIDENCE_THRESHOLD
+
+def forensic_payload(forensic_result: dict, ai_prob: float) -> dict:
+    """Analyzer reports (only those the analysis mode ran) plus the detector scores"""
+    return convert_numpy_types({
+        **forensic_result,
+        "detection_scores": {
+            "ai_probability": float(ai_prob),
+            "human_probability": float(1.0 - ai_prob)
+        }
+    })
+
+def build_detection_response(pipeline_result: dict, language: str, start_time: float) -> AudioDetectionResponse:
+    """Turn pipeline output into the verdict response"""
+    duration_seconds = pipeline_result["duration_seconds"]
+    detection_result = pipeline_result["detection"]
+    forensic_result = pipeline_result["forensics"]
+    
+    # Determine verdict
+    ai_prob = detection_result["ai_probability"]
+    verdict, confidence, explanation = decide_verdict(ai_prob)
+    
+    # Calculate processing time
+    processing_time_ms = (time.time() - start_time) * 1000
+    
+    # Prepare forensic analysis with converted types
+    forensic_data = forensic_payload(forensic_result, ai_prob)
+    
+    return AudioDetectionResponse(
+        verdict=verdict,
+        confidence=float(confidence),
+        explanation=explanation,
+        forensic_analysis=forensic_data,
+        processing_time_ms=processing_time_ms,
+        duration_seconds=float(duration_seconds),
+        language_detected=language.lower(),
+        model_version=detection_model.version,
+        analysis_mode=pipeline_result.get("analysis_mode", "full"),
+        escalated=pipeline_result.get("escalated"),
+        timestamp=datetime.utcnow().isoformat()
+    )
+
+def build_long_detection_response(
+    pipeline_result: dict,
+    language: str,
+    window_seconds: float,
+    hop_seconds: float,
+    start_time: float
+) -> LongAudioDetectionResponse:
+    """Per-window timeline plus a verdict from the mean AI probability of the voiced windows"""
+    segments = []
+    voiced = []
+    ai_intervals = []
+    for segment in pipeline_result["segments"]:
+        if segment.get("silent"):
+            segments.append(SegmentResult(
+                start_seconds=segment["start_seconds"], end_seconds=segment["end_seconds"],
+                verdict="SILENCE", confidence=1.0
+            ))
+            continue
+        ai_prob = segment["detection"]["ai_probability"]
+        verdict, confidence, _ = decide_verdict(ai_prob)
+        voiced.append(ai_prob)
+        if verdict == "AI_GENERATED":
+            ai_intervals.append((segment["start_seconds"], segment["end_seconds"]))
+        segments.append(SegmentResult(
+            start_seconds=segment["start_seconds"], end_seconds=segment["end_seconds"],
+            verdict=verdict, confidence=float(confidence), ai_probability=float(ai_prob),
+            forensic_analysis=forensic_payload(segment["forensics"], ai_prob)
+        ))
+    
+    if voiced:
+        verdict, confidence, explanation = decide_verdict(float(np.mean(voiced)))
+    else:
+        verdict, confidence, explanation = "UNCERTAIN", 0.5, "No speech found in the recording"
+    
+    # Overlapping windows: count each second flagged as AI once
+    ai_seconds, covered_until = 0.0, 0.0
+    for start, end in ai_intervals:
+        ai_seconds += max(0.0, end - max(start, covered_until))
+        covered_until = max(covered_until, end)
+    
+    return LongAudioDetectionResponse(
+        verdict=verdict,
+        confidence=float(confidence),
+        explanation=explanation,
+        duration_seconds=float(pipeline_result["duration_seconds"]),
+        window_seconds=window_seconds,
+        hop_seconds=hop_seconds,
+        summary={
+            "segments": len(segments),
+            "voiced_segments": len(voiced),
+            "ai_segments": len(ai_intervals),
+            "ai_seconds": round(ai_seconds, 3),
+            "mean_ai_probability": float(np.mean(voiced)) if voiced else None,
+            "max_ai_probability": float(np.max(voiced)) if voiced else None,
+            "escalated_segments": sum(1 for s in pipeline_result["segments"] if s.get("escalated"))
+        },
+        segments=segments,
+        processing_time_ms=(time.time() - start_time) * 1000,
+        language_detected=language.lower(),
+        model_version=detection_model.version,
+        analysis_mode=pipeline_result.get("analysis_mode", "full"),
+        timestamp=datetime.utcnow().isoformat()
+    )
+
+# ==================== Live Streams ====================
+STREAM_ENCODINGS = {"pcm_s16le": ("<i2", 32768.0), "pcm_f32le": ("<f4", 1.0)}
+active_streams = 0
+
+class StreamingSpectrum:
+    """
+    Rolling window of a live stream plus its STFT magnitude. Frames are
+    appended as samples arrive (center=False framing), so an update only pays
+    for the FFTs of the audio received since the last one.
+    """
+
+    def __init__(self, window_seconds: float, sr: int = SAMPLE_RATE, n_fft: int = 2048, hop_length: int = 512):
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.window_samples = int(window_seconds * sr)
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.frames = deque(maxlen=max(1, (self.window_samples - n_fft) // hop_length + 1))
+        self.fft_window = dsp_constants(sr, n_fft).window_f32
+        self.total_samples = 0
+        self._tail = np.zeros(0, dtype=np.float32)  # samples not yet consumed by a frame hop
+
+    def push(self, samples: np.ndarray):
+        samples = np.asarray(samples, dtype=np.float32)
+        self.total_samples += len(samples)
+        self.audio = np.concatenate([self.audio, samples])[-self.window_samples:]
+        tail = np.concatenate([self._tail, samples])
+        if len(tail) >= self.n_fft:
+            n_new = 1 + (len(tail) - self.n_fft) // self.hop_length
+            frames = librosa.util.frame(
+                tail[:(n_new - 1) * self.hop_length + self.n_fft], frame_length=self.n_fft, hop_length=self.hop_length
+            )
+            spectrum = np.abs(np.fft.rfft(frames * self.fft_window[:, None], axis=0)).astype(np.float32)
+            self.frames.extend(spectrum.T)
+            tail = tail[n_new * self.hop_length:]
+        self._tail = tail
+
+    def snapshot(self) -> tuple:
+        """(window audio, window STFT magnitude) copies, safe to hand to a worker"""
+        if self.frames:
+            magnitude = np.stack(self.frames, axis=1)
+        else:
+            magnitude = np.zeros((self.n_fft // 2 + 1, 0), dtype=np.float32)
+        return self.audio.copy(), magnitude
+
+def score_stream_window(audio: np.ndarray, magnitude: np.ndarray) -> tuple:
+    """
+    infer() on a live window with its incrementally built STFT (runs inside the
+    analysis pool). Returns (detection result, CPU seconds spent).
+    """
+    started = time.thread_time()
+    features = SpectralFeatures(audio, SAMPLE_RATE, magnitude=magnitude)
+    return detection_model.infer(audio, features), time.thread_time() - started
+
+# ==================== Upload Handling ====================
+def result_cache_key(audio_digest: str, language: str, pitch_backend: Optional[str],
+                     mode: Optional[str] = None, **settings) -> str:
+    """Cache key for a clip under the settings that shape its result"""
+    return ResultCache.make_key(
+        audio_digest,
+        language.lower(),
+        pitch_backend=PitchTracker.resolve(pitch_backend),
+        analysis_mode=ForensicAnalyzer.resolve_mode(mode),
+        model_version=detection_model.version,
+        resample_quality=RESAMPLE_QUALITY,
+        **settings
+    )
+
+def cache_pipeline_result(cache_key: str, pipeline_result: dict):
+    """Store a pipeline result unless synthetic audio stood in for an undecodable payload"""
+    if not pipeline_result.get("synthetic_fallback"):
+        result_cache.put(cache_key, pipeline_result)
+
+async def run_cached(cache_key: str, response: Optional[Response], fn, *args, executor: Optional["AnalysisExecutor"] = None) -> dict:
+    """Serve a pipeline result from the cache, or run it on the pool and store it"""
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        if response is not None:
+            response.headers["X-Cache"] = "HIT"
+        return cached
+    pipeline_result = await (executor or analysis_executor).run(fn, *args)
+    cache_pipeline_result(cache_key, pipeline_result)
+    if response is not None:
+        response.headers["X-Cache"] = "MISS"
+    return pipeline_result
+
+async def resolve_detection_pipeline(request: AudioDetectionRequest) -> tuple:
+    """Raw audio bytes for a JSON detection request, plus the pool job that analyses them"""
+    if request.audio_url:
+        audio_bytes, suffix = await audio_fetcher.fetch(request.audio_url)
+        return audio_bytes, (run_file_pipeline, audio_bytes, suffix, request.pitch_backend, request.mode)
+    audio_bytes = AudioProcessor.decode_base64(request.audio_data)
+    return audio_bytes, (
+        run_detection_pipeline, audio_bytes, request.audioFormat, request.filename, request.pitch_backend, request.mode
+    )
+
+def hash_file(fileobj, chunk_size: int = 1024 * 1024) -> str:
+    """sha256 of a file object's contents, leaving it rewound"""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+async def hash_upload(fileobj) -> str:
+    """
+    hash_file on a worker thread: long uploads can be hundreds of MB, and
+    hashing them on the event loop would stall every other connection
+    (hashlib releases the GIL while it digests)
+    """
+    return await asyncio.to_thread(hash_file, fileobj)
+
+def validate_language(language: Optional[str]) -> str:
+    if not language:
+        raise HTTPException(status_code=400, detail="language field is required")
+    if language.lower() not in SUPPORTED_LANGUAGES:
+        raise HTTPException(status_code=400, detail=f"Language {language} not supported")
+    return language.lower()
+
+def upload_suffix(content_type: Optional[str], filename: Optional[str]) -> str:
+    """Pick a file suffix for an upload from its filename or MIME type"""
+    if filename and "." in filename:
+        return f".{filename.rsplit('.', 1)[-1].lower()}"
+    if content_type:
+        ext = mimetypes.guess_extension(content_type.split(';')[0].strip())
+        if ext:
+            return ext
+    return ".wav"
+
+class UploadTooLarge(MultiPartException):
+    """A request body passed its byte cap mid-stream (MultiPartParser closes its spooled parts on it)"""
+
+async def capped_body(request: Request, max_bytes: int):
+    """request.stream(), raising UploadTooLarge once more than max_bytes arrive (chunked bodies included)"""
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise UploadTooLarge(f"Upload too large. Max allowed is {max_bytes} bytes")
+        yield chunk
+
+async def spool_request_body(request: Request, max_bytes: int = MAX_UPLOAD_BYTES) -> tempfile.SpooledTemporaryFile:
+    """
+    Stream a raw request body into a spooled file: memory use stays under
+    UPLOAD_SPOOL_BYTES and the upload is cut off at max_bytes.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+    try:
+        async for chunk in capped_body(request, max_bytes):
+            spool.write(chunk)
+    except UploadTooLarge as exc:
+        spool.close()
+        raise HTTPException(status_code=413, detail=exc.message)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+async def read_upload(request: Request, max_bytes: int, fields: dict, filename: Optional[str] = None) -> tuple:
+    """
+    Pull the audio out of a multipart/form-data or raw audio/* request.
+    Form fields override the matching entries of `fields` (query-string
+    values). Returns (file object, suffix, fields, form); the caller closes
+    the form if there is one, else the file object.
+    """
+    content_type = request.headers.get("content-type", "")
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and int(declared_length) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Upload too large. Max allowed is {max_bytes} bytes")
+    
+    fields = dict(fields)
+    if content_type.startswith("multipart/form-data"):
+        # Starlette spools file parts to disk past 1 MB, so memory stays bounded;
+        # the body is counted as it streams, so chunked uploads hit the cap too
+        try:
+            form = await MultiPartParser(request.headers, capped_body(request, max_bytes), max_files=1).parse()
+        except UploadTooLarge as exc:
+            raise HTTPException(status_code=413, detail=exc.message)
+        except MultiPartException as exc:
+            raise HTTPException(status_code=400, detail=exc.message)
+        try:
+            part = form.get("file") or form.get("audio")
+            if part is None or isinstance(part, str):
+                raise HTTPException(status_code=400, detail="multipart upload needs a 'file' part")
+            for name in fields:
+                snake = "".join(f"_{c.lower()}" if c.isupper() else c for c in name)
+                fields[name] = form.get(name) or form.get(snake) or fields[name]
+        except BaseException:
+            await form.close()
+            raise
+        return part.file, upload_suffix(part.content_type, part.filename or filename), fields, form
+    if content_type.startswith("audio/") or content_type.startswith("application/octet-stream"):
+        upload = await spool_request_body(request, max_bytes)
+        return upload, upload_suffix(content_type, filename), fields, None
+    raise HTTPException(status_code=415, detail="Send multipart/form-data or an audio/* body")
+
+# ==================== Jobs ====================
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+class JobStore(ABC):
+    """
+    Job state: {"job_id", "status", "created_at", "started_at", "finished_at",
+    "request", "callback_url", "result", "error", "callback"}. The request
+    payload is kept only until the job finishes.
+    """
+
+    @abstractmethod
+    def create(self, job: dict):
+        """Store a new queued job"""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[dict]:
+        """The job, or None if it is unknown or was purged"""
+
+    @abstractmethod
+    def claim(self, job_id: str) -> Optional[dict]:
+        """Atomically move a queued job to running; None if someone else has it"""
+
+    @abstractmethod
+    def finish(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[dict] = None):
+        """Record a job's final status and drop its request payload"""
+
+    @abstractmethod
+    def set_callback(self, job_id: str, callback: dict):
+        """Record the outcome of the webhook delivery"""
+
+    def requeue_running(self):
+        """Mark jobs a previous process left running as queued again"""
+
+    @abstractmethod
+    def release(self, job_ids: list):
+        """Put jobs this process claimed but did not finish back in the queue"""
+
+    def resumable(self) -> list:
+        """Ids of queued jobs, oldest first (including ones a previous process left)"""
+        return []
+
+    @abstractmethod
+    def purge(self, finished_before: float) -> int:
+        """Delete jobs that finished before the timestamp; returns how many"""
+
+class MemoryJobStore(JobStore):
+    """Process-local job state (lost on restart)"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: dict):
+        with self._lock:
+            self._jobs[job["job_id"]] = dict(job)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def claim(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                return None
+            job.update(status="running", started_at=time.time())
+            return dict(job)
+
+    def finish(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[dict] = None):
+        with self._lock:
+            self._jobs[job_id].update(status=status, finished_at=time.time(), result=result, error=error, request=None)
+
+    def set_callback(self, job_id: str, callback: dict):
+        with self._lock:
+            self._jobs[job_id]["callback"] = callback
+
+    def release(self, job_ids: list):
+        with self._lock:
+            for job_id in job_ids:
+                job = self._jobs.get(job_id)
+                if job is not None and job["status"] == "running":
+                    job.update(status="queued", started_at=None)
+
+    def purge(self, finished_before: float) -> int:
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job["finished_at"] is not None and job["finished_at"] < finished_before]
+            for job_id in expired:
+                del self._jobs[job_id]
+            return len(expired)
+
+class SQLiteJobStore(JobStore):
+    """
+    Job state in a SQLite file, so results survive restarts and queued jobs
+    are picked up again. Several server workers can share one file.
+    """
+
+    JSON_COLUMNS = ("request", "result", "error", "callback")
+    COLUMNS = ("job_id", "status", "created_at", "started_at", "finished_at",
+               "request", "callback_url", "result", "error", "callback")
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL, request TEXT, callback_url TEXT, "
+            "result TEXT, error TEXT, callback TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+
+    def _connect(self):
+        self._pid = os.getpid()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            if self._pid != os.getpid():
+                # A connection must not be used across fork (gunicorn preload); the parent keeps its own
+                self._connect()
+            return self._conn.execute(sql, params)
+
+    def _row_to_job(self, row) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(zip(self.COLUMNS, row))
+        for column in self.JSON_COLUMNS:
+            if job[column] is not None:
+                job[column] = json.loads(job[column])
+        return job
+
+    def create(self, job: dict):
+        values = [json.dumps(job[c]) if c in self.JSON_COLUMNS and job[c] is not None else job[c] for c in self.COLUMNS]
+        self._execute(f"INSERT INTO jobs VALUES ({', '.join('?' * len(self.COLUMNS))})", tuple(values))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._execute(f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def claim(self, job_id: str) -> Optional[dict]:
+        claimed = self._execute(
+            "UPDATE jobs SET status = 'running', started_at = ? WHERE job_id = ? AND status = 'queued'",
+            (time.time(), job_id)
+        ).rowcount
+        return self.get(job_id) if claimed else None
+
+    def finish(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[dict] = None):
+        self._execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ?, request = NULL WHERE job_id = ?",
+            (status, time.time(), json.dumps(result) if result is not None else None,
+             json.dumps(error) if error is not None else None, job_id)
+        )
+
+    def set_callback(self, job_id: str, callback: dict):
+        self._execute("UPDATE jobs SET callback = ? WHERE job_id = ?", (json.dumps(callback), job_id))
+
+    def requeue_running(self):
+        # A job still "running" here was cut off by a restart: run it again
+        self._execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+
+    def release(self, job_ids: list):
+        for job_id in job_ids:
+            self._execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE job_id = ? AND status = 'running'", (job_id,))
+
+    def resumable(self) -> list:
+        rows = self._execute("SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at").fetchall()
+        return [row[0] for row in rows]
+
+    def purge(self, finished_before: float) -> int:
+        return self._execute("DELETE FROM jobs WHERE finished_at < ?", (finished_before,)).rowcount
+
+def create_job_store(kind: str) -> JobStore:
+    if kind == "memory":
+        return MemoryJobStore()
+    if kind == "sqlite":
+        return SQLiteJobStore(JOB_STORE_PATH)
+    raise ValueError(f"Unknown job store: {kind}")
+
+async def execute_job(request: JobRequest, executor: "AnalysisExecutor") -> dict:
+    """Run a detection job to its response body (as /v1/detect or /v1/detect/long would)"""
+    start_time = time.time()
+    language = validate_language(request.language)
+    if request.long_audio:
+        # Downloads go to a temp file (a path also reaches process workers) rather than memory
+        download_path = None
+        try:
+            if request.audio_url:
+                download_path, _ = await audio_fetcher.fetch_to_file(request.audio_url, MAX_LONG_UPLOAD_BYTES)
+                with open(download_path, "rb") as f:
+                    digest = await hash_upload(f)
+                source = download_path
+            else:
+                source = io.BytesIO(AudioProcessor.decode_base64(request.audio_data))
+                digest = await hash_upload(source)
+            cache_key = result_cache_key(
+                digest, language, request.pitch_backend, request.mode,
+                long_window=LONG_AUDIO_WINDOW_SECONDS, long_hop=LONG_AUDIO_HOP_SECONDS
+            )
+            pipeline_result = await run_cached(
+                cache_key, None, run_long_pipeline, source,
+                LONG_AUDIO_WINDOW_SECONDS, LONG_AUDIO_HOP_SECONDS, request.pitch_backend, request.mode, executor=executor
+            )
+        finally:
+            if download_path:
+                os.remove(download_path)
+        response = build_long_detection_response(
+            pipeline_result, language, LONG_AUDIO_WINDOW_SECONDS, LONG_AUDIO_HOP_SECONDS, start_time
+        )
+    else:
+        audio_bytes, pipeline = await resolve_detection_pipeline(request)
+        cache_key = result_cache_key(hashlib.sha256(audio_bytes).hexdigest(), language, request.pitch_backend, request.mode)
+        pipeline_result = await run_cached(cache_key, None, *pipeline, executor=executor)
+        response = build_detection_response(pipeline_result, language, start_time)
+    record_detection("job", 200, response.verdict, response.language_detected)
+    return response.model_dump()
+
+class JobRunner:
+    """
+    Local worker pool for /v1/jobs. Jobs run on their own bounded executor so
+    heavy forensic runs never take capacity from the synchronous endpoints.
+    """
+
+    def __init__(self, store: JobStore, workers: int = 2, max_queued: int = 100, result_ttl: float = 86400,
+                 callback_timeout: float = 10, callback_retries: int = 3, callback_secret: str = ""):
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.callback_timeout = callback_timeout
+        self.callback_retries = max(1, callback_retries)
+        self.callback_secret = callback_secret
+        self.executor = AnalysisExecutor(kind=ANALYSIS_EXECUTOR, workers=self.workers, queue_limit=0)
+        # Off when a supervisor requeues once for all server workers (gunicorn.conf.py),
+        # so a worker starting up never takes over jobs its siblings are running
+        self.requeue_running = True
+        self._queue = None
+        self._tasks = []
+        self._running = set()  # claimed by this process, not yet finished
+        self._loop = None
+        self._client = None
+        self._resuming = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """Start the workers on the running loop and requeue jobs a previous process left behind"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._client = httpx.AsyncClient(timeout=self.callback_timeout)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._resuming = asyncio.create_task(self._resume())
+
+    async def _resume(self):
+        # Store calls can block (SQLite waits up to 30 s for a lock), so they run off the loop
+        if self.requeue_running:
+            await asyncio.to_thread(self.store.requeue_running)
+        for job_id in await asyncio.to_thread(self.store.resumable):
+            self._queue.put_nowait(job_id)
+
+    async def stop(self):
+        """
+        Cancel the workers and hand unfinished jobs back to the store. Server
+        workers are recycled routinely (gunicorn max_requests), so a job cut off
+        here is requeued, and the worker that replaces this one picks it up,
+        together with any queued jobs, when it starts.
+        """
+        for task in [*self._tasks, self._resuming]:
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._resuming = None
+        if self._running:
+            await asyncio.to_thread(self.store.release, sorted(self._running))
+            logger.info(f"Requeued {len(self._running)} unfinished job(s)")
+            self._running.clear()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._loop = None
+        self.executor.shutdown()
+
+    async def submit(self, request: JobRequest) -> dict:
+        self.start()
+        if self.queue_depth >= self.max_queued:
+            raise HTTPException(
+                status_code=503,
+                detail="Job queue is full, please retry later",
+                headers={"Retry-After": str(ANALYSIS_RETRY_AFTER_SECONDS)}
+            )
+        await asyncio.to_thread(self.store.purge, time.time() - self.result_ttl)
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "request": request.model_dump(by_alias=True),
+            "callback_url": request.callback_url,
+            "result": None,
+            "error": None,
+            "callback": None
+        }
+        await asyncio.to_thread(self.store.create, job)
+        self._queue.put_nowait(job["job_id"])
+        return job
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Job {job_id} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        claim = asyncio.ensure_future(asyncio.to_thread(self.store.claim, job_id))
+        try:
+            job = await asyncio.shield(claim)
+        except asyncio.CancelledError:
+            # stop() cancelled us mid-claim; a claim that went through must still be released
+            if await claim is not None:
+                self._running.add(job_id)
+            raise
+        if job is None:
+            return  # already taken by another server worker sharing the store
+        self._running.add(job_id)
+        try:
+            result = await execute_job(JobRequest.model_validate(job["request"]), self.executor)
+            await asyncio.to_thread(self.store.finish, job_id, "succeeded", result=result)
+        except HTTPException as e:
+            record_detection("job", e.status_code)
+            await asyncio.to_thread(
+                self.store.finish, job_id, "failed", error={"status_code": e.status_code, "detail": str(e.detail)}
+            )
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            record_detection("job", 500)
+            await asyncio.to_thread(
+                self.store.finish, job_id, "failed", error={"status_code": 500, "detail": f"Detection failed: {str(e)}"}
+            )
+        # A job cancelled by stop() never gets here and stays in _running to be released
+        self._running.discard(job_id)
+        if job["callback_url"]:
+            await self._deliver(job_id, job["callback_url"])
+
+    async def _deliver(self, job_id: str, callback_url: str):
+        """POST the finished job to its webhook, retrying with backoff"""
+        body = job_view(await asyncio.to_thread(self.store.get, job_id)).model_dump_json().encode()
+        headers = {"Content-Type": "application/json"}
+        if self.callback_secret:
+            digest = hmac.new(self.callback_secret.encode(), body, hashlib.sha256).hexdigest()
+            headers["X-VaniCheck-Signature"] = f"sha256={digest}"
+        try:
+            # Checked again at delivery: the name may resolve elsewhere by now
+            await validate_callback_url(callback_url)
+        except HTTPException as e:
+            logger.error(f"Callback for job {job_id} refused: {e.detail}")
+            await asyncio.to_thread(self.store.set_callback, job_id, {"delivered": False, "attempts": 0, "error": e.detail})
+            return
+        error = None
+        for attempt in range(1, self.callback_retries + 1):
+            try:
+                response = await self._client.post(callback_url, content=body, headers=headers)
+                if response.status_code < 400:
+                    await asyncio.to_thread(
+                        self.store.set_callback, job_id, {"delivered": True, "attempts": attempt, "status_code": response.status_code}
+                    )
+                    return
+                error = f"HTTP {response.status_code}"
+            except httpx.HTTPError as e:
+                error = repr(e)
+            if attempt < self.callback_retries:
+                await asyncio.sleep(2 ** (attempt - 1))
+        logger.error(f"Callback for job {job_id} failed: {error}")
+        await asyncio.to_thread(
+            self.store.set_callback, job_id, {"delivered": False, "attempts": self.callback_retries, "error": error}
+        )
+
+async def validate_callback_url(callback_url: str):
+    """
+    Webhooks go to public http(s) endpoints only: every address the host resolves
+    to must be globally routable (no private, loopback, link-local or reserved
+    targets), unless the host is listed in JOB_CALLBACK_ALLOWED_HOSTS
+    """
+    parsed = urlparse(callback_url)
+    try:
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid callback URL")
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise HTTPException(status_code=400, detail="Invalid callback URL")
+    host = parsed.hostname.lower()
+    if host in JOB_CALLBACK_ALLOWED_HOSTS:
+        return
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid callback URL")
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if not address.is_global or address.is_multicast:
+            raise HTTPException(status_code=400, detail="Callback URL must resolve to a public address")
+
+def job_view(job: dict) -> JobStatusResponse:
+    return JobStatusResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        created_at=_iso(job["created_at"]),
+        started_at=_iso(job["started_at"]),
+        finished_at=_iso(job["finished_at"]),
+        result=job["result"],
+        error=job["error"],
+        callback=job["callback"]
+    )
+
+job_runner = JobRunner(
+    create_job_store(JOB_STORE),
+    workers=JOB_WORKERS,
+    max_queued=JOB_MAX_QUEUED,
+    result_ttl=JOB_RESULT_TTL_SECONDS,
+    callback_timeout=JOB_CALLBACK_TIMEOUT_SECONDS,
+    callback_retries=JOB_CALLBACK_RETRIES,
+    callback_secret=JOB_CALLBACK_SECRET
+)
+
+# Scrape-time gauges read the pool, cache, stream and job globals defined above
+REGISTRY.register(PipelineCollector())
+
+# Under gunicorn (PROMETHEUS_MULTIPROC_DIR set) counters and histograms are summed
+# across server workers; the pipeline gauges describe the worker that serves the scrape
+if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    METRICS_REGISTRY = CollectorRegistry()
+    multiprocess.MultiProcessCollector(METRICS_REGISTRY)
+    METRICS_REGISTRY.register(PipelineCollector())
+else:
+    METRICS_REGISTRY = REGISTRY
+
+def after_fork():
+    """Reset state a forked server worker must not share (gunicorn post_fork hook)"""
+    global detection_model
+    if isinstance(detection_model, OnnxDeepfakeModel):
+        # onnxruntime's thread pools do not survive fork, so each worker builds its own session
+        detection_model = load_detection_model(DETECTION_BACKEND)
+    if inference_batcher is not None:
+        # The master's warm-up started a dispatcher thread, which the fork did not copy
+        inference_batcher.reset()
+
 # ==================== Endpoints ====================
 
 @app.get("/health", tags=["Health"])
@@ -417,13 +2751,43 @@ async def v1_health_check():
     return {
         "status": "operational",
         "model_status": "ready" if detection_model else "error",
+        "detection_backend": detection_model.backend if detection_model else DETECTION_BACKEND,
+        "analysis_mode": ANALYSIS_MODE,
+        "resample_quality": RESAMPLE_QUALITY,
+        "analysis_pool": {
+            "executor": analysis_executor.kind,
+            "workers": analysis_executor.workers,
+            "in_flight": analysis_executor.pending,
+            "queue_depth": analysis_executor.queue_depth,
+            "queue_limit": analysis_executor.queue_limit,
+            "warmed_up": analysis_executor.warmed_up,
+            "infer_batch_max_size": inference_batcher.max_batch_size if inference_batcher else 1
+        },
+        "result_cache": result_cache.stats(),
+        "jobs": {
+            "store": JOB_STORE,
+            "workers": job_runner.workers,
+            "queued": job_runner.queue_depth
+        },
         "supported_languages": SUPPORTED_LANGUAGES,
         "timestamp": datetime.utcnow().isoformat()
     }
 
 @app.post("/v1/detect", response_model=AudioDetectionResponse, tags=["Detection"])
-async def detect_deepfake(request: AudioDetectionRequest, x_api_key: Optional[str] = Header(None)):
-    """Main deepfake detection endpoint"""
+@instrumented("detect")
+async def detect_deepfake(
+    request: AudioDetectionRequest,
+    response: Response,
+    x_api_key: Optional[str] = Header(None),
+    x_profile: Optional[str] = Header(None),
+    x_admin_key: Optional[str] = Header(None)
+):
+    """
+    Main deepfake detection endpoint. Admins can add X-PROFILE (with
+    X-ADMIN-KEY) to run the request under cProfile: "summary" adds a
+    per-stage and per-function breakdown as "profile", "pstats" returns the
+    raw profile as a .prof download. Profiled requests bypass the cache.
+    """
     start_time = time.time()
     
     # Verify API key
@@ -431,6 +2795,7 @@ async def detect_deepfake(request: AudioDetectionRequest, x_api_key: Optional[st
         raise HTTPException(status_code=401, detail="X-API-KEY header missing")
     if x_api_key != API_KEY:
         raise HTTPException(status_code=403, detail="Invalid API key")
+    profile_format = requested_profile(x_profile, x_admin_key)
     
     try:
         # Validate audio source
@@ -441,77 +2806,399 @@ async def detect_deepfake(request: AudioDetectionRequest, x_api_key: Optional[st
         if request.language.lower() not in SUPPORTED_LANGUAGES:
             raise HTTPException(status_code=400, detail=f"Language {request.language} not supported")
         
-        # Decode and preprocess audio
-        if request.audio_url:
-            audio_data = AudioProcessor.decode_audio_from_url(request.audio_url)
-        else:
-            audio_data = AudioProcessor.decode_audio(
-                request.audio_data,
-                audio_format=request.audioFormat,
-                filename=request.filename
-            )
-        duration_seconds = len(audio_data) / float(SAMPLE_RATE)
-        if duration_seconds > MAX_AUDIO_SECONDS:
-            raise HTTPException(
-                status_code=413,
-                detail=f"Audio too long. Max allowed is {MAX_AUDIO_SECONDS:.0f}s"
-            )
-
-        audio_data = AudioProcessor.preprocess_audio(audio_data)
-        
-        # Run detection
-        detection_result = detection_model.infer(audio_data)
-        
-        # Run forensic analysis
-        forensic_result = ForensicAnalyzer.comprehensive_analysis(audio_data, SAMPLE_RATE)
-        
-        # Determine verdict
-        ai_prob = detection_result["ai_probability"]
+        # Get the raw audio bytes so repeat submissions can be served from the cache
+        audio_bytes, pipeline = await resolve_detection_pipeline(request)
         
-        if ai_prob > (1 - MIN_CONFIDENCE_THRESHOLD):
-            verdict = "AI_GENERATED"
-            confidence = ai_prob
-            explanation = "Audio contains characteristics typical of AI-generated speech"
-        elif ai_prob < MIN_CONFIDENCE_THRESHOLD:
-            verdict = "HUMAN"
-            confidence = 1.0 - ai_prob
-            explanation = "Audio appears to be authentic human speech"
-        else:
-            verdict = "UNCERTAIN"
-            confidence = 0.5
-            explanation = "Unable to make definitive determination"
+        if profile_format is not None:
+            pipeline_result, report, raw_profile = await analysis_executor.run(run_profiled, *pipeline)
+            if profile_format == "pstats":
+                return Response(raw_profile, media_type="application/octet-stream", headers={
+                    "Content-Disposition": f'attachment; filename="vanicheck-{uuid.uuid4().hex[:12]}.prof"'
+                })
+            result = build_detection_response(pipeline_result, request.language, start_time)
+            result.profile = report
+            return result
         
-        # Calculate processing time
-        processing_time_ms = (time.time() - start_time) * 1000
+        # Decode, preprocess, detect and run forensics off the event loop
+        cache_key = result_cache_key(
+            hashlib.sha256(audio_bytes).hexdigest(), request.language, request.pitch_backend, request.mode
+        )
+        pipeline_result = await run_cached(cache_key, response, *pipeline)
+        return build_detection_response(pipeline_result, request.language, start_time)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Detection failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
+
+@app.post("/v1/detect/upload", response_model=AudioDetectionResponse, tags=["Detection"])
+@instrumented("detect_upload")
+async def detect_deepfake_upload(
+    request: Request,
+    response: Response,
+    language: Optional[str] = Query(None),
+    filename: Optional[str] = Query(None),
+    pitch_backend: Optional[str] = Query(None, alias="pitchBackend"),
+    mode: Optional[str] = Query(None),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Binary upload variant of /v1/detect, without base64 inflation.
+    Accepts multipart/form-data (a "file" or "audio" part plus form fields)
+    or a raw audio/* body with language passed as a query parameter.
+    """
+    start_time = time.time()
+    verify_api_key(x_api_key)
+    
+    upload = None
+    form = None
+    try:
+        upload, suffix, fields, form = await read_upload(
+            request, MAX_UPLOAD_BYTES, {"language": language, "pitchBackend": pitch_backend, "mode": mode}, filename
+        )
+        language = validate_language(fields["language"])
+        pitch_backend = fields["pitchBackend"]
+        try:
+            pitch_backend = PitchTracker.resolve(pitch_backend) if pitch_backend else None
+            mode = ForensicAnalyzer.resolve_mode(fields["mode"])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # Prepare forensic analysis with converted types
-        forensic_data = convert_numpy_types({
-            "glottal_pulses": forensic_result["glottal_pulses"],
-            "spectral_gaps": forensic_result["spectral_gaps"],
-            "breathing": forensic_result["breathing"],
-            "harmonics": forensic_result["harmonics"],
-            "detection_scores": {
-                "ai_probability": float(ai_prob),
-                "human_probability": float(1.0 - ai_prob)
-            }
-        })
+        cache_key = result_cache_key(await hash_upload(upload), language, pitch_backend, mode)
+        # Thread workers read the spooled file directly; worker processes need picklable bytes
+        source = upload if analysis_executor.kind == "thread" else upload.read()
+        pipeline_result = await run_cached(cache_key, response, run_file_pipeline, source, suffix, pitch_backend, mode)
+        return build_detection_response(pipeline_result, language, start_time)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Upload detection failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
+    finally:
+        if form is not None:
+            await form.close()
+        elif upload is not None:
+            upload.close()
+
+@app.post("/v1/detect/long", response_model=LongAudioDetectionResponse, tags=["Detection"])
+@instrumented("detect_long")
+async def detect_deepfake_long(
+    request: Request,
+    response: Response,
+    language: Optional[str] = Query(None),
+    filename: Optional[str] = Query(None),
+    pitch_backend: Optional[str] = Query(None, alias="pitchBackend"),
+    mode: Optional[str] = Query(None),
+    window_seconds: float = Query(LONG_AUDIO_WINDOW_SECONDS, alias="windowSeconds", gt=0),
+    hop_seconds: float = Query(LONG_AUDIO_HOP_SECONDS, alias="hopSeconds", gt=0),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Screen recordings longer than MAX_AUDIO_SECONDS (call-center calls, up to
+    MAX_LONG_AUDIO_SECONDS). The file is decoded window by window with overlap;
+    each window gets detection plus forensics, and the response carries the
+    per-window timeline and an aggregated verdict. Same bodies as /v1/detect/upload.
+    """
+    start_time = time.time()
+    verify_api_key(x_api_key)
+    if window_seconds > MAX_AUDIO_SECONDS:
+        raise HTTPException(status_code=400, detail=f"windowSeconds must be at most {MAX_AUDIO_SECONDS:.0f}")
+    if hop_seconds > window_seconds:
+        raise HTTPException(status_code=400, detail="hopSeconds must not exceed windowSeconds")
+    min_hop = max(LONG_AUDIO_MIN_HOP_SECONDS, window_seconds / 4)
+    if hop_seconds < min_hop:
+        raise HTTPException(status_code=400, detail=f"hopSeconds must be at least {min_hop:g} for windowSeconds={window_seconds:g}")
+    
+    upload = None
+    form = None
+    spill_path = None
+    try:
+        upload, _, fields, form = await read_upload(
+            request, MAX_LONG_UPLOAD_BYTES, {"language": language, "pitchBackend": pitch_backend, "mode": mode}, filename
+        )
+        language = validate_language(fields["language"])
+        try:
+            pitch_backend = PitchTracker.resolve(fields["pitchBackend"]) if fields["pitchBackend"] else None
+            mode = ForensicAnalyzer.resolve_mode(fields["mode"])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        return AudioDetectionResponse(
-            verdict=verdict,
-            confidence=float(confidence),
-            explanation=explanation,
-            forensic_analysis=forensic_data,
-            processing_time_ms=processing_time_ms,
-            duration_seconds=float(duration_seconds),
-            language_detected=request.language.lower(),
-            timestamp=datetime.utcnow().isoformat()
+        cache_key = result_cache_key(
+            await hash_upload(upload), language, pitch_backend, mode, long_window=window_seconds, long_hop=hop_seconds
         )
+        source = upload
+        if analysis_executor.kind == "process":
+            # Worker processes reopen the recording by path rather than receive it pickled
+            with tempfile.NamedTemporaryFile(delete=False) as spill:
+                spill_path = spill.name
+                shutil.copyfileobj(upload, spill)
+            source = spill_path
+        pipeline_result = await run_cached(cache_key, response, run_long_pipeline, source, window_seconds, hop_seconds, pitch_backend, mode)
+        return build_long_detection_response(pipeline_result, language, window_seconds, hop_seconds, start_time)
     
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Detection failed: {e}")
+        logger.error(f"Long audio detection failed: {e}")
         raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
+    finally:
+        if form is not None:
+            await form.close()
+        elif upload is not None:
+            upload.close()
+        if spill_path and os.path.exists(spill_path):
+            os.remove(spill_path)
+
+@app.post("/v1/detect/batch", response_model=BatchDetectionResponse, tags=["Detection"])
+@instrumented("detect_batch")
+async def detect_deepfake_batch(batch: BatchDetectionRequest, x_api_key: Optional[str] = Header(None)):
+    """
+    Detect several clips in one call. Clips are decoded in parallel on the
+    analysis pool, scored with stacked STFTs, and reported per item; one bad
+    clip does not fail the batch.
+    """
+    start_time = time.time()
+    verify_api_key(x_api_key)
+    if len(batch.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large. Max allowed is {MAX_BATCH_ITEMS} items")
+    
+    items = batch.items
+    results = [None] * len(items)
+    cache_keys = [None] * len(items)
+    decoded = {}
+    fallbacks = set()
+    # Leave queue room for other requests: a batch never has more jobs in flight than workers
+    slots = asyncio.Semaphore(analysis_executor.workers)
+    
+    def fail(index: int, status_code: int, detail: str):
+        results[index] = BatchItemResult(index=index, status="error", error={"status_code": status_code, "detail": detail})
+    
+    async def decode_item(index: int, item: AudioDetectionRequest):
+        try:
+            validate_language(item.language)
+            if item.audio_url:
+                audio_bytes, suffix = await audio_fetcher.fetch(item.audio_url)
+                args = (audio_bytes, None, None, suffix)
+            else:
+                audio_bytes = AudioProcessor.decode_base64(item.audio_data)
+                args = (audio_bytes, item.audioFormat, item.filename, None)
+            cache_keys[index] = result_cache_key(
+                hashlib.sha256(audio_bytes).hexdigest(), item.language, item.pitch_backend, item.mode
+            )
+            cached = result_cache.get(cache_keys[index])
+            if cached is not None:
+                results[index] = BatchItemResult(index=index, status="ok", result=build_detection_response(cached, item.language, start_time))
+                return
+            async with slots:
+                decoded[index], synthetic = await analysis_executor.run(decode_batch_item, *args)
+            if synthetic:
+                fallbacks.add(index)
+        except HTTPException as e:
+            fail(index, e.status_code, str(e.detail))
+        except Exception as e:
+            logger.error(f"Batch item {index} failed: {e}")
+            fail(index, 500, f"Detection failed: {str(e)}")
+    
+    async def analyze_stack(indices: list):
+        try:
+            async with slots:
+                stack_results = await analysis_executor.run(
+                    run_batch_analysis,
+                    [decoded[i] for i in indices],
+                    [items[i].pitch_backend for i in indices],
+                    [items[i].mode for i in indices]
+                )
+            for index, pipeline_result in zip(indices, stack_results):
+                if index in fallbacks:
+                    pipeline_result["synthetic_fallback"] = True
+                cache_pipeline_result(cache_keys[index], pipeline_result)
+                results[index] = BatchItemResult(
+                    index=index,
+                    status="ok",
+                    result=build_detection_response(pipeline_result, items[index].language, start_time)
+                )
+        except HTTPException as e:
+            for index in indices:
+                fail(index, e.status_code, str(e.detail))
+        except Exception as e:
+            logger.error(f"Batch analysis failed: {e}")
+            for index in indices:
+                fail(index, 500, f"Detection failed: {str(e)}")
+    
+    await asyncio.gather(*(decode_item(i, item) for i, item in enumerate(items)))
+    
+    pending = sorted(decoded)
+    stacks = plan_batch_stacks([decoded[i][1] for i in pending], BATCH_STACK_SECONDS)
+    await asyncio.gather(*(analyze_stack([pending[j] for j in stack]) for stack in stacks))
+    
+    succeeded = sum(1 for r in results if r.status == "ok")
+    return BatchDetectionResponse(
+        results=results,
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        processing_time_ms=(time.time() - start_time) * 1000
+    )
+
+@app.websocket("/v1/stream")
+async def detect_stream(
+    websocket: WebSocket,
+    encoding: str = Query("pcm_s16le"),
+    update_seconds: float = Query(STREAM_UPDATE_SECONDS, alias="updateSeconds"),
+    api_key: Optional[str] = Query(None, alias="apiKey"),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Live detection over a WebSocket. Send binary frames of mono 16 kHz PCM
+    (pcm_s16le or pcm_f32le) and receive {"type": "update", "ai_probability", ...}
+    messages every updateSeconds of audio, scored over the last
+    STREAM_WINDOW_SECONDS. Send {"type": "end"} for a final update.
+    Audio may run ahead of real time by STREAM_BURST_SECONDS and then arrive
+    at up to STREAM_MAX_SPEED times real time; faster streams are closed (1008).
+    Scoring always takes the newest window: updates that fall behind (slow
+    client, busy pool, or the stream's STREAM_CPU_BUDGET) are skipped and
+    counted in "skipped_updates" rather than queued.
+    """
+    global active_streams
+    if (x_api_key or api_key) != API_KEY:
+        await websocket.close(code=1008, reason="Invalid or missing API key")
+        return
+    if encoding not in STREAM_ENCODINGS:
+        await websocket.close(code=1003, reason=f"Unsupported encoding {encoding}")
+        return
+    if active_streams >= STREAM_MAX_CONNECTIONS:
+        await websocket.close(code=1013, reason="Too many live streams, please retry later")
+        return
+    
+    await websocket.accept()
+    active_streams += 1
+    dtype, scale = STREAM_ENCODINGS[encoding]
+    sample_width = np.dtype(dtype).itemsize
+    spectrum = StreamingSpectrum(STREAM_WINDOW_SECONDS)
+    update_samples = int(max(update_seconds, 0.1) * SAMPLE_RATE)
+    update_due = asyncio.Event()
+    ended = asyncio.Event()
+    state = {"since_update": 0, "skipped": 0, "final": False}
+    loop = asyncio.get_running_loop()
+    connected_at = loop.time()
+    
+    async def analyze():
+        try:
+            await run_updates()
+        except Exception as e:
+            logger.info(f"Live stream analysis stopped: {e}")
+    
+    async def run_updates():
+        next_allowed = 0.0
+        while True:
+            await update_due.wait()
+            # Spend at most STREAM_CPU_BUDGET of a core: idle in proportion to the last update's cost
+            delay = next_allowed - loop.time()
+            if delay > 0:
+                # ...but answer an end-of-stream request straight away
+                try:
+                    await asyncio.wait_for(ended.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            update_due.clear()
+            final = state["final"]
+            if spectrum.total_samples >= STREAM_MIN_SECONDS * SAMPLE_RATE or (final and len(spectrum.audio)):
+                audio, magnitude = spectrum.snapshot()
+                try:
+                    detection, cpu_seconds = await analysis_executor.run(score_stream_window, audio, magnitude)
+                except HTTPException:
+                    # Pool saturated: drop this update, the next one scores newer audio anyway
+                    state["skipped"] += 1
+                    next_allowed = loop.time() + ANALYSIS_RETRY_AFTER_SECONDS
+                else:
+                    next_allowed = loop.time() + cpu_seconds * (1.0 / STREAM_CPU_BUDGET - 1.0)
+                    ai_prob = detection["ai_probability"]
+                    verdict, confidence, _ = decide_verdict(ai_prob)
+                    await websocket.send_json({
+                        "type": "update",
+                        "final": final,
+                        "stream_seconds": round(spectrum.total_samples / SAMPLE_RATE, 3),
+                        "window_seconds": round(len(audio) / SAMPLE_RATE, 3),
+                        "ai_probability": float(ai_prob),
+                        "human_probability": float(1.0 - ai_prob),
+                        "verdict": verdict,
+                        "confidence": float(confidence),
+                        "processing_ms": round(cpu_seconds * 1000, 2),
+                        "skipped_updates": state["skipped"],
+                        "model_version": detection_model.version
+                    })
+            if final:
+                return
+    
+    analyzer = asyncio.create_task(analyze())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                data = message["bytes"]
+                if len(data) > STREAM_MAX_FRAME_BYTES:
+                    await websocket.close(code=1009, reason=f"Frames are limited to {STREAM_MAX_FRAME_BYTES} bytes")
+                    break
+                usable = len(data) - len(data) % sample_width
+                # Framing and FFTs run on the event loop, so audio must not arrive faster than it plays
+                allowed = (STREAM_BURST_SECONDS + STREAM_MAX_SPEED * (loop.time() - connected_at)) * SAMPLE_RATE
+                if spectrum.total_samples + usable // sample_width > allowed:
+                    await websocket.close(code=1008, reason=f"Audio sent faster than {STREAM_MAX_SPEED:g}x real time")
+                    break
+                spectrum.push(np.frombuffer(data[:usable], dtype=dtype).astype(np.float32) / scale)
+                state["since_update"] += usable // sample_width
+                if state["since_update"] >= update_samples:
+                    state["since_update"] = 0
+                    if update_due.is_set():
+                        state["skipped"] += 1
+                    update_due.set()
+            elif message.get("text") is not None:
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    control = {}
+                if isinstance(control, dict) and control.get("type") == "end":
+                    state["final"] = True
+                    ended.set()
+                    update_due.set()
+                    await analyzer
+                    await websocket.close(code=1000)
+                    break
+    finally:
+        active_streams -= 1
+        analyzer.cancel()
+
+@app.post("/v1/jobs", response_model=JobStatusResponse, status_code=202, tags=["Jobs"])
+async def create_job(request: JobRequest, response: Response, x_api_key: Optional[str] = Header(None)):
+    """
+    Queue a detection for background processing and return its id at once.
+    Poll GET /v1/jobs/{job_id}, or pass callbackUrl to have the finished job
+    POSTed to you. Set longAudio for windowed analysis of long recordings.
+    """
+    verify_api_key(x_api_key)
+    validate_language(request.language)
+    if request.callback_url:
+        await validate_callback_url(request.callback_url)
+    job = await job_runner.submit(request)
+    response.headers["Location"] = f"/v1/jobs/{job['job_id']}"
+    return job_view(job)
+
+@app.get("/v1/jobs/{job_id}", response_model=JobStatusResponse, tags=["Jobs"])
+async def get_job(job_id: str, x_api_key: Optional[str] = Header(None)):
+    """Job status, plus the detection result once it has finished"""
+    verify_api_key(x_api_key)
+    job = await asyncio.to_thread(job_runner.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_view(job)
+
+@app.get("/metrics", tags=["Health"])
+async def metrics():
+    """Prometheus metrics: per-stage latency, request outcomes, queue depth, cache hit rate"""
+    return Response(generate_latest(METRICS_REGISTRY), media_type=CONTENT_TYPE_LATEST)
 
 @app.get("/v1/languages", tags=["Info"])
 async def get_supported_languages():
@@ -531,6 +3218,12 @@ async def docs():
             "health": "/health",
             "v1_health": "/v1/health",
             "detect": "/v1/detect",
+            "detect_upload": "/v1/detect/upload",
+            "detect_long": "/v1/detect/long",
+            "stream": "ws /v1/stream",
+            "jobs": "/v1/jobs",
+            "detect_batch": "/v1/detect/batch",
+            "metrics": "/metrics",
             "languages": "/v1/languages"
         }
     }
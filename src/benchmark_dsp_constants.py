@@ -0,0 +1,113 @@
+"""
+Microbenchmark for the cached DSP constants (main.dsp_constants)
+Times the per-request feature path with the constants rebuilt on every
+request, as before, against the cached ones
+
+Usage:
+    python src/benchmark_dsp_constants.py
+    python src/benchmark_dsp_constants.py --seconds 5 --repeat 200 --json dsp.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# main.py lives one level up
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import librosa  # noqa: E402
+
+from main import SAMPLE_RATE, SpectralFeatures, dsp_constants  # noqa: E402
+
+N_FFT = 2048
+HOP_LENGTH = 512
+
+
+def clip(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * (120 + 30 * np.sin(2 * np.pi * 0.5 * t)) * t)
+            + rng.normal(0, 0.02, len(t))).astype(np.float32)
+
+
+def rebuilt_path(audio):
+    """Features as computed before the cache: every constant rebuilt per request"""
+    S = np.abs(librosa.stft(audio, n_fft=N_FFT, hop_length=HOP_LENGTH))
+    freqs = librosa.fft_frequencies(sr=SAMPLE_RATE, n_fft=N_FFT)  # spectral gaps
+    high = np.where(freqs >= 8000)[0]
+    np.mean(S[high, :]), np.mean(S[:len(high), :])
+    mel = librosa.feature.melspectrogram(S=S ** 2, sr=SAMPLE_RATE, n_fft=N_FFT)  # breathing
+    return librosa.power_to_db(mel, ref=np.max)
+
+
+def cached_path(audio):
+    """The same features through SpectralFeatures and dsp_constants()"""
+    features = SpectralFeatures(audio, SAMPLE_RATE, N_FFT, HOP_LENGTH)
+    S, start = features.magnitude, features.constants.high_band_start
+    np.mean(S[start:, :]), np.mean(S[:S.shape[0] - start, :])
+    return features.mel_db
+
+
+def constants_only():
+    """Just the configuration-dependent arrays, as rebuilt per request before"""
+    librosa.filters.get_window("hann", N_FFT, fftbins=True)
+    freqs = librosa.fft_frequencies(sr=SAMPLE_RATE, n_fft=N_FFT)
+    np.where(freqs >= 8000)[0]
+    librosa.filters.mel(sr=SAMPLE_RATE, n_fft=N_FFT)
+
+
+def time_ms(fn, *args, repeat):
+    fn(*args)  # warm up (imports, numba, the cache itself)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request cost of rebuilding DSP constants")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("वाणीCheck - DSP Constant Cache Benchmark")
+    print("=" * 60)
+
+    rows = []
+    constants_ms = time_ms(constants_only, repeat=args.repeat)
+    dsp_constants(SAMPLE_RATE, N_FFT)
+    for seconds in args.seconds:
+        audio = clip(seconds)
+        assert np.allclose(rebuilt_path(audio), cached_path(audio), atol=1e-3)
+        rebuilt = time_ms(rebuilt_path, audio, repeat=args.repeat)
+        cached = time_ms(cached_path, audio, repeat=args.repeat)
+        rows.append({
+            "clip_seconds": seconds,
+            "rebuilt_ms": round(rebuilt, 3),
+            "cached_ms": round(cached, 3),
+            "saved_ms": round(rebuilt - cached, 3),
+            "saved_pct": round(100 * (rebuilt - cached) / rebuilt, 1),
+        })
+
+    print(f"Rebuilding the constants alone: {constants_ms:.3f} ms per request\n")
+    columns = ["clip_seconds", "rebuilt_ms", "cached_ms", "saved_ms", "saved_pct"]
+    print("  ".join(f"{c:>12}" for c in columns))
+    for row in rows:
+        print("  ".join(f"{row[c]:>12}" for c in columns))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"constants_ms": round(constants_ms, 3), "clips": rows}, f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+FP32 vs INT8 benchmark for the exported वाणीCheck ONNX classifier
+Compares per-clip latency, memory and accuracy on a held-out set
+
+Usage:
+    python src/benchmark_quantization.py
+    python src/benchmark_quantization.py --data-dir ./samples/holdout --json report.json
+
+--data-dir expects human/ and ai/ subfolders of audio files; without it a
+synthetic held-out set is generated with the same recipe as
+train_model.DeepfakeDataset.create_dummy_dataset (but a separate seed).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# main.py lives one level up; reuse its preprocessing so results match serving
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+MODEL_DIR = "./models/vanicheck-deepfake-detector"
+SAMPLE_RATE = 16000
+LABELS = {"human": 0, "ai": 1}
+
+
+def synthetic_holdout(num_samples=100, seed=1234):
+    """Labelled clips (0 = HUMAN, 1 = AI_GENERATED) in the dummy-dataset style"""
+    rng = np.random.default_rng(seed)
+    clips, labels = [], []
+    for label in (0, 1):
+        for _ in range(num_samples // 2):
+            duration = rng.uniform(2, 8)
+            t = np.arange(int(SAMPLE_RATE * duration)) / SAMPLE_RATE
+            if label == 0:
+                f0 = 100 + 50 * np.sin(2 * np.pi * 0.5 * t)  # Varying F0
+                noise = 0.01
+            else:
+                f0 = np.full_like(t, 120)  # Constant F0
+                noise = 0.005
+            audio = np.sin(2 * np.pi * f0 * t) * 0.5 + rng.normal(0, noise, len(t))
+            clips.append(audio.astype(np.float32))
+            labels.append(label)
+    return clips, labels
+
+
+def load_holdout(data_dir):
+    """Labelled clips from data_dir/human and data_dir/ai"""
+    import librosa
+
+    clips, labels = [], []
+    for name, label in LABELS.items():
+        for path in sorted((Path(data_dir) / name).glob("*")):
+            if path.is_file():
+                audio, _ = librosa.load(str(path), sr=SAMPLE_RATE, mono=True)
+                clips.append(audio.astype(np.float32))
+                labels.append(label)
+    if not clips:
+        raise SystemExit(f"No audio found under {data_dir}/human or {data_dir}/ai")
+    return clips, labels
+
+
+def rss_mb():
+    """Current resident set size (falls back to peak RSS off Linux)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def measure_variant(model_path, variant, clips, threads, warmup_runs):
+    """Runs in a fresh process so each variant's memory is measured in isolation"""
+    from main import AudioProcessor, OnnxDeepfakeModel
+
+    # Score what the server scores: normalized, DC-free clips (untimed)
+    clips = [AudioProcessor.preprocess_audio(clip) for clip in clips]
+    before = rss_mb()
+    model = OnnxDeepfakeModel(model_path, variant=variant, intra_op_threads=threads, warmup_seconds=0)
+    for clip in clips[:warmup_runs]:
+        model.infer(clip)
+    loaded = rss_mb()
+
+    latencies, ai_probability = [], []
+    for clip in clips:
+        start = time.perf_counter()
+        result = model.infer(clip)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ai_probability.append(result["ai_probability"])
+
+    return {
+        "variant": variant,
+        "model_mb": os.path.getsize(model_path) / 1e6,
+        "rss_mb": loaded - before,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,
+        "latency_ms": latencies,
+        "ai_probability": ai_probability,
+    }
+
+
+def summarize(run, labels, audio_seconds):
+    latencies = np.array(run["latency_ms"])
+    predictions = (np.array(run["ai_probability"]) > 0.5).astype(int)
+    return {
+        "variant": run["variant"],
+        "model_mb": round(run["model_mb"], 2),
+        "rss_mb": round(run["rss_mb"], 1),
+        "peak_rss_mb": round(run["peak_rss_mb"], 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "real_time_factor": round(float(latencies.sum() / 1000 / audio_seconds), 4),
+        "accuracy": round(float((predictions == np.array(labels)).mean()), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FP32 and INT8 ONNX models")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--data-dir", help="held-out set with human/ and ai/ subfolders")
+    parser.add_argument("--samples", type=int, default=100, help="synthetic held-out size")
+    parser.add_argument("--threads", type=int, default=1, help="intra-op threads per session")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed runs before measuring")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("वाणीCheck - FP32 vs INT8 Benchmark")
+    print("=" * 60)
+
+    clips, labels = load_holdout(args.data_dir) if args.data_dir else synthetic_holdout(args.samples)
+    audio_seconds = sum(len(c) for c in clips) / SAMPLE_RATE
+    print(f"Held-out set: {len(clips)} clips, {audio_seconds:.0f}s of audio")
+
+    runs = {}
+    spawn = multiprocessing.get_context("spawn")
+    for variant, filename in (("fp32", "model.onnx"), ("int8", "model.int8.onnx")):
+        model_path = os.path.join(args.model_dir, filename)
+        if not os.path.exists(model_path):
+            raise SystemExit(f"Missing {model_path} (run src/train_model.py first)")
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            runs[variant] = pool.submit(
+                measure_variant, model_path, variant, clips, args.threads, args.warmup
+            ).result()
+
+    summaries = [summarize(runs[v], labels, audio_seconds) for v in ("fp32", "int8")]
+    fp32, int8 = summaries
+    fp32_probs = np.array(runs["fp32"]["ai_probability"])
+    int8_probs = np.array(runs["int8"]["ai_probability"])
+    deltas = {
+        "speedup_p50": round(fp32["p50_ms"] / int8["p50_ms"], 2),
+        "model_size_ratio": round(runs["int8"]["model_mb"] / runs["fp32"]["model_mb"], 3),
+        "rss_saved_mb": round(fp32["rss_mb"] - int8["rss_mb"], 1),
+        "accuracy_delta": round(int8["accuracy"] - fp32["accuracy"], 4),
+        "verdict_agreement": round(float(((fp32_probs > 0.5) == (int8_probs > 0.5)).mean()), 4),
+        "max_probability_delta": round(float(np.abs(fp32_probs - int8_probs).max()), 4),
+    }
+
+    columns = ["variant", "model_mb", "rss_mb", "p50_ms", "p95_ms", "real_time_factor", "accuracy"]
+    print("\n" + "  ".join(f"{c:>16}" for c in columns))
+    for row in summaries:
+        print("  ".join(f"{row[c]:>16}" for c in columns))
+    print()
+    for name, value in deltas.items():
+        print(f"{name:>24}: {value}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"clips": len(clips), "threads": args.threads, "variants": summaries, "deltas": deltas}, f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
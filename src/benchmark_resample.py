@@ -0,0 +1,129 @@
+"""
+Resampler benchmark for the वाणीCheck decode stage
+Times AudioProcessor.resample at each RESAMPLE_QUALITY level (and
+librosa.resample, the previous path) for common input rates, and measures
+how far the detector scores and forensic metrics drift from the "high" level
+
+Usage:
+    python src/benchmark_resample.py
+    python src/benchmark_resample.py --rates 44100 48000 --seconds 5 --json resample.json
+
+The clip is broadband (40 harmonics plus noise), so the narrower passband of
+the fast level shows up in the drift columns instead of being hidden by a
+clip with nothing above 4 kHz. 16 kHz input is listed as well: it takes the
+zero-work path and should cost nothing.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# main.py lives one level up
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import librosa  # noqa: E402
+
+import main  # noqa: E402
+
+RATES = (8000, 16000, 22050, 32000, 44100, 48000)
+
+
+def broadband_clip(seconds, sr, seed=0):
+    """Gliding F0 with 40 harmonics up to the input's Nyquist, plus noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    phase = 2 * np.pi * np.cumsum(140 + 40 * np.sin(2 * np.pi * 0.5 * t)) / sr
+    audio = np.zeros_like(t)
+    for k in range(1, 41):
+        if 180 * k < sr / 2:  # keep the highest F0's harmonics below Nyquist
+            audio += np.sin(k * phase) / k
+    audio *= 0.6 + 0.4 * np.sin(2 * np.pi * 2 * t) ** 2
+    return (0.3 * audio / np.abs(audio).max() + rng.normal(0, 0.01, len(t))).astype(np.float32)
+
+
+def time_ms(fn, repeat):
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def metrics(audio):
+    """Detector score plus every numeric forensic metric for one 16 kHz clip"""
+    audio = main.AudioProcessor.preprocess_audio(audio)
+    features = main.SpectralFeatures(audio)
+    values = {"ai_probability": float(main.detection_model.infer(audio, features)["ai_probability"])}
+    forensics = main.ForensicAnalyzer.comprehensive_analysis(audio, main.SAMPLE_RATE, features, "yin", "full")
+    for analyzer, result in forensics.items():
+        for name, value in result.items():
+            if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+                values[f"{analyzer}.{name}"] = float(value)
+    return values
+
+
+def drift(values, reference):
+    """(ai_probability abs diff, worst metric, its relative drift) against the reference"""
+    worst, worst_drift = None, 0.0
+    for name, ref in reference.items():
+        if name == "ai_probability" or name not in values:
+            continue
+        relative = abs(values[name] - ref) / max(abs(ref), 1e-9)
+        if relative > worst_drift:
+            worst, worst_drift = name, relative
+    return abs(values["ai_probability"] - reference["ai_probability"]), worst, worst_drift
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Resampler speed and feature drift per quality level")
+    parser.add_argument("--rates", type=int, nargs="+", default=list(RATES), help="input sample rates")
+    parser.add_argument("--seconds", type=float, default=20, help="clip length")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("वाणीCheck - Resampler Benchmark")
+    print("=" * 60)
+
+    levels = sorted(main.AudioProcessor.RESAMPLE_RECIPES)
+    rows = []
+    for sr in args.rates:
+        clip = broadband_clip(args.seconds, sr)
+        reference = metrics(main.AudioProcessor.resample(clip, sr, "high"))
+        paths = {"librosa": lambda: librosa.resample(clip, orig_sr=sr, target_sr=main.SAMPLE_RATE)}
+        if sr == main.SAMPLE_RATE:
+            paths["librosa"] = lambda: clip  # the old decode path skipped 16 kHz too
+        for level in levels:
+            paths[level] = lambda level=level: main.AudioProcessor.resample(clip, sr, level)
+        for path, fn in paths.items():
+            ai_diff, worst, worst_drift = drift(metrics(fn()), reference)
+            rows.append({
+                "input_rate": sr,
+                "path": path,
+                "resample_ms": round(time_ms(fn, args.repeat), 3),
+                "ai_probability_diff": round(ai_diff, 6),
+                "worst_metric": worst or "-",
+                "worst_drift_pct": round(100 * worst_drift, 3),
+            })
+
+    print(f"{args.seconds:g}s clips; drift is relative to the 'high' level\n")
+    columns = ["input_rate", "path", "resample_ms", "ai_probability_diff", "worst_drift_pct", "worst_metric"]
+    print("  ".join(f"{c:>19}" for c in columns))
+    for row in rows:
+        print("  ".join(f"{row[c]:>19}" for c in columns))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"seconds": args.seconds, "levels": main.AudioProcessor.RESAMPLE_RECIPES, "rows": rows}, f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main_cli()
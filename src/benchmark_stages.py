@@ -0,0 +1,183 @@
+"""
+Per-stage microbenchmarks for the वाणीCheck pipeline with regression gating
+Times decode, preprocess, infer and every ForensicAnalyzer method on
+deterministic synthetic clips and compares them with a JSON baseline
+
+Usage:
+    python src/benchmark_stages.py                        # compare with the baseline, exit 1 on regression
+    python src/benchmark_stages.py --save                 # (re)write the baseline
+    python src/benchmark_stages.py --durations 1 5 --tolerance 0.5 --json current.json
+
+Wall time is the median of --repeat runs; peak memory is the tracemalloc peak
+of one extra run (NumPy reports its buffers to tracemalloc). A stage regresses
+when it is slower than baseline * (1 + tolerance) AND by more than --min-ms,
+so sub-millisecond jitter never fails the gate. Baselines are per machine:
+re-record with --save on the machine that runs the gate.
+"""
+
+import argparse
+import base64
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+# main.py lives one level up
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+BASELINE_PATH = Path(__file__).resolve().parent / "stage_baseline.json"
+DURATIONS = (1, 5, 20, 120)
+INPUT_SAMPLE_RATE = 44100  # browser/phone rate, so decode includes resampling
+
+
+def synthetic_clip(seconds, sr, seed=0):
+    """Deterministic speech-like clip: gliding F0 with harmonics and fixed-seed noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    f0 = 140 + 40 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    audio = 0.5 * np.sin(phase) + 0.2 * np.sin(2 * phase) + 0.1 * np.sin(3 * phase)
+    audio *= 0.6 + 0.4 * np.sin(2 * np.pi * 2 * t) ** 2  # syllable-rate envelope
+    return (0.5 * audio + rng.normal(0, 0.01, len(t))).astype(np.float32)
+
+
+def stage_calls(seconds, pitch_backend):
+    """(stage name, zero-argument callable) for every stage on one clip"""
+    import main
+
+    buffer = io.BytesIO()
+    sf.write(buffer, synthetic_clip(seconds, INPUT_SAMPLE_RATE), INPUT_SAMPLE_RATE, format="WAV")
+    audio_base64 = base64.b64encode(buffer.getvalue()).decode()
+
+    decoded = main.AudioProcessor.decode_audio(audio_base64, audio_format="wav")
+    audio = main.AudioProcessor.preprocess_audio(decoded)
+    magnitude = main.SpectralFeatures(audio).magnitude
+    sr = main.SAMPLE_RATE
+    analyzer = main.ForensicAnalyzer
+
+    def features():
+        # The analyzers share the STFT that infer() computed; each run gets a fresh context
+        return main.SpectralFeatures(audio, sr, magnitude=magnitude)
+
+    return [
+        ("decode_audio", lambda: main.AudioProcessor.decode_audio(audio_base64, audio_format="wav")),
+        ("preprocess_audio", lambda: main.AudioProcessor.preprocess_audio(decoded)),
+        ("infer", lambda: main.detection_model.infer(audio, main.SpectralFeatures(audio))),
+        ("analyze_glottal_pulses", lambda: analyzer.analyze_glottal_pulses(audio, sr, features(), pitch_backend)),
+        ("analyze_spectral_gaps", lambda: analyzer.analyze_spectral_gaps(audio, sr, features())),
+        ("analyze_breathing_patterns", lambda: analyzer.analyze_breathing_patterns(audio, sr, features())),
+        ("analyze_harmonic_structure", lambda: analyzer.analyze_harmonic_structure(audio, sr, features())),
+    ]
+
+
+def measure(fn, repeat):
+    """(median wall ms, tracemalloc peak MB) for one stage"""
+    fn()  # warm up: lazy imports, numba, DSP constant cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return float(np.median(samples)), peak / 1e6
+
+
+def run_suite(durations=DURATIONS, repeat=5, pitch_backend="yin", stages=None):
+    """{"<stage>@<seconds>s": {"wall_ms", "peak_mb"}}"""
+    results = {}
+    for seconds in durations:
+        for stage, fn in stage_calls(seconds, pitch_backend):
+            if stages and stage not in stages:
+                continue
+            # Long clips are slow enough that fewer runs still give a stable median
+            wall_ms, peak_mb = measure(fn, repeat if seconds < 60 else max(1, repeat // 2))
+            results[f"{stage}@{seconds:g}s"] = {"wall_ms": round(wall_ms, 3), "peak_mb": round(peak_mb, 3)}
+    return results
+
+
+def find_regressions(current, baseline, tolerance=0.25, memory_tolerance=0.25, min_ms=1.0, min_mb=1.0):
+    """Stages slower or hungrier than the baseline allows, as (key, metric, baseline, current)"""
+    regressions = []
+    for key, now in current.items():
+        before = baseline.get(key)
+        if before is None:
+            continue  # new stage or clip length: nothing to compare against yet
+        if now["wall_ms"] > before["wall_ms"] * (1 + tolerance) and now["wall_ms"] - before["wall_ms"] > min_ms:
+            regressions.append((key, "wall_ms", before["wall_ms"], now["wall_ms"]))
+        if now["peak_mb"] > before["peak_mb"] * (1 + memory_tolerance) and now["peak_mb"] - before["peak_mb"] > min_mb:
+            regressions.append((key, "peak_mb", before["peak_mb"], now["peak_mb"]))
+    return regressions
+
+
+def environment():
+    import librosa
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "librosa": librosa.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every pipeline stage and gate on a baseline")
+    parser.add_argument("--durations", type=float, nargs="+", default=list(DURATIONS), help="clip lengths (s)")
+    parser.add_argument("--stages", nargs="+", help="only these stages")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage")
+    parser.add_argument("--pitch-backend", default="yin")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed wall time increase (0.25 = +25%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="allowed peak memory increase")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--json", help="also write the current results to this file")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("वाणीCheck - Pipeline Stage Benchmarks")
+    print("=" * 60)
+
+    current = run_suite(args.durations, args.repeat, args.pitch_backend, args.stages)
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text())["results"] if baseline_path.exists() and not args.save else {}
+
+    print(f"\n{'stage':>36}  {'wall_ms':>10}  {'baseline':>10}  {'peak_mb':>9}  {'baseline':>9}")
+    for key, now in current.items():
+        before = baseline.get(key, {})
+        print(f"{key:>36}  {now['wall_ms']:>10.3f}  {before.get('wall_ms', '-'):>10}  "
+              f"{now['peak_mb']:>9.3f}  {before.get('peak_mb', '-'):>9}")
+
+    report = {"environment": environment(), "repeat": args.repeat, "pitch_backend": args.pitch_backend, "results": current}
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    if args.save:
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nBaseline written to {baseline_path}")
+        return 0
+    if not baseline:
+        print(f"\nNo baseline at {baseline_path}; record one with --save")
+        return 0
+
+    regressions = find_regressions(current, baseline, args.tolerance, args.memory_tolerance, args.min_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for key, metric, before, now in regressions:
+            print(f"  {key} {metric}: {before} -> {now} ({(now / before - 1) * 100:+.0f}%)")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Cold start benchmark for the वाणीCheck API
+Measures how long `import main` takes and how soon a fresh server answers /health
+
+Usage:
+    python src/benchmark_startup.py
+    python src/benchmark_startup.py --runs 10 --json startup.json
+
+Every run starts a new interpreter, so the numbers include Python start-up
+and match what a serverless platform sees on a cold container. The time
+until /v1/health reports analysis_pool.warmed_up is when the first request
+no longer pays for librosa's lazy imports and numba compilation.
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_import():
+    """Wall time of a fresh `python -c "import main"` (ms)"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import main"], cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def slowest_imports(top=10):
+    """Cumulative import time of each module main.py imports directly, from -X importtime"""
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    totals = {}
+    for line in output.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", line)
+        if not match:
+            continue
+        depth = len(match.group(2)) // 2
+        if depth == 0:
+            if match.group(3) == "main":
+                break  # children are printed before their parent
+            totals.clear()
+        elif depth == 1:
+            totals[match.group(3)] = int(match.group(1)) / 1000
+    return sorted(totals.items(), key=lambda item: -item[1])[:top]
+
+
+def time_server(timeout=120):
+    """(ms until /health answers, ms until the analysis pool is warmed up) for a fresh server"""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    health_ms = warm_ms = None
+    try:
+        with httpx.Client(timeout=1) as client:
+            while warm_ms is None and time.perf_counter() - start < timeout:
+                try:
+                    if health_ms is None:
+                        if client.get(f"{base}/health").status_code == 200:
+                            health_ms = (time.perf_counter() - start) * 1000
+                    elif client.get(f"{base}/v1/health").json()["analysis_pool"]["warmed_up"]:
+                        warm_ms = (time.perf_counter() - start) * 1000
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+    if health_ms is None:
+        raise SystemExit(f"Server did not answer /health within {timeout}s")
+    return health_ms, warm_ms
+
+
+def stats(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return {"p50": round(float(np.percentile(values, 50)), 1), "max": round(float(max(values)), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time to first /health")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("वाणीCheck - Cold Start Benchmark")
+    print("=" * 60)
+    print(f"NUMBA_CACHE_DIR={os.getenv('NUMBA_CACHE_DIR', '(unset)')}")
+
+    time_import()  # the first run also writes .pyc files; images ship them precompiled
+    imports = [time_import() for _ in range(args.runs)]
+    servers = [time_server() for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "import_ms": stats(imports),
+        "health_ms": stats([h for h, _ in servers]),
+        "warmed_up_ms": stats([w for _, w in servers]),
+        "slowest_imports_ms": dict(slowest_imports()),
+    }
+
+    for name in ("import_ms", "health_ms", "warmed_up_ms"):
+        print(f"{name:>16}: {report[name]}")
+    print("\nSlowest top-level imports (ms):")
+    for module, ms in report["slowest_imports_ms"].items():
+        print(f"{module:>32}: {ms:.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
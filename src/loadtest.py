@@ -0,0 +1,253 @@
+"""
+Closed-loop load test for the वाणीCheck API with saturation curves
+Starts the app locally, sweeps concurrency levels with a realistic clip-length
+mix and reports throughput, latency percentiles and error rate per level
+
+Usage:
+    python src/loadtest.py                                   # uvicorn, levels 1 2 4 8 16 32
+    python src/loadtest.py --server gunicorn --levels 1 4 16 64 --duration 30
+    python src/loadtest.py --url http://staging:8000         # an already running server
+    python src/loadtest.py --json curve.json --baseline old_curve.json
+
+Every virtual user sends its next request as soon as the previous one
+returns (closed loop, no think time), so offered load rises with the
+concurrency level until the server saturates. The knee is the lowest level
+whose throughput is within 10% of the best throughput seen. Size replicas
+from the throughput at the knee and the latency you can accept there.
+
+The server is started with RESULT_CACHE_SIZE=0 and every request carries a
+distinct clip, so the curve measures analysis, not cache hits.
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+import soundfile as sf
+
+ROOT = Path(__file__).resolve().parent.parent
+API_KEY = os.getenv("VANICHECK_API_KEY", "vanicheck-secret-key-2026")
+
+# (clip seconds, share of traffic): mostly short voice notes, some longer
+# calls, a few clips at the 20 s MAX_AUDIO_SECONDS limit
+CLIP_MIX = ((2, 0.30), (5, 0.40), (10, 0.20), (20, 0.10))
+CLIP_SAMPLE_RATES = (16000, 44100, 48000)  # native, browser, phone
+
+
+def make_clips(count, mix=CLIP_MIX, seed=7):
+    """`count` distinct WAV clips drawn from the length mix (deterministic)"""
+    rng = np.random.default_rng(seed)
+    lengths = rng.choice([s for s, _ in mix], size=count, p=[w for _, w in mix])
+    clips = []
+    for seconds in lengths:
+        sr = int(rng.choice(CLIP_SAMPLE_RATES))
+        t = np.arange(int(seconds * sr)) / sr
+        f0 = rng.uniform(100, 220) + rng.uniform(10, 50) * np.sin(2 * np.pi * rng.uniform(0.2, 1.0) * t)
+        audio = 0.4 * np.sin(2 * np.pi * np.cumsum(f0) / sr) + rng.normal(0, 0.01, len(t))
+        buffer = io.BytesIO()
+        sf.write(buffer, audio.astype(np.float32), sr, format="WAV")
+        clips.append({"seconds": float(seconds), "wav": buffer.getvalue()})
+    return clips
+
+
+def request_for(clip, endpoint, language="english"):
+    """(path, httpx request kwargs) for one clip"""
+    if endpoint == "upload":
+        return f"/v1/detect/upload?language={language}", {
+            "content": clip["wav"], "headers": {"X-API-KEY": API_KEY, "Content-Type": "audio/wav"}
+        }
+    return "/v1/detect", {
+        "json": {"audioBase64": base64.b64encode(clip["wav"]).decode(), "language": language},
+        "headers": {"X-API-KEY": API_KEY},
+    }
+
+
+async def run_level(client, clips, concurrency, duration, endpoint="detect"):
+    """Drive `concurrency` closed-loop users for `duration` seconds; returns raw samples"""
+    requests = [request_for(clip, endpoint) for clip in clips]
+    latencies, statuses, audio_seconds = [], {}, 0.0
+    counter = iter(range(1 << 62))
+    deadline = time.perf_counter() + duration
+
+    async def user():
+        nonlocal audio_seconds
+        while time.perf_counter() < deadline:
+            index = next(counter) % len(requests)
+            path, kwargs = requests[index]
+            start = time.perf_counter()
+            try:
+                status = (await client.post(path, **kwargs)).status_code
+            except httpx.HTTPError:
+                status = "transport_error"
+            # Requests still running at the deadline count too; that is what a closed loop measures
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                audio_seconds += clips[index]["seconds"]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return {"concurrency": concurrency, "elapsed": time.perf_counter() - started,
+            "latencies": latencies, "statuses": statuses, "audio_seconds": audio_seconds}
+
+
+def summarize(sample):
+    """Throughput, latency percentiles (ms) and error rate for one level"""
+    latencies = np.array(sample["latencies"]) * 1000
+    total = len(latencies)
+    ok = sample["statuses"].get(200, 0)
+    percentile = (lambda q: round(float(np.percentile(latencies, q)), 1)) if total else (lambda q: None)
+    return {
+        "concurrency": sample["concurrency"],
+        "requests": total,
+        "throughput_rps": round(ok / sample["elapsed"], 2),
+        "audio_seconds_per_second": round(sample["audio_seconds"] / sample["elapsed"], 2),
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "error_rate": round((total - ok) / total, 4) if total else 0.0,
+        "statuses": {str(k): v for k, v in sorted(sample["statuses"].items(), key=lambda kv: str(kv[0]))},
+    }
+
+
+def find_knee(curve, within=0.10):
+    """Lowest concurrency whose throughput is within `within` of the best level"""
+    if not curve:
+        return None
+    best = max(level["throughput_rps"] for level in curve)
+    return next(level["concurrency"] for level in curve if level["throughput_rps"] >= best * (1 - within))
+
+
+def compare_curves(current, baseline, tolerance=0.15):
+    """Levels whose throughput dropped more than `tolerance` below the baseline"""
+    before = {level["concurrency"]: level["throughput_rps"] for level in baseline}
+    return [
+        (level["concurrency"], before[level["concurrency"]], level["throughput_rps"])
+        for level in current
+        if level["concurrency"] in before and level["throughput_rps"] < before[level["concurrency"]] * (1 - tolerance)
+    ]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind, workers, port):
+    env = {**os.environ, "RESULT_CACHE_SIZE": "0", "PORT": str(port)}
+    # Several workers need a shared job store (gunicorn warns about a per-worker memory store)
+    env.setdefault("JOB_STORE", "sqlite")
+    env.setdefault("JOB_STORE_PATH", os.path.join(tempfile.gettempdir(), f"vanicheck-loadtest-{port}.sqlite3"))
+    if kind == "gunicorn":
+        env.setdefault("WEB_CONCURRENCY", str(workers))
+        command = [sys.executable, "-m", "gunicorn", "main:app", "--bind", f"127.0.0.1:{port}", "--access-logfile", "/dev/null"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                   "--workers", str(workers), "--no-access-log"]
+    # stderr is kept so a server that fails to start says why instead of timing out wait_ready
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+
+
+async def wait_ready(client, timeout=120):
+    """Wait for /health, then for the analysis pool warm-up, so level 1 is not skewed"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            health = (await client.get("/v1/health")).json()
+            if health["analysis_pool"].get("warmed_up", True):
+                return
+        except (httpx.HTTPError, ValueError, KeyError):
+            pass
+        await asyncio.sleep(0.1)
+    raise SystemExit(f"Server not ready within {timeout}s")
+
+
+async def sweep(base_url, levels, duration, warmup, clips, endpoint):
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await wait_ready(client)
+        curve = []
+        for concurrency in levels:
+            if warmup > 0:
+                await run_level(client, clips, concurrency, warmup, endpoint)
+            level = summarize(await run_level(client, clips, concurrency, duration, endpoint))
+            curve.append(level)
+            print(f"{level['concurrency']:>6}  {level['throughput_rps']:>8}  {level['audio_seconds_per_second']:>9}  "
+                  f"{level['p50_ms']:>8}  {level['p95_ms']:>8}  {level['p99_ms']:>8}  {level['error_rate']:>6}")
+        return curve
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep concurrency and report the saturation curve")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before each level")
+    parser.add_argument("--clips", type=int, default=64, help="distinct clips in the rotation")
+    parser.add_argument("--endpoint", choices=("detect", "upload"), default="detect")
+    parser.add_argument("--server", choices=("uvicorn", "gunicorn"), default="uvicorn")
+    parser.add_argument("--workers", type=int, default=1, help="server workers")
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--json", help="write the curve to this file")
+    parser.add_argument("--baseline", help="earlier --json output to compare throughput with")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed throughput drop per level")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("वाणीCheck - Saturation Curve")
+    print("=" * 60)
+    clips = make_clips(args.clips)
+    print(f"{len(clips)} clips, mean {np.mean([c['seconds'] for c in clips]):.1f}s; "
+          f"{args.duration:g}s per level on {args.url or f'local {args.server} x{args.workers}'}\n")
+    print(f"{'users':>6}  {'req/s':>8}  {'audio s/s':>9}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'errors':>6}")
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        port = free_port()
+        server = start_server(args.server, args.workers, port)
+        base_url = f"http://127.0.0.1:{port}"
+    try:
+        curve = asyncio.run(sweep(base_url, args.levels, args.duration, args.warmup, clips, args.endpoint))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    knee = find_knee(curve)
+    print(f"\nSaturation knee: {knee} concurrent users")
+    report = {
+        "server": args.url or f"{args.server} x{args.workers}",
+        "endpoint": args.endpoint,
+        "cpus": os.cpu_count(),
+        "duration": args.duration,
+        "clip_mix": CLIP_MIX,
+        "knee_concurrency": knee,
+        "levels": curve,
+    }
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"Curve written to {args.json}")
+    if args.baseline:
+        drops = compare_curves(curve, json.loads(Path(args.baseline).read_text())["levels"], args.tolerance)
+        for concurrency, before, now in drops:
+            print(f"  throughput at {concurrency} users: {before} -> {now} req/s")
+        if drops:
+            return 1
+        print("No throughput regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -194,6 +194,35 @@ def export_to_onnx(model_path=OUTPUT_DIR):
         print(f"ONNX export failed (this is optional): {e}")
         print("Continuing without ONNX export...")
 
+def quantize_onnx(model_path=OUTPUT_DIR):
+    """
+    Write a dynamically quantized INT8 copy of model.onnx (model.int8.onnx).
+    Only MatMul weights are quantized; the convolutional feature encoder
+    stays FP32, which keeps the accuracy loss small on wav2vec2.
+    """
+    try:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        
+        onnx_path = os.path.join(model_path, "model.onnx")
+        int8_path = os.path.join(model_path, "model.int8.onnx")
+        print(f"Quantizing {onnx_path} to INT8...")
+        
+        quantize_dynamic(
+            onnx_path,
+            int8_path,
+            op_types_to_quantize=["MatMul"],
+            weight_type=QuantType.QInt8,
+            per_channel=True
+        )
+        
+        fp32_mb = os.path.getsize(onnx_path) / 1e6
+        int8_mb = os.path.getsize(int8_path) / 1e6
+        print(f"INT8 model written to {int8_path} ({fp32_mb:.0f} MB -> {int8_mb:.0f} MB)")
+        print("Compare the two with: python src/benchmark_quantization.py")
+        
+    except Exception as e:
+        print(f"INT8 quantization failed (this is optional): {e}")
+
 if __name__ == "__main__":
     print("=" * 60)
     print("वाणीCheck - Deepfake Detection Model Training")
@@ -207,6 +236,7 @@ if __name__ == "__main__":
     
     # Export to ONNX (optional, for production deployment)
     export_to_onnx()
+    quantize_onnx()
     
     print("\nModel training complete!")
     print(f"Model saved to: {OUTPUT_DIR}")
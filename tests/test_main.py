@@ -12,13 +12,23 @@ from pathlib import Path
 import librosa
 import soundfile as sf
 import tempfile
-from httpx import AsyncClient
+import threading
+import pickle
+import time
+import hashlib
+import hmac
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from httpx import AsyncClient, ASGITransport
+from fastapi import HTTPException
+import os
 import sys
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from main import app, AudioProcessor, ForensicAnalyzer
+import main
+from main import app, AudioProcessor, ForensicAnalyzer, AnalysisExecutor, SpectralFeatures, PitchTracker, ResultCache
 
 # ==================== Test Fixtures ====================
 
@@ -52,6 +62,11 @@ def client():
     """Create async test client"""
     return AsyncClient(app=app, base_url="http://test")
 
+@pytest.fixture
+def asgi_client():
+    """Async test client bound to the app through the ASGI transport"""
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
 @pytest.fixture
 def human_audio_b64():
     """Fixture for human audio"""
@@ -94,6 +109,79 @@ class TestAudioProcessor:
         assert np.max(np.abs(normalized)) <= 1.0
         assert np.allclose(normalized[-1], 0.2)
 
+class TestAudioDecoding:
+    """Test in-memory audio decoding"""
+    
+    @staticmethod
+    def encode(audio, sr, fmt):
+        buffer = io.BytesIO()
+        sf.write(buffer, audio, sr, format=fmt)
+        return buffer.getvalue()
+    
+    @pytest.mark.parametrize("fmt", ["WAV", "FLAC", "OGG"])
+    def test_decodes_without_temp_files(self, fmt, monkeypatch):
+        """WAV/FLAC/OGG are decoded straight from memory"""
+        def no_temp_files(*args, **kwargs):
+            raise AssertionError("temp file created")
+        monkeypatch.setattr(tempfile, "NamedTemporaryFile", no_temp_files)
+        audio = AudioProcessor.load_audio(self.encode(create_synthetic_human_audio(duration=1), 16000, fmt))
+        assert audio.dtype == np.float32
+        assert len(audio) == 16000
+    
+    def test_matches_librosa_load(self):
+        """Resampled stereo input matches librosa.load on the same file"""
+        stereo = np.stack([create_synthetic_human_audio(duration=1, sr=44100)] * 2, axis=1)
+        payload = self.encode(stereo, 44100, "WAV")
+        expected, _ = librosa.load(io.BytesIO(payload), sr=16000)
+        assert np.allclose(AudioProcessor.load_audio(payload), expected, atol=1e-6)
+    
+    def test_fallback_cleans_up_temp_file(self, monkeypatch):
+        """Undecodable payloads fall back to a temp file that is always removed"""
+        created = []
+        real_tempfile = tempfile.NamedTemporaryFile
+        monkeypatch.setattr(tempfile, "NamedTemporaryFile",
+                            lambda **kw: created.append(real_tempfile(**kw)) or created[-1])
+        with pytest.raises(Exception):
+            AudioProcessor.load_audio(b"not audio" * 20, suffix=".m4a")
+        assert len(created) == 1
+        assert not Path(created[0].name).exists()
+
+class TestDurationProbe:
+    """Test rejecting oversize audio before it is decoded"""
+    
+    @staticmethod
+    def wav_bytes(seconds, sr=16000):
+        buffer = io.BytesIO()
+        sf.write(buffer, np.zeros(int(seconds * sr), dtype=np.float32), sr, format="WAV", subtype="PCM_16")
+        return buffer.getvalue()
+    
+    def test_wav_header_parsing(self):
+        """Duration comes from the fmt byte rate and data chunk size"""
+        header = self.wav_bytes(30, sr=8000)[:64]
+        assert AudioProcessor.parse_wav_duration(header) == pytest.approx(30.0)
+        assert AudioProcessor.parse_wav_duration(b"OggS" + b"\0" * 60) is None
+    
+    def test_oversize_rejected_before_decode(self, monkeypatch):
+        """A clip whose header says it is too long never reaches the decoder"""
+        def no_decode(*args, **kwargs):
+            raise AssertionError("decoded an oversize clip")
+        monkeypatch.setattr(AudioProcessor, "_load_with_soundfile", no_decode)
+        with pytest.raises(HTTPException) as exc_info:
+            AudioProcessor.load_audio(self.wav_bytes(30), max_seconds=20)
+        assert exc_info.value.status_code == 413
+    
+    def test_unprobeable_audio_read_only_to_limit(self, monkeypatch):
+        """Without a usable header only just past max_seconds is decoded"""
+        monkeypatch.setattr(AudioProcessor, "probe_duration", staticmethod(lambda stream: None))
+        audio = AudioProcessor.load_audio(self.wav_bytes(30), max_seconds=5)
+        assert 5 * 16000 < len(audio) <= 5 * 16000 + 2
+    
+    def test_oversize_not_masked_by_synthetic_fallback(self):
+        """The base64 path surfaces 413 instead of substituting synthetic audio"""
+        with pytest.raises(HTTPException) as exc_info:
+            AudioProcessor.decode_audio_bytes(self.wav_bytes(30), max_seconds=20)
+        assert exc_info.value.status_code == 413
+
 class TestForensicAnalyzer:
     """Test forensic analysis functions"""
     
@@ -130,6 +218,58 @@ class TestForensicAnalyzer:
         assert "harmonicity" in result
         assert result["harmonic_to_noise_ratio"] > 0
 
+class TestSpectralFeatures:
+    """Test the shared per-request feature context"""
+    
+    def test_stft_computed_once(self, monkeypatch):
+        """infer() and all analyzers share a single STFT"""
+        calls = []
+        real_stft = librosa.stft
+        monkeypatch.setattr(librosa, "stft", lambda *a, **kw: calls.append(1) or real_stft(*a, **kw))
+        audio = create_synthetic_human_audio(duration=1)
+        features = SpectralFeatures(audio, 16000)
+        main.detection_model.infer(audio, features)
+        ForensicAnalyzer.comprehensive_analysis(audio, 16000, features)
+        assert len(calls) == 1
+    
+    def test_views_match_direct_computation(self):
+        """Derived mel/dB views match computing them from the waveform"""
+        audio = create_synthetic_ai_audio(duration=1)
+        features = SpectralFeatures(audio, 16000)
+        expected = librosa.power_to_db(librosa.feature.melspectrogram(y=audio, sr=16000), ref=np.max)
+        assert np.allclose(features.mel_db, expected, atol=1e-3)
+        assert ForensicAnalyzer.analyze_spectral_gaps(audio, 16000, features) == \
+            ForensicAnalyzer.analyze_spectral_gaps(audio, 16000)
+
+class TestPitchTracker:
+    """Test the pluggable F0 estimators"""
+    
+    def test_yin_tracks_pure_tone(self):
+        """The fast YIN backend recovers a steady 150 Hz tone"""
+        t = np.arange(16000) / 16000
+        f0 = PitchTracker.yin(np.sin(2 * np.pi * 150 * t), 16000, fmin=65.0, fmax=2093.0)
+        voiced = f0[~np.isnan(f0)]
+        assert len(voiced) > 0.8 * len(f0)
+        assert np.allclose(voiced, 150, rtol=0.01)
+    
+    def test_silence_is_unvoiced(self):
+        """Frames without a periodic signal come back as NaN"""
+        f0 = PitchTracker.yin(np.zeros(16000), 16000, fmin=65.0, fmax=2093.0)
+        assert np.all(np.isnan(f0))
+    
+    @pytest.mark.parametrize("requested,expected", [(None, "yin"), ("fast", "yin"), ("accurate", "pyin")])
+    def test_result_reports_backend(self, requested, expected):
+        """Glottal pulse results name the backend that produced them"""
+        audio = create_synthetic_ai_audio(duration=1)
+        result = ForensicAnalyzer.analyze_glottal_pulses(audio, 16000, pitch_backend=requested)
+        assert result["pitch_backend"] == expected
+        assert result["mean_f0"] > 0
+    
+    def test_unknown_backend_rejected(self):
+        """Requests naming an unknown backend fail validation"""
+        with pytest.raises(ValueError):
+            main.AudioDetectionRequest(audioBase64="AAAA", language="english", pitchBackend="crepe")
+
 # ==================== Integration Tests ====================
 
 class TestDetectionAPI:
@@ -317,6 +457,1482 @@ class TestLanguageSupport:
         assert response.status_code == 200
         assert response.json()["verdict"] in ["HUMAN", "AI_GENERATED"]
 
+# ==================== Upload Endpoint Tests ====================
+
+class TestUploadEndpoint:
+    """Test the binary /v1/detect/upload endpoint"""
+    
+    @staticmethod
+    def wav_bytes(audio, sr=16000):
+        buffer = io.BytesIO()
+        sf.write(buffer, audio, sr, format="WAV")
+        return buffer.getvalue()
+    
+    @pytest.mark.asyncio
+    async def test_multipart_upload(self, asgi_client, valid_api_key):
+        """Multipart uploads return the standard detection response"""
+        payload = self.wav_bytes(create_synthetic_human_audio())
+        async with asgi_client as ac:
+            response = await ac.post(
+                "/v1/detect/upload",
+                headers={"X-API-KEY": valid_api_key},
+                files={"file": ("clip.wav", payload, "audio/wav")},
+                data={"language": "tamil", "pitchBackend": "fast"}
+            )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["language_detected"] == "tamil"
+        assert data["forensic_analysis"]["glottal_pulses"]["pitch_backend"] == "yin"
+        assert data["duration_seconds"] == pytest.approx(3.0)
+    
+    @pytest.mark.asyncio
+    async def test_raw_body_matches_json_endpoint(self, asgi_client, valid_api_key):
+        """A raw audio/wav body scores the same as the base64 JSON endpoint"""
+        audio = create_synthetic_ai_audio()
+        payload = self.wav_bytes(audio)
+        async with asgi_client as ac:
+            raw = await ac.post(
+                "/v1/detect/upload?language=english",
+                headers={"X-API-KEY": valid_api_key, "Content-Type": "audio/wav"},
+                content=payload
+            )
+            as_json = await ac.post(
+                "/v1/detect",
+                headers={"X-API-KEY": valid_api_key},
+                json={"audioBase64": base64.b64encode(payload).decode(), "language": "english"}
+            )
+        assert raw.status_code == 200
+        assert raw.json()["forensic_analysis"]["detection_scores"] == \
+            as_json.json()["forensic_analysis"]["detection_scores"]
+    
+    @pytest.mark.asyncio
+    async def test_oversized_upload_rejected(self, asgi_client, valid_api_key, monkeypatch):
+        """Bodies past MAX_UPLOAD_BYTES are cut off with 413"""
+        monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 1024)
+        
+        async def chunks():
+            for _ in range(4):
+                yield b"\0" * 512
+        
+        async with asgi_client as ac:
+            response = await ac.post(
+                "/v1/detect/upload?language=english",
+                headers={"X-API-KEY": valid_api_key, "Content-Type": "audio/wav"},
+                content=chunks()
+            )
+        assert response.status_code == 413
+
+    @pytest.mark.asyncio
+    async def test_oversized_chunked_multipart_rejected(self, asgi_client, valid_api_key, monkeypatch):
+        """Multipart bodies without a Content-Length are counted as they stream"""
+        monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 1024)
+        monkeypatch.setattr(main, "MAX_LONG_UPLOAD_BYTES", 1024)
+        boundary = "vanicheck"
+
+        async def chunks():
+            yield (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.wav\"\r\n"
+                   "Content-Type: audio/wav\r\n\r\n").encode()
+            for _ in range(8):
+                yield b"\0" * 512
+            yield f"\r\n--{boundary}--\r\n".encode()
+
+        headers = {"X-API-KEY": valid_api_key, "Content-Type": f"multipart/form-data; boundary={boundary}"}
+        async with asgi_client as ac:
+            upload = await ac.post("/v1/detect/upload?language=english", headers=headers, content=chunks())
+            long = await ac.post("/v1/detect/long?language=english", headers=headers, content=chunks())
+        assert upload.status_code == 413
+        assert long.status_code == 413
+
+    @pytest.mark.asyncio
+    async def test_upload_requires_api_key(self, asgi_client):
+        """Uploads are authenticated like /v1/detect"""
+        async with asgi_client as ac:
+            response = await ac.post("/v1/detect/upload?language=english", content=b"RIFF")
+        assert response.status_code == 401
+
+# ==================== Batch Endpoint Tests ====================
+
+class TestBatchDetection:
+    """Test /v1/detect/batch and stacked inference"""
+    
+    def test_infer_batch_matches_infer(self):
+        """Stacked, length-masked features equal per-clip infer()"""
+        clips = [AudioProcessor.preprocess_audio(create_synthetic_human_audio(duration=d)) for d in (0.5, 1.7, 3)]
+        batch_results, magnitudes = main.detection_model.infer_batch(clips)
+        for clip, batch_result, magnitude in zip(clips, batch_results, magnitudes):
+            single = main.detection_model.infer(clip)
+            assert batch_result == pytest.approx(single, rel=1e-4)
+            assert magnitude.shape == SpectralFeatures(clip).magnitude.shape
+    
+    def test_stacks_group_similar_lengths(self):
+        """Stacks are length-sorted and respect the padded-seconds budget"""
+        stacks = main.plan_batch_stacks([10.0, 1.0, 2.0, 9.0, 1.5], max_seconds=20)
+        assert stacks == [[1, 4, 2], [3, 0]]
+        assert main.plan_batch_stacks([30.0], max_seconds=20) == [[0]]
+    
+    @pytest.mark.asyncio
+    async def test_batch_reports_per_item_errors(self, asgi_client, human_audio_b64, ai_audio_b64, valid_api_key):
+        """Good items succeed while bad items carry their own error"""
+        async with asgi_client as ac:
+            response = await ac.post(
+                "/v1/detect/batch",
+                headers={"X-API-KEY": valid_api_key},
+                json={"items": [
+                    {"audioBase64": human_audio_b64, "language": "english"},
+                    {"audioBase64": human_audio_b64, "language": "klingon"},
+                    {"audioBase64": ai_audio_b64, "language": "hindi"},
+                ]}
+            )
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["succeeded"], data["failed"]) == (2, 1)
+        assert [r["index"] for r in data["results"]] == [0, 1, 2]
+        assert data["results"][1]["error"]["status_code"] == 400
+        assert data["results"][2]["result"]["language_detected"] == "hindi"
+        assert "glottal_pulses" in data["results"][0]["result"]["forensic_analysis"]
+    
+    @pytest.mark.asyncio
+    async def test_batch_size_limit(self, asgi_client, human_audio_b64, valid_api_key, monkeypatch):
+        """Batches over MAX_BATCH_ITEMS are rejected up front"""
+        monkeypatch.setattr(main, "MAX_BATCH_ITEMS", 1)
+        item = {"audioBase64": human_audio_b64, "language": "english"}
+        async with asgi_client as ac:
+            response = await ac.post("/v1/detect/batch", headers={"X-API-KEY": valid_api_key}, json={"items": [item, item]})
+        assert response.status_code == 413
+
+# ==================== URL Fetching Tests ====================
+
+class StubAudioHandler(BaseHTTPRequestHandler):
+    """Local origin serving a clip, a slow response and an oversized stream"""
+    
+    clip = b""
+    deliveries = []
+    
+    def do_GET(self):
+        if self.path == "/clip.wav":
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/wav")
+            self.send_header("Content-Length", str(len(self.clip)))
+            self.end_headers()
+            self.wfile.write(self.clip)
+        elif self.path == "/slow.wav":
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/wav")
+            self.send_header("Content-Length", "1000")
+            self.end_headers()
+            time.sleep(1)
+            self.wfile.write(b"\0" * 1000)
+        elif self.path == "/trickle.wav":
+            # Each byte arrives well within the read timeout, the whole body does not
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/wav")
+            self.send_header("Content-Length", "40")
+            self.end_headers()
+            try:
+                for _ in range(40):
+                    self.wfile.write(b"\0")
+                    self.wfile.flush()
+                    time.sleep(0.05)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        elif self.path == "/endless.wav":
+            # No Content-Length: the cap has to trip while streaming
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/wav")
+            self.end_headers()
+            try:
+                for _ in range(1000):
+                    self.wfile.write(b"\0" * 4096)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        else:
+            self.send_error(404)
+    
+    def do_POST(self):
+        # Webhook receiver: /hook records the delivery, /broken always fails
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/hook":
+            self.deliveries.append((dict(self.headers), body))
+            self.send_response(204)
+            self.end_headers()
+        else:
+            self.send_error(500)
+    
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def stub_origin():
+    """Local HTTP server standing in for a remote audio host"""
+    buffer = io.BytesIO()
+    sf.write(buffer, create_synthetic_human_audio(duration=1), 16000, format="WAV")
+    StubAudioHandler.clip = buffer.getvalue()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAudioHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+class TestAudioFetcher:
+    """Test the async, size-capped audioUrl fetcher"""
+    
+    @pytest.mark.asyncio
+    async def test_fetches_clip(self, stub_origin):
+        """Downloads return the bytes and a suffix from the Content-Type"""
+        fetcher = main.AudioFetcher(max_bytes=1024 * 1024)
+        audio_bytes, suffix = await fetcher.fetch(f"{stub_origin}/clip.wav")
+        await fetcher.aclose()
+        assert audio_bytes == StubAudioHandler.clip
+        assert suffix == ".wav"
+    
+    @pytest.mark.asyncio
+    async def test_aborts_past_byte_cap(self, stub_origin):
+        """Streams without Content-Length are cut off at max_bytes"""
+        fetcher = main.AudioFetcher(max_bytes=64 * 1024)
+        with pytest.raises(HTTPException) as exc_info:
+            await fetcher.fetch(f"{stub_origin}/endless.wav")
+        await fetcher.aclose()
+        assert exc_info.value.status_code == 413
+    
+    @pytest.mark.asyncio
+    async def test_declared_length_rejected_up_front(self, stub_origin):
+        """A Content-Length over the cap is rejected before reading the body"""
+        fetcher = main.AudioFetcher(max_bytes=100)
+        with pytest.raises(HTTPException) as exc_info:
+            await fetcher.fetch(f"{stub_origin}/clip.wav")
+        await fetcher.aclose()
+        assert exc_info.value.status_code == 413
+    
+    @pytest.mark.asyncio
+    async def test_read_timeout(self, stub_origin):
+        """A slow origin times out instead of holding the request"""
+        fetcher = main.AudioFetcher(read_timeout=0.2)
+        with pytest.raises(HTTPException) as exc_info:
+            await fetcher.fetch(f"{stub_origin}/slow.wav")
+        await fetcher.aclose()
+        assert exc_info.value.status_code == 504
+    
+    @pytest.mark.asyncio
+    async def test_total_deadline(self, stub_origin):
+        """An origin trickling bytes under the read timeout still hits the overall deadline"""
+        fetcher = main.AudioFetcher(read_timeout=1, total_timeout=0.5)
+        start = time.perf_counter()
+        with pytest.raises(HTTPException) as exc_info:
+            await fetcher.fetch(f"{stub_origin}/trickle.wav")
+        await fetcher.aclose()
+        assert exc_info.value.status_code == 504
+        assert time.perf_counter() - start < 1.5
+
+    def test_one_client_per_loop(self, stub_origin):
+        """A new loop gets its own client; clients of closed loops are dropped"""
+        fetcher = main.AudioFetcher()
+        asyncio.run(fetcher.fetch(f"{stub_origin}/clip.wav"))
+        first = next(iter(fetcher._clients.values()))
+
+        async def fetch_and_close():
+            await fetcher.fetch(f"{stub_origin}/clip.wav")
+            assert list(fetcher._clients.values()) != [first]
+            assert len(fetcher._clients) == 1
+            await fetcher.aclose()
+
+        asyncio.run(fetch_and_close())
+        assert fetcher._clients == {}
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("path", ["/missing.wav", "file:///etc/passwd"])
+    async def test_bad_urls(self, stub_origin, path):
+        """HTTP errors and non-HTTP schemes are invalid audio URLs"""
+        url = path if "://" in path else f"{stub_origin}{path}"
+        with pytest.raises(HTTPException) as exc_info:
+            await main.AudioFetcher().fetch(url)
+        assert exc_info.value.status_code == 400
+    
+    @pytest.mark.asyncio
+    async def test_detect_with_audio_url(self, asgi_client, stub_origin, valid_api_key):
+        """/v1/detect analyzes clips fetched from audioUrl"""
+        async with asgi_client as ac:
+            response = await ac.post(
+                "/v1/detect",
+                headers={"X-API-KEY": valid_api_key},
+                json={"audioUrl": f"{stub_origin}/clip.wav", "language": "english"}
+            )
+        assert response.status_code == 200
+        assert response.json()["duration_seconds"] == pytest.approx(1.0)
+
+# ==================== Worker Pool Tests ====================
+
+class TestAnalysisExecutor:
+    """Test the bounded analysis worker pool"""
+    
+    @pytest.mark.asyncio
+    async def test_runs_off_event_loop(self):
+        """Jobs run on a pool thread, not the event loop thread"""
+        executor = AnalysisExecutor(kind="thread", workers=1, queue_limit=0)
+        try:
+            worker_thread = await executor.run(threading.get_ident)
+            assert worker_thread != threading.get_ident()
+            assert executor.pending == 0
+        finally:
+            executor.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_full(self):
+        """A full queue is rejected with 503 and Retry-After"""
+        executor = AnalysisExecutor(kind="thread", workers=1, queue_limit=0, retry_after=7)
+        release = threading.Event()
+        try:
+            busy = asyncio.ensure_future(executor.run(release.wait, 5))
+            await asyncio.sleep(0.05)
+            with pytest.raises(HTTPException) as exc_info:
+                await executor.run(int)
+            assert exc_info.value.status_code == 503
+            assert exc_info.value.headers["Retry-After"] == "7"
+            release.set()
+            assert await busy is True
+        finally:
+            release.set()
+            executor.shutdown()
+    
+    def test_worker_errors_are_picklable(self):
+        """HTTPExceptions raised in a worker survive the trip back from a process pool"""
+        with pytest.raises(main.PipelineError) as exc_info:
+            main._call_in_worker(main.run_detection_pipeline, None, None)
+        restored = pickle.loads(pickle.dumps(exc_info.value))
+        assert restored.status_code == 400
+        assert restored.detail == "Invalid audio data"
+    
+    @pytest.mark.asyncio
+    async def test_health_responsive_while_saturated(self, asgi_client, human_audio_b64, valid_api_key, monkeypatch):
+        """Health endpoints answer while the pool is busy with a slow clip"""
+        release = threading.Event()
+        
+        def slow_pipeline(*args):
+            release.wait(5)
+            raise HTTPException(status_code=413, detail="too long")
+        
+        monkeypatch.setattr(main, "run_detection_pipeline", slow_pipeline)
+        async with asgi_client as ac:
+            detect = asyncio.ensure_future(ac.post(
+                "/v1/detect",
+                headers={"X-API-KEY": valid_api_key},
+                json={"audioBase64": human_audio_b64, "language": "english"}
+            ))
+            await asyncio.sleep(0.05)
+            health = await asyncio.wait_for(ac.get("/health"), timeout=1)
+            assert health.status_code == 200
+            assert not detect.done()
+            release.set()
+            assert (await detect).status_code == 413
+
+# ==================== Result Cache Tests ====================
+
+class TestResultCache:
+    """Test the content-hash result cache"""
+    
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted first"""
+        cache = ResultCache(max_entries=2, ttl_seconds=60)
+        cache.put("a", {"v": 1})
+        cache.put("b", {"v": 2})
+        assert cache.get("a") == {"v": 1}
+        cache.put("c", {"v": 3})
+        assert cache.get("b") is None
+        assert cache.get("a") == {"v": 1}
+        assert cache.stats()["hits"] == 2
+        assert cache.stats()["misses"] == 1
+    
+    def test_ttl_expiry(self, monkeypatch):
+        """Entries stop being served once their TTL passes"""
+        cache = ResultCache(max_entries=8, ttl_seconds=10)
+        cache.put("a", {"v": 1})
+        now = main.time.time()
+        monkeypatch.setattr(main.time, "time", lambda: now + 11)
+        assert cache.get("a") is None
+    
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """A fresh cache instance finds results written to the disk tier"""
+        ResultCache(max_entries=8, ttl_seconds=60, disk_dir=str(tmp_path)).put("a", {"natural": np.True_})
+        cache = ResultCache(max_entries=8, ttl_seconds=60, disk_dir=str(tmp_path))
+        assert cache.get("a") == {"natural": True}
+        assert cache.stats()["disk_hits"] == 1
+    
+    def test_key_depends_on_settings(self):
+        """Language and analyzer settings are part of the key"""
+        key = ResultCache.make_key("digest", "english", pitch_backend="yin")
+        assert key == ResultCache.make_key("digest", "english", pitch_backend="yin")
+        assert key != ResultCache.make_key("digest", "hindi", pitch_backend="yin")
+        assert key != ResultCache.make_key("digest", "english", pitch_backend="pyin")
+    
+    @pytest.mark.asyncio
+    async def test_repeat_submission_skips_pipeline(self, asgi_client, human_audio_b64, valid_api_key, monkeypatch):
+        """An identical resubmission is answered without running the pipeline"""
+        monkeypatch.setattr(main, "result_cache", ResultCache(max_entries=8, ttl_seconds=60))
+        runs = []
+        real_pipeline = main.run_detection_pipeline
+        monkeypatch.setattr(main, "run_detection_pipeline", lambda *a: runs.append(1) or real_pipeline(*a))
+        body = {"audioBase64": human_audio_b64, "language": "english"}
+        async with asgi_client as ac:
+            first = await ac.post("/v1/detect", headers={"X-API-KEY": valid_api_key}, json=body)
+            second = await ac.post("/v1/detect", headers={"X-API-KEY": valid_api_key}, json=body)
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert len(runs) == 1
+        assert second.json()["forensic_analysis"] == first.json()["forensic_analysis"]
+
+    @pytest.mark.asyncio
+    async def test_synthetic_fallback_not_cached(self, asgi_client, valid_api_key, monkeypatch):
+        """Truncated or undecodable payloads analysed as synthetic audio are never cached"""
+        monkeypatch.setattr(main, "result_cache", ResultCache(max_entries=8, ttl_seconds=60))
+        truncated = base64.b64encode(b"RIFF").decode()
+        garbage = base64.b64encode(b"\x01" * 500).decode()
+        headers = {"X-API-KEY": valid_api_key}
+        async with asgi_client as ac:
+            for payload in (truncated, truncated, garbage):
+                response = await ac.post("/v1/detect", headers=headers, json={"audioBase64": payload, "language": "english"})
+                assert response.status_code == 200
+                assert response.headers["X-Cache"] == "MISS"
+            batch = await ac.post("/v1/detect/batch", headers=headers, json={"items": [
+                {"audioBase64": garbage, "language": "english"},
+            ]})
+        assert batch.json()["results"][0]["status"] == "ok"
+        assert main.result_cache.stats()["entries"] == 0
+
+# ==================== Metrics Tests ====================
+
+class TestMetrics:
+    """Test the Prometheus /metrics endpoint and stage instrumentation"""
+    
+    def test_timed_stage_records_into_worker_log(self):
+        """Timings taken inside a pool job are returned with its result"""
+        def job():
+            with main.timed_stage("unit_stage"):
+                return "done"
+        result, timings = main._call_in_worker(job)
+        assert result == "done"
+        assert [stage for stage, _ in timings] == ["unit_stage"]
+        assert main.REGISTRY.get_sample_value("vanicheck_stage_seconds_count", {"stage": "unit_stage"}) is None
+    
+    @pytest.mark.asyncio
+    async def test_detection_updates_metrics(self, asgi_client, human_audio_b64, valid_api_key, monkeypatch):
+        """A detection request shows up in the stage, request and cache series"""
+        monkeypatch.setattr(main, "result_cache", ResultCache(max_entries=8, ttl_seconds=60))
+        sample = main.REGISTRY.get_sample_value
+        labels = {"endpoint": "detect", "status": "200", "language": "english"}
+        
+        def detections():
+            return sum(sample("vanicheck_requests_total", {**labels, "verdict": v}) or 0 for v in ("HUMAN", "AI_GENERATED"))
+        
+        before_infer = sample("vanicheck_stage_seconds_count", {"stage": "infer"}) or 0
+        before_requests = detections()
+        async with asgi_client as ac:
+            response = await ac.post("/v1/detect", headers={"X-API-KEY": valid_api_key},
+                                     json={"audioBase64": human_audio_b64, "language": "english"})
+            metrics = await ac.get("/metrics")
+        assert response.status_code == 200
+        assert metrics.status_code == 200
+        assert metrics.headers["content-type"].startswith("text/plain")
+        assert sample("vanicheck_stage_seconds_count", {"stage": "infer"}) == before_infer + 1
+        assert detections() == before_requests + 1
+        assert 'vanicheck_stage_seconds_bucket{le="0.1",stage="decode"}' in metrics.text
+        assert "vanicheck_analysis_queue_depth 0.0" in metrics.text
+        assert 'vanicheck_result_cache_lookups_total{result="miss"} 1.0' in metrics.text
+    
+    @pytest.mark.asyncio
+    async def test_rejected_request_counted_by_status(self, asgi_client):
+        """Failed requests are counted with their HTTP status and no verdict"""
+        labels = {"endpoint": "detect", "status": "401", "verdict": "none", "language": "other"}
+        before = main.REGISTRY.get_sample_value("vanicheck_requests_total", labels) or 0
+        async with asgi_client as ac:
+            response = await ac.post("/v1/detect", json={"audioBase64": "AAAA", "language": "english"})
+        assert response.status_code == 401
+        assert main.REGISTRY.get_sample_value("vanicheck_requests_total", labels) == before + 1
+
+# ==================== ONNX Backend Tests ====================
+
+@pytest.fixture(scope="module")
+def onnx_model_path(tmp_path_factory):
+    """
+    Tiny stand-in for the exported classifier with the same input/output
+    names: logits = [-k, k] where k is the masked excess kurtosis of the clip
+    """
+    onnx = pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    from onnx import helper, TensorProto
+    
+    axes = helper.make_tensor("axes", TensorProto.INT64, [1], [1])
+    three = helper.make_tensor("three", TensorProto.FLOAT, [], [3.0])
+    nodes = [
+        helper.make_node("Cast", ["attention_mask"], ["mask"], to=TensorProto.FLOAT),
+        helper.make_node("Mul", ["input_values", "input_values"], ["x2"]),
+        helper.make_node("Mul", ["x2", "x2"], ["x4"]),
+        helper.make_node("Mul", ["x4", "mask"], ["x4_masked"]),
+        helper.make_node("ReduceSum", ["x4_masked", "axes"], ["x4_sum"], keepdims=1),
+        helper.make_node("ReduceSum", ["mask", "axes"], ["count"], keepdims=1),
+        helper.make_node("Div", ["x4_sum", "count"], ["kurtosis"]),
+        helper.make_node("Sub", ["kurtosis", "three"], ["excess"]),
+        helper.make_node("Neg", ["excess"], ["neg_excess"]),
+        helper.make_node("Concat", ["neg_excess", "excess"], ["logits"], axis=1),
+    ]
+    graph = helper.make_graph(
+        nodes, "tiny-detector",
+        [helper.make_tensor_value_info("input_values", TensorProto.FLOAT, ["batch_size", "sequence_length"]),
+         helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch_size", "sequence_length"])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch_size", 2])],
+        initializer=[axes, three]
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 14)], ir_version=8)
+    path = tmp_path_factory.mktemp("onnx") / "model.onnx"
+    onnx.save(model, str(path))
+    return str(path)
+
+class TestOnnxBackend:
+    """Test the onnxruntime detection backend"""
+    
+    def test_infer_scores_clip(self, onnx_model_path):
+        """Logits become HUMAN/AI probabilities that sum to one"""
+        model = main.OnnxDeepfakeModel(onnx_model_path, warmup_seconds=0.5)
+        result = model.infer(create_synthetic_human_audio())
+        assert abs(result["human_probability"] + result["ai_probability"] - 1.0) < 1e-6
+        assert len(result["logits"]) == 2
+    
+    def test_batch_matches_single_clips(self, onnx_model_path):
+        """Padding in a batched run is masked out"""
+        model = main.OnnxDeepfakeModel(onnx_model_path, warmup_seconds=0)
+        clips = [create_synthetic_human_audio(duration=1), create_synthetic_ai_audio(duration=3)]
+        results, magnitudes = model.infer_batch(clips)
+        assert magnitudes == [None, None]
+        for clip, result in zip(clips, results):
+            assert result["ai_probability"] == pytest.approx(model.infer(clip)["ai_probability"], abs=1e-5)
+    
+    def test_load_detection_model(self, onnx_model_path, monkeypatch):
+        """The backend is chosen by name; unknown names are rejected"""
+        monkeypatch.setattr(main, "ONNX_MODEL_PATH", onnx_model_path)
+        assert main.load_detection_model("onnx").backend == "onnx"
+        assert main.load_detection_model("spectral").backend == "spectral"
+        with pytest.raises(ValueError):
+            main.load_detection_model("torch")
+    
+    def test_int8_variant_has_its_own_version(self, onnx_model_path):
+        """Quantized results are versioned (and cached) apart from FP32 ones"""
+        assert main.OnnxDeepfakeModel(onnx_model_path, variant="int8", warmup_seconds=0).version == "1.0.0-onnx-int8"
+        with pytest.raises(ValueError):
+            main.OnnxDeepfakeModel(onnx_model_path, variant="fp16", warmup_seconds=0)
+    
+    @pytest.mark.asyncio
+    async def test_detect_reports_onnx_model_version(self, onnx_model_path, asgi_client, human_audio_b64, valid_api_key, monkeypatch):
+        """Responses and cache keys carry the active model's version"""
+        monkeypatch.setattr(main, "detection_model", main.OnnxDeepfakeModel(onnx_model_path, warmup_seconds=0))
+        monkeypatch.setattr(main, "result_cache", ResultCache(max_entries=8, ttl_seconds=60))
+        async with asgi_client as ac:
+            response = await ac.post("/v1/detect", headers={"X-API-KEY": valid_api_key},
+                                     json={"audioBase64": human_audio_b64, "language": "english"})
+        assert response.status_code == 200
+        assert response.json()["model_version"] == "1.0.0-onnx"
+
+# ==================== Inference Batching Tests ====================
+
+class RecordingModel:
+    """infer_batch() stand-in that records batch sizes and tags each clip by length"""
+    
+    def __init__(self, delay=0.0):
+        self.batches = []
+        self.delay = delay
+    
+    def infer_batch(self, audio_batch):
+        self.batches.append(len(audio_batch))
+        time.sleep(self.delay)
+        return [{"clip_length": len(a)} for a in audio_batch], [None] * len(audio_batch)
+
+class TestInferenceBatcher:
+    """Test the micro-batching inference scheduler"""
+    
+    def test_concurrent_calls_share_a_batch(self, monkeypatch):
+        """Clips submitted together run in one forward pass and get their own results"""
+        model = RecordingModel(delay=0.05)
+        monkeypatch.setattr(main, "detection_model", model)
+        batcher = main.InferenceBatcher(max_batch_size=8, max_wait_ms=200)
+        results = {}
+        
+        def submit(n):
+            results[n] = batcher.infer(np.zeros(n))
+        
+        threads = [threading.Thread(target=submit, args=(n,)) for n in (100, 200, 300, 400)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+        assert sum(model.batches) == 4
+        assert max(model.batches) > 1
+        assert all(results[n] == ({"clip_length": n}, None) for n in results)
+    
+    def test_lone_request_is_not_delayed(self, monkeypatch):
+        """With no other clip waiting to be scored the batch is dispatched immediately,
+        even while other analysis jobs are busy decoding or running forensics"""
+        monkeypatch.setattr(main, "detection_model", RecordingModel())
+        monkeypatch.setattr(main.analysis_executor, "_pending", 3)
+        batcher = main.InferenceBatcher(max_batch_size=8, max_wait_ms=2000)
+        start = time.perf_counter()
+        assert batcher.infer(np.zeros(10))[0] == {"clip_length": 10}
+        assert time.perf_counter() - start < 1.0
+        assert batcher._entered == 0
+    
+    def test_batch_fill_and_queue_delay_metrics(self, monkeypatch):
+        """Every dispatch records its size and each clip's queueing delay"""
+        monkeypatch.setattr(main, "detection_model", RecordingModel())
+        batcher = main.InferenceBatcher(max_batch_size=4, max_wait_ms=1)
+        sample = main.REGISTRY.get_sample_value
+        before_batches = sample("vanicheck_infer_batch_size_count") or 0
+        before_clips = sample("vanicheck_infer_queue_seconds_count") or 0
+        batcher.infer(np.zeros(10))
+        batcher.infer(np.zeros(10))
+        assert sample("vanicheck_infer_batch_size_count") == before_batches + 2
+        assert sample("vanicheck_infer_queue_seconds_count") == before_clips + 2
+    
+    @pytest.mark.skipif(not hasattr(main.os, "fork"), reason="needs fork")
+    def test_forked_worker_first_infer_completes(self):
+        """after_fork gives a preloaded worker its own dispatcher, so its first infer() is not stranded"""
+        import subprocess
+        code = (
+            "import os, threading, numpy as np, main\n"
+            "main.inference_batcher = main.InferenceBatcher(max_batch_size=4, max_wait_ms=5)\n"
+            "audio = np.zeros(16000, dtype=np.float32)\n"
+            "main.inference_batcher.infer(audio)  # the master's warm-up\n"
+            "pid = os.fork()\n"
+            "if pid == 0:\n"
+            "    main.after_fork()\n"
+            "    done = threading.Event()\n"
+            "    threading.Thread(target=lambda: (main.inference_batcher.infer(audio), done.set()), daemon=True).start()\n"
+            "    os._exit(0 if done.wait(5) else 1)\n"
+            "print(os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]))\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent.parent,
+                                env={**main.os.environ, "WARMUP_ON_START": "false"},
+                                capture_output=True, text=True, check=True, timeout=120)
+        assert result.stdout.strip().splitlines()[-1] == "0"
+
+    def test_analyze_audio_uses_batcher(self, monkeypatch):
+        """The single-clip pipeline routes inference through the batcher when enabled"""
+        batcher = main.InferenceBatcher(max_batch_size=4, max_wait_ms=1)
+        monkeypatch.setattr(main, "inference_batcher", batcher)
+        result = main.analyze_audio(create_synthetic_human_audio(duration=1))
+        assert 0.0 <= result["detection"]["ai_probability"] <= 1.0
+        assert set(result["forensics"]) == {"glottal_pulses", "spectral_gaps", "breathing", "harmonics"}
+
+# ==================== Long Audio Tests ====================
+
+class TestLongAudio:
+    """Test sliding-window analysis of recordings past MAX_AUDIO_SECONDS"""
+    
+    @staticmethod
+    def call_recording(sr=16000):
+        """30s: 12s speech-like, 6s silence, 12s speech-like (longer than MAX_AUDIO_SECONDS)"""
+        speech = create_synthetic_human_audio(duration=12, sr=sr)
+        return np.concatenate([speech, np.zeros(6 * sr), speech]).astype(np.float32)
+    
+    def test_windows_cover_recording(self):
+        """Windows start every hop, overlap, and stop at the end of the file"""
+        buffer = io.BytesIO()
+        sf.write(buffer, self.call_recording(sr=8000), 8000, format="WAV")
+        buffer.seek(0)
+        windows = list(AudioProcessor.iter_windows(buffer, window_seconds=10, hop_seconds=5))
+        assert [start for start, _ in windows] == [0.0, 5.0, 10.0, 15.0, 20.0]
+        assert all(len(w) == 10 * 16000 for _, w in windows)  # resampled to SAMPLE_RATE
+    
+    def test_oversize_recording_rejected_from_header(self):
+        """Recordings past MAX_LONG_AUDIO_SECONDS are refused before decoding"""
+        buffer = io.BytesIO()
+        sf.write(buffer, self.call_recording(), 16000, format="WAV")
+        buffer.seek(0)
+        with pytest.raises(HTTPException) as exc:
+            next(AudioProcessor.iter_windows(buffer, 10, 5, max_seconds=20))
+        assert exc.value.status_code == 413
+    
+    def test_window_count_capped_from_header(self):
+        """A recording needing more than max_windows windows is refused before decoding"""
+        buffer = io.BytesIO()
+        sf.write(buffer, self.call_recording(), 16000, format="WAV")
+        buffer.seek(0)
+        assert len(list(AudioProcessor.iter_windows(buffer, 10, 5, max_windows=5))) == 5
+        buffer.seek(0)
+        with pytest.raises(HTTPException) as exc:
+            next(AudioProcessor.iter_windows(buffer, 10, 5, max_windows=4))
+        assert exc.value.status_code == 400
+    
+    @pytest.mark.asyncio
+    async def test_upload_hashed_off_event_loop(self, asgi_client, valid_api_key, monkeypatch):
+        """Hashing a large recording must not block the event loop thread"""
+        monkeypatch.setattr(main, "result_cache", ResultCache(max_entries=8, ttl_seconds=60))
+        hashed_on = []
+        original = main.hash_file
+        monkeypatch.setattr(main, "hash_file", lambda f: hashed_on.append(threading.get_ident()) or original(f))
+        async with asgi_client as ac:
+            response = await ac.post(
+                "/v1/detect/long?language=english&windowSeconds=10&hopSeconds=10",
+                headers={"X-API-KEY": valid_api_key, "Content-Type": "audio/wav"},
+                content=TestUploadEndpoint.wav_bytes(self.call_recording())
+            )
+        assert response.status_code == 200
+        assert hashed_on and threading.get_ident() not in hashed_on
+    
+    @pytest.mark.asyncio
+    async def test_tiny_hop_rejected(self, asgi_client, valid_api_key):
+        """hopSeconds below max(LONG_AUDIO_MIN_HOP_SECONDS, window / 4) would multiply the work"""
+        async with asgi_client as ac:
+            statuses = [
+                (await ac.post(f"/v1/detect/long?language=english&windowSeconds=10&hopSeconds={hop}",
+                               headers={"X-API-KEY": valid_api_key, "Content-Type": "audio/wav"},
+                               content=b"RIFF")).status_code
+                for hop in (0.001, 2)
+            ]
+        assert statuses == [400, 400]
+    
+    @pytest.mark.asyncio
+    async def test_long_upload_returns_timeline(self, asgi_client, valid_api_key, monkeypatch):
+        """A recording longer than MAX_AUDIO_SECONDS gets a per-window timeline"""
+        monkeypatch.setattr(main, "result_cache", ResultCache(max_entries=8, ttl_seconds=60))
+        payload = TestUploadEndpoint.wav_bytes(self.call_recording())
+        async with asgi_client as ac:
+            short = await ac.post(
+                "/v1/detect/upload?language=english",
+                headers={"X-API-KEY": valid_api_key, "Content-Type": "audio/wav"},
+                content=payload
+            )
+            response = await ac.post(
+                "/v1/detect/long?language=english&windowSeconds=6&hopSeconds=6",
+                headers={"X-API-KEY": valid_api_key, "Content-Type": "audio/wav"},
+                content=payload
+            )
+        assert short.status_code == 413
+        assert response.status_code == 200
+        data = response.json()
+        assert data["duration_seconds"] == pytest.approx(30.0)
+        assert [seg["start_seconds"] for seg in data["segments"]] == [0, 6, 12, 18, 24]
+        assert data["segments"][2]["verdict"] == "SILENCE"
+        assert data["summary"]["voiced_segments"] == 4
+        assert data["verdict"] in ("HUMAN", "AI_GENERATED", "UNCERTAIN")
+        assert "glottal_pulses" in data["segments"][0]["forensic_analysis"]
+    
+    @pytest.mark.asyncio
+    async def test_window_longer_than_clip_limit_rejected(self, asgi_client, valid_api_key):
+        """Each window must itself fit within MAX_AUDIO_SECONDS"""
+        async with asgi_client as ac:
+            response = await ac.post(
+                "/v1/detect/long?language=english&windowSeconds=60",
+                headers={"X-API-KEY": valid_api_key, "Content-Type": "audio/wav"},
+                content=b"RIFF"
+            )
+        assert response.status_code == 400
+
+# ==================== Live Stream Tests ====================
+
+class TestLiveStream:
+    """Test the /v1/stream WebSocket endpoint and its incremental STFT"""
+    
+    def test_incremental_stft_matches_full_stft(self):
+        """Frames built from uneven chunks equal a one-shot uncentered STFT"""
+        audio = create_synthetic_human_audio(duration=3).astype(np.float32)
+        spectrum = main.StreamingSpectrum(window_seconds=2)
+        for chunk in np.array_split(audio, [1000, 1500, 7000, 20000, 33333]):
+            spectrum.push(chunk)
+        window, magnitude = spectrum.snapshot()
+        full = np.abs(librosa.stft(audio, n_fft=2048, hop_length=512, center=False))
+        assert len(window) == 2 * 16000
+        assert np.allclose(magnitude, full[:, -magnitude.shape[1]:], atol=1e-3)
+    
+    def test_stream_updates(self, valid_api_key):
+        """PCM frames produce rolling updates and a final one on end"""
+        from fastapi.testclient import TestClient
+        
+        pcm = (create_synthetic_ai_audio(duration=3) * 0.5 * 32767).astype("<i2").tobytes()
+        with TestClient(app) as tc:
+            with tc.websocket_connect(f"/v1/stream?updateSeconds=1&apiKey={valid_api_key}") as ws:
+                for offset in range(0, len(pcm), 8000):  # 0.25s frames
+                    ws.send_bytes(pcm[offset:offset + 8000])
+                ws.send_json({"type": "end"})
+                updates = []
+                while not updates or not updates[-1]["final"]:
+                    updates.append(ws.receive_json())
+        assert updates[-1]["stream_seconds"] == pytest.approx(3.0)
+        assert updates[-1]["window_seconds"] == pytest.approx(3.0)
+        for update in updates:
+            assert 0.0 <= update["ai_probability"] <= 1.0
+            assert update["verdict"] in ("HUMAN", "AI_GENERATED", "UNCERTAIN")
+    
+    def test_cpu_budget_skips_updates(self, valid_api_key, monkeypatch):
+        """A stream over its CPU budget gets fewer updates, and says how many it skipped"""
+        from fastapi.testclient import TestClient
+        
+        monkeypatch.setattr(main, "STREAM_CPU_BUDGET", 0.001)
+        monkeypatch.setattr(main, "score_stream_window", lambda audio, magnitude: ({"ai_probability": 0.2}, 0.01))
+        pcm = np.zeros(16000 * 3, dtype="<f4").tobytes()
+        with TestClient(app) as tc:
+            with tc.websocket_connect(f"/v1/stream?encoding=pcm_f32le&updateSeconds=0.25&apiKey={valid_api_key}") as ws:
+                for offset in range(0, len(pcm), 16000):  # 0.25s frames
+                    ws.send_bytes(pcm[offset:offset + 16000])
+                ws.send_json({"type": "end"})
+                updates = []
+                while not updates or not updates[-1]["final"]:
+                    updates.append(ws.receive_json())
+        assert len(updates) < 12
+        assert updates[-1]["skipped_updates"] > 0
+    
+    def test_stream_faster_than_real_time_closed(self, valid_api_key, monkeypatch):
+        """Audio pushed far ahead of the wall clock closes the stream with a policy violation"""
+        from fastapi.testclient import TestClient
+        from starlette.websockets import WebSocketDisconnect
+        
+        monkeypatch.setattr(main, "STREAM_BURST_SECONDS", 1)
+        frame = np.zeros(8000, dtype="<i2").tobytes()  # 0.5 s
+        with TestClient(app) as tc:
+            with pytest.raises(WebSocketDisconnect) as exc:
+                with tc.websocket_connect(f"/v1/stream?apiKey={valid_api_key}") as ws:
+                    for _ in range(40):  # 20 s of audio in a burst
+                        ws.send_bytes(frame)
+                    while True:
+                        ws.receive_json()
+        assert exc.value.code == 1008
+    
+    def test_stream_requires_api_key(self):
+        """Connections without a valid key are closed with a policy violation"""
+        from fastapi.testclient import TestClient
+        from starlette.websockets import WebSocketDisconnect
+        
+        with TestClient(app) as tc:
+            with pytest.raises(WebSocketDisconnect) as exc:
+                with tc.websocket_connect("/v1/stream?apiKey=wrong") as ws:
+                    ws.receive_json()
+        assert exc.value.code == 1008
+    
+    def test_stream_limit(self, valid_api_key, monkeypatch):
+        """Streams past STREAM_MAX_CONNECTIONS are turned away"""
+        from fastapi.testclient import TestClient
+        from starlette.websockets import WebSocketDisconnect
+        
+        monkeypatch.setattr(main, "STREAM_MAX_CONNECTIONS", 0)
+        with TestClient(app) as tc:
+            with pytest.raises(WebSocketDisconnect) as exc:
+                with tc.websocket_connect(f"/v1/stream?apiKey={valid_api_key}") as ws:
+                    ws.receive_json()
+        assert exc.value.code == 1013
+
+# ==================== Job API Tests ====================
+
+async def wait_for_job(ac, job_id, api_key, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = (await ac.get(f"/v1/jobs/{job_id}", headers={"X-API-KEY": api_key})).json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+class TestJobs:
+    """Test the /v1/jobs async job API and its stores"""
+    
+    @pytest.mark.asyncio
+    async def test_job_lifecycle(self, asgi_client, human_audio_b64, valid_api_key):
+        """A job is accepted at once, then polled to its detection result"""
+        async with asgi_client as ac:
+            created = await ac.post("/v1/jobs", headers={"X-API-KEY": valid_api_key},
+                                    json={"audioBase64": human_audio_b64, "language": "hindi"})
+            assert created.status_code == 202
+            assert created.json()["status"] == "queued"
+            assert created.headers["Location"] == f"/v1/jobs/{created.json()['job_id']}"
+            job = await wait_for_job(ac, created.json()["job_id"], valid_api_key)
+        assert job["status"] == "succeeded"
+        assert job["result"]["language_detected"] == "hindi"
+        assert job["result"]["verdict"] in ("HUMAN", "AI_GENERATED", "UNCERTAIN")
+        assert job["finished_at"] >= job["started_at"] >= job["created_at"]
+    
+    @pytest.mark.asyncio
+    async def test_failed_job_reports_error(self, asgi_client, valid_api_key, stub_origin):
+        """Pipeline errors end the job as failed with the HTTP status it would have had"""
+        async with asgi_client as ac:
+            created = await ac.post("/v1/jobs", headers={"X-API-KEY": valid_api_key},
+                                    json={"audioUrl": f"{stub_origin}/missing.wav", "language": "english"})
+            job = await wait_for_job(ac, created.json()["job_id"], valid_api_key)
+        assert job["status"] == "failed"
+        assert job["error"]["status_code"] == 400
+    
+    @pytest.mark.asyncio
+    async def test_callback_is_signed_and_recorded(self, asgi_client, human_audio_b64, valid_api_key, stub_origin, monkeypatch):
+        """The finished job is POSTed to callbackUrl with an HMAC signature"""
+        monkeypatch.setattr(main.job_runner, "callback_secret", "webhook-secret")
+        monkeypatch.setattr(main, "JOB_CALLBACK_ALLOWED_HOSTS", {"127.0.0.1"})
+        StubAudioHandler.deliveries.clear()
+        async with asgi_client as ac:
+            created = await ac.post("/v1/jobs", headers={"X-API-KEY": valid_api_key},
+                                    json={"audioBase64": human_audio_b64, "language": "english",
+                                          "callbackUrl": f"{stub_origin}/hook"})
+            job_id = created.json()["job_id"]
+            for _ in range(200):
+                job = (await ac.get(f"/v1/jobs/{job_id}", headers={"X-API-KEY": valid_api_key})).json()
+                if job["callback"]:
+                    break
+                await asyncio.sleep(0.05)
+        assert job["callback"] == {"delivered": True, "attempts": 1, "status_code": 204}
+        headers, body = StubAudioHandler.deliveries[-1]
+        expected = hmac.new(b"webhook-secret", body, hashlib.sha256).hexdigest()
+        assert headers["X-VaniCheck-Signature"] == f"sha256={expected}"
+        assert json.loads(body)["job_id"] == job_id
+    
+    @pytest.mark.asyncio
+    async def test_unknown_job_and_bad_callback(self, asgi_client, human_audio_b64, valid_api_key):
+        """Unknown ids are 404; non-http callbacks are rejected up front"""
+        async with asgi_client as ac:
+            missing = await ac.get("/v1/jobs/nope", headers={"X-API-KEY": valid_api_key})
+            bad = await ac.post("/v1/jobs", headers={"X-API-KEY": valid_api_key},
+                                json={"audioBase64": human_audio_b64, "language": "english", "callbackUrl": "file:///etc/passwd"})
+        assert missing.status_code == 404
+        assert bad.status_code == 400
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("callback_url", [
+        "http://127.0.0.1/hook", "http://localhost:8080/hook", "http://10.0.0.5/hook",
+        "http://169.254.169.254/latest/meta-data", "http://[::1]/hook", "http://[::ffff:192.168.1.1]/hook",
+        "http://0.0.0.0/hook", "http://240.0.0.1/hook",
+    ])
+    async def test_internal_callback_targets_rejected(self, asgi_client, human_audio_b64, valid_api_key, callback_url):
+        """Callbacks to private, loopback, link-local or reserved addresses are refused"""
+        async with asgi_client as ac:
+            response = await ac.post("/v1/jobs", headers={"X-API-KEY": valid_api_key},
+                                     json={"audioBase64": human_audio_b64, "language": "english", "callbackUrl": callback_url})
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_callback_allowlist(self, monkeypatch):
+        """Hosts in JOB_CALLBACK_ALLOWED_HOSTS skip the public-address check"""
+        with pytest.raises(HTTPException):
+            await main.validate_callback_url("http://127.0.0.1:9000/hook")
+        monkeypatch.setattr(main, "JOB_CALLBACK_ALLOWED_HOSTS", {"127.0.0.1"})
+        await main.validate_callback_url("http://127.0.0.1:9000/hook")
+        await main.validate_callback_url("https://93.184.216.34/hook")
+
+    def test_job_store_is_abstract(self):
+        """Stores must implement the whole JobStore interface"""
+        with pytest.raises(TypeError):
+            main.JobStore()
+
+        class Partial(main.JobStore):
+            def create(self, job):
+                pass
+
+        with pytest.raises(TypeError):
+            Partial()
+    
+    @pytest.mark.asyncio
+    async def test_long_audio_job_spools_and_hashes_off_loop(self, asgi_client, valid_api_key, stub_origin, monkeypatch):
+        """A longAudio URL is downloaded to a temp file (removed afterwards); hashing and store calls run off the loop"""
+        monkeypatch.setattr(main, "result_cache", ResultCache(max_entries=8, ttl_seconds=60))
+        loop_thread = threading.get_ident()
+        hashed_on, claimed_on, downloads = [], [], []
+        original_hash, original_claim, original_fetch = main.hash_file, main.job_runner.store.claim, main.audio_fetcher.fetch_to_file
+        
+        async def fetch_to_file(url, max_bytes=None):
+            path, suffix = await original_fetch(url, max_bytes)
+            downloads.append(path)
+            return path, suffix
+        
+        monkeypatch.setattr(main, "hash_file", lambda f: hashed_on.append(threading.get_ident()) or original_hash(f))
+        monkeypatch.setattr(main.job_runner.store, "claim", lambda job_id: claimed_on.append(threading.get_ident()) or original_claim(job_id))
+        monkeypatch.setattr(main.audio_fetcher, "fetch_to_file", fetch_to_file)
+        async with asgi_client as ac:
+            created = await ac.post("/v1/jobs", headers={"X-API-KEY": valid_api_key},
+                                    json={"audioUrl": f"{stub_origin}/clip.wav", "language": "english", "longAudio": True})
+            job = await wait_for_job(ac, created.json()["job_id"], valid_api_key)
+        assert job["status"] == "succeeded"
+        assert job["result"]["segments"]
+        assert downloads and not any(os.path.exists(path) for path in downloads)
+        assert hashed_on and loop_thread not in hashed_on
+        assert claimed_on and loop_thread not in claimed_on
+    
+    @pytest.mark.asyncio
+    async def test_sqlite_store_resumes_after_restart(self, tmp_path, human_audio_b64):
+        """Jobs queued or interrupted before a restart run when a new runner starts"""
+        path = str(tmp_path / "jobs.sqlite3")
+        request = main.JobRequest(audioBase64=human_audio_b64, language="tamil")
+        for job_id, status in (("queued-job", "queued"), ("interrupted-job", "running")):
+            main.SQLiteJobStore(path).create({
+                "job_id": job_id, "status": status, "created_at": time.time(), "started_at": None,
+                "finished_at": None, "request": request.model_dump(by_alias=True), "callback_url": None,
+                "result": None, "error": None, "callback": None
+            })
+        runner = main.JobRunner(main.SQLiteJobStore(path), workers=1)
+        runner.start()
+        try:
+            await runner._resuming
+            await asyncio.wait_for(runner._queue.join(), timeout=20)
+        finally:
+            await runner.stop()
+        store = main.SQLiteJobStore(path)
+        for job_id in ("queued-job", "interrupted-job"):
+            job = store.get(job_id)
+            assert job["status"] == "succeeded"
+            assert job["result"]["language_detected"] == "tamil"
+            assert job["request"] is None
+
+    def test_sqlite_store_creates_its_directory(self, tmp_path):
+        """A JOB_STORE_PATH in a directory that does not exist yet (e.g. a fresh volume) still opens"""
+        path = tmp_path / "data" / "jobs.sqlite3"
+        main.SQLiteJobStore(str(path))
+        assert path.exists()
+
+# ==================== DSP Constant Tests ====================
+
+class TestDSPConstants:
+    """Test the per-configuration DSP constant cache"""
+    
+    def test_built_once_per_config(self):
+        assert main.dsp_constants(16000, 2048) is main.dsp_constants(16000, 2048)
+        assert main.dsp_constants(16000, 1024) is not main.dsp_constants(16000, 2048)
+        constants = main.dsp_constants(16000, 2048)
+        assert not constants.mel_basis.flags.writeable  # shared between threads
+        assert constants.mel_basis.shape == (128, 1025)
+    
+    def test_features_match_librosa(self):
+        """Cached window and filterbank give the same STFT and mel spectrogram as librosa"""
+        audio = create_synthetic_human_audio()
+        features = SpectralFeatures(audio, 16000)
+        # float32 window for float32 audio: equal to float32 rounding
+        np.testing.assert_allclose(features.magnitude, np.abs(librosa.stft(audio, n_fft=2048, hop_length=512)), atol=1e-4)
+        assert np.array_equal(SpectralFeatures(audio.astype(np.float64), 16000).magnitude,
+                              np.abs(librosa.stft(audio.astype(np.float64), n_fft=2048, hop_length=512)))
+        np.testing.assert_allclose(features.mel_power, librosa.feature.melspectrogram(y=audio, sr=16000), rtol=1e-4, atol=1e-6)
+    
+    def test_high_band_matches_frequency_mask(self):
+        for sr in (16000, 22050, 44100):
+            freqs = librosa.fft_frequencies(sr=sr, n_fft=2048)
+            assert main.dsp_constants(sr, 2048).high_band_start == np.where(freqs >= 8000)[0][0]
+
+# ==================== Float32 Pipeline Tests ====================
+
+class TestFloat32Pipeline:
+    """Test the float32, in-place preprocess -> feature path"""
+    
+    def test_preprocess_float32_and_copy(self):
+        audio = create_synthetic_human_audio().astype(np.float64) * 3 + 0.2
+        result = AudioProcessor.preprocess_audio(audio)
+        assert result.dtype == np.float32
+        assert audio.max() > 1  # input left untouched by default
+        reference = audio / np.max(np.abs(audio))
+        np.testing.assert_allclose(result, reference - reference.mean(), atol=1e-6)
+        
+        owned = audio.astype(np.float32)
+        assert AudioProcessor.preprocess_audio(owned, copy=False) is owned
+    
+    def test_pipeline_stays_float32(self):
+        audio = AudioProcessor.preprocess_audio(AudioProcessor.generate_synthetic_audio(1.0), copy=False)
+        features = SpectralFeatures(audio, 16000)
+        assert audio.dtype == features.magnitude.dtype == features.mel_power.dtype == np.float32
+    
+    def test_entropy_matches_direct_formula(self):
+        S = SpectralFeatures(create_synthetic_human_audio(), 16000).magnitude
+        S_norm = S / (np.sum(S) + 1e-10)
+        expected = -np.sum(S_norm * np.log2(S_norm + 1e-10))
+        assert main.DeepfakeDetectionModel._spectral_entropy(S) == pytest.approx(expected, rel=1e-5)
+        batch = np.stack([S, S[:, ::-1].copy()])
+        np.testing.assert_allclose(main.DeepfakeDetectionModel._spectral_entropy(batch, axis=(1, 2)), [expected] * 2, rtol=1e-5)
+    
+    def test_scratch_buffer_reused(self):
+        first = main.scratch_buffer("test", (4, 8))
+        assert np.shares_memory(first, main.scratch_buffer("test", (2, 8)))  # smaller requests reuse it
+        grown = main.scratch_buffer("test", (8, 8))
+        assert grown.shape == (8, 8) and not np.shares_memory(first, grown)
+        assert main.scratch_buffer("test", (4, 8), np.complex64, order="F").flags.f_contiguous
+
+# ==================== Request Profiling Tests ====================
+
+class TestRequestProfiling:
+    """Test admin-only X-PROFILE profiling on /v1/detect"""
+    
+    @pytest.mark.asyncio
+    async def test_summary_profile(self, asgi_client, human_audio_b64, valid_api_key, monkeypatch):
+        """The summary lists every stage that ran and the hottest functions"""
+        monkeypatch.setattr(main, "ADMIN_API_KEY", "admin-key")
+        headers = {"X-API-KEY": valid_api_key, "X-ADMIN-KEY": "admin-key", "X-PROFILE": "summary"}
+        async with asgi_client as ac:
+            response = await ac.post("/v1/detect", headers=headers, json={"audioBase64": human_audio_b64, "language": "english"})
+        assert response.status_code == 200
+        assert response.json()["verdict"] in ("HUMAN", "AI_GENERATED", "UNCERTAIN")
+        profile = response.json()["profile"]
+        stages = [stage["stage"] for stage in profile["stages"]]
+        assert stages[0] == "decode" and "forensic_glottal_pulses" in stages
+        assert 0 < len(profile["functions"]) <= main.PROFILE_TOP_FUNCTIONS
+        own_times = [f["self_ms"] for f in profile["functions"]]
+        assert own_times == sorted(own_times, reverse=True)
+    
+    @pytest.mark.asyncio
+    async def test_pstats_download(self, asgi_client, human_audio_b64, valid_api_key, monkeypatch, tmp_path):
+        import pstats
+        
+        monkeypatch.setattr(main, "ADMIN_API_KEY", "admin-key")
+        headers = {"X-API-KEY": valid_api_key, "X-ADMIN-KEY": "admin-key", "X-PROFILE": "pstats"}
+        async with asgi_client as ac:
+            response = await ac.post("/v1/detect", headers=headers, json={"audioBase64": human_audio_b64, "language": "english"})
+        assert response.status_code == 200
+        assert response.headers["content-disposition"].endswith('.prof"')
+        path = tmp_path / "request.prof"
+        path.write_bytes(response.content)
+        functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+        assert "run_detection_pipeline" in functions
+    
+    @pytest.mark.asyncio
+    async def test_requires_admin_key(self, asgi_client, human_audio_b64, valid_api_key, monkeypatch):
+        body = {"audioBase64": human_audio_b64, "language": "english"}
+        headers = {"X-API-KEY": valid_api_key, "X-PROFILE": "summary"}
+        async with asgi_client as ac:
+            disabled = await ac.post("/v1/detect", headers={**headers, "X-ADMIN-KEY": ""}, json=body)
+            monkeypatch.setattr(main, "ADMIN_API_KEY", "admin-key")
+            missing = await ac.post("/v1/detect", headers=headers, json=body)
+            wrong = await ac.post("/v1/detect", headers={**headers, "X-ADMIN-KEY": valid_api_key}, json=body)
+            unknown = await ac.post("/v1/detect", headers={**headers, "X-ADMIN-KEY": "admin-key", "X-PROFILE": "flame"}, json=body)
+            plain = await ac.post("/v1/detect", headers={"X-API-KEY": valid_api_key}, json=body)
+        assert (disabled.status_code, missing.status_code, wrong.status_code, unknown.status_code) == (403, 401, 403, 400)
+        assert plain.status_code == 200 and "profile" not in plain.json()
+
+# ==================== Resampler Tests ====================
+
+class TestResampler:
+    """Test the RESAMPLE_QUALITY levels and the 16 kHz / integer-ratio paths"""
+    
+    def test_native_rate_is_zero_work(self):
+        audio = create_synthetic_human_audio()
+        assert AudioProcessor.resample(audio, 16000) is audio
+    
+    def test_integer_ratios_exact_length(self):
+        for sr, ratio in ((48000, 3), (32000, 2)):
+            audio = np.random.default_rng(0).normal(0, 0.1, sr * 2).astype(np.float32)
+            for quality in AudioProcessor.RESAMPLE_RECIPES:
+                resampled = AudioProcessor.resample(audio, sr, quality)
+                assert len(resampled) == len(audio) // ratio
+                assert resampled.dtype == np.float32
+    
+    def test_high_matches_librosa(self):
+        audio = np.random.default_rng(1).normal(0, 0.1, 48000).astype(np.float32)
+        np.testing.assert_array_equal(AudioProcessor.resample(audio, 48000, "high"),
+                                      librosa.resample(audio, orig_sr=48000, target_sr=16000))
+    
+    def test_levels_reject_aliases(self):
+        """A 9 kHz tone must not fold back into the 16 kHz band at either level"""
+        t = np.arange(48000) / 48000
+        tone = np.sin(2 * np.pi * 9000 * t).astype(np.float32)
+        for quality in AudioProcessor.RESAMPLE_RECIPES:
+            resampled = AudioProcessor.resample(tone, 48000, quality)[1000:-1000]
+            assert np.sqrt(np.mean(resampled ** 2)) < 1e-3
+        with pytest.raises(ValueError):
+            AudioProcessor.resample(tone, 48000, "cubic")
+    
+    def test_quality_in_cache_key(self, monkeypatch):
+        key = main.result_cache_key("digest", "english", None)
+        monkeypatch.setattr(main, "RESAMPLE_QUALITY", "fast")
+        assert main.result_cache_key("digest", "english", None) != key
+
+# ==================== Analysis Mode Tests ====================
+
+class TestAnalysisModes:
+    """Test fast/standard/full forensic depth and the cascade escalation"""
+    
+    @staticmethod
+    def scored(ai_probability):
+        return {"ai_probability": ai_probability, "human_probability": 1.0 - ai_probability}
+    
+    def test_modes_select_analyzers(self):
+        """Each mode runs only its analyzers; standard skips pitch tracking"""
+        audio = create_synthetic_human_audio()
+        features = SpectralFeatures(audio, 16000)
+        for mode, expected in ForensicAnalyzer.MODES.items():
+            result = ForensicAnalyzer.comprehensive_analysis(audio, 16000, features, mode=mode)
+            assert tuple(result) == expected
+        assert "glottal_pulses" not in ForensicAnalyzer.MODES["standard"]
+    
+    def test_resolve_mode(self):
+        """Unset modes fall back to ANALYSIS_MODE; unknown modes are rejected"""
+        assert ForensicAnalyzer.resolve_mode(None) == main.ANALYSIS_MODE
+        assert ForensicAnalyzer.resolve_mode("CASCADE") == "cascade"
+        with pytest.raises(ValueError):
+            ForensicAnalyzer.resolve_mode("thorough")
+    
+    def test_cascade_escalates_only_when_uncertain(self):
+        """Confident scores stop at the detector; UNCERTAIN scores get full forensics"""
+        audio = create_synthetic_ai_audio()
+        features = SpectralFeatures(audio, 16000)
+        confident = main.run_forensics(audio, features, self.scored(0.95), mode="cascade")
+        assert confident["forensics"] == {}
+        assert confident["escalated"] is False
+        uncertain = main.run_forensics(audio, features, self.scored(0.5), mode="cascade")
+        assert tuple(uncertain["forensics"]) == ForensicAnalyzer.MODES["full"]
+        assert uncertain["escalated"] is True
+        assert "escalated" not in main.run_forensics(audio, features, self.scored(0.5), mode="fast")
+
+    @pytest.mark.asyncio
+    async def test_escalation_keeps_verdict_mapping(self, asgi_client, human_audio_b64, valid_api_key, monkeypatch):
+        """Cascade escalates mid-band scores but reports the same verdict as every other mode"""
+        monkeypatch.setattr(main, "result_cache", ResultCache(max_entries=8, ttl_seconds=60))
+        monkeypatch.setattr(main, "inference_batcher", None)
+        monkeypatch.setattr(main.detection_model, "infer", lambda audio, features=None: self.scored(0.5))
+        body = {"audioBase64": human_audio_b64, "language": "english"}
+        async with asgi_client as ac:
+            cascade = await ac.post("/v1/detect", headers={"X-API-KEY": valid_api_key}, json={**body, "mode": "cascade"})
+            fast = await ac.post("/v1/detect", headers={"X-API-KEY": valid_api_key}, json={**body, "mode": "fast"})
+        assert cascade.json()["escalated"] is True
+        assert cascade.json()["verdict"] == fast.json()["verdict"] == main.decide_verdict(0.5)[0]
+        assert main.decide_verdict(0.5)[0] in ("HUMAN", "AI_GENERATED")
+
+    @pytest.mark.asyncio
+    async def test_unset_extras_omitted(self, asgi_client, human_audio_b64, valid_api_key):
+        """escalated and profile are left out of responses they do not apply to, not sent as null"""
+        item = {"audioBase64": human_audio_b64, "language": "english", "mode": "fast"}
+        async with asgi_client as ac:
+            single = await ac.post("/v1/detect", headers={"X-API-KEY": valid_api_key}, json=item)
+            batch = await ac.post("/v1/detect/batch", headers={"X-API-KEY": valid_api_key}, json={"items": [item]})
+        for result in (single.json(), batch.json()["results"][0]["result"]):
+            assert "escalated" not in result
+            assert "profile" not in result
+
+    @pytest.mark.asyncio
+    async def test_fast_mode_response(self, asgi_client, human_audio_b64, valid_api_key, monkeypatch):
+        """fast returns the verdict with detector scores only, cached apart from full"""
+        monkeypatch.setattr(main, "result_cache", ResultCache(max_entries=8, ttl_seconds=60))
+        headers = {"X-API-KEY": valid_api_key}
+        body = {"audioBase64": human_audio_b64, "language": "english"}
+        async with asgi_client as ac:
+            fast = await ac.post("/v1/detect", headers=headers, json={**body, "mode": "fast"})
+            full = await ac.post("/v1/detect", headers=headers, json={**body, "mode": "full"})
+            invalid = await ac.post("/v1/detect", headers=headers, json={**body, "mode": "thorough"})
+        assert fast.status_code == 200
+        assert fast.json()["analysis_mode"] == "fast"
+        assert list(fast.json()["forensic_analysis"]) == ["detection_scores"]
+        assert full.headers["X-Cache"] == "MISS"
+        assert "glottal_pulses" in full.json()["forensic_analysis"]
+        assert full.json()["verdict"] == fast.json()["verdict"]
+        assert invalid.status_code == 422
+    
+    @pytest.mark.asyncio
+    async def test_upload_mode_field(self, asgi_client, valid_api_key, monkeypatch):
+        """Uploads take the mode as a query parameter or form field"""
+        monkeypatch.setattr(main, "result_cache", ResultCache(max_entries=8, ttl_seconds=60))
+        payload = TestUploadEndpoint.wav_bytes(create_synthetic_human_audio())
+        async with asgi_client as ac:
+            response = await ac.post(
+                "/v1/detect/upload",
+                headers={"X-API-KEY": valid_api_key},
+                files={"file": ("clip.wav", payload, "audio/wav")},
+                data={"language": "english", "mode": "standard"}
+            )
+            invalid = await ac.post(
+                "/v1/detect/upload?language=english&mode=thorough",
+                headers={"X-API-KEY": valid_api_key, "Content-Type": "audio/wav"},
+                content=payload
+            )
+        assert response.status_code == 200
+        assert response.json()["analysis_mode"] == "standard"
+        assert set(response.json()["forensic_analysis"]) == {"spectral_gaps", "breathing", "harmonics", "detection_scores"}
+        assert invalid.status_code == 400
+
+# ==================== Cold Start Tests ====================
+
+class TestColdStart:
+    """Test that heavy modules stay out of import time and load in the warm-up"""
+    
+    def test_import_skips_heavy_modules(self):
+        """Importing main loads neither scipy.signal nor librosa's numba-backed submodules"""
+        import subprocess
+        heavy = ["scipy.signal", "numba", "librosa.core", "librosa.feature"]
+        code = f"import sys, main; print([m for m in {heavy!r} if m in sys.modules])"
+        result = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent.parent,
+                                capture_output=True, text=True, check=True)
+        assert result.stdout.strip().splitlines()[-1] == "[]"
+    
+    @pytest.mark.asyncio
+    async def test_warm_up_marks_pool(self):
+        """The background warm-up runs the pipeline and flags the pool as warmed up"""
+        executor = AnalysisExecutor(kind="thread", workers=2, queue_limit=0)
+        executor.start()
+        try:
+            assert executor.warmed_up is False
+            await executor.warm_up()
+            assert executor.warmed_up is True
+        finally:
+            executor.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_health_reports_warm_up(self, asgi_client):
+        async with asgi_client as ac:
+            response = await ac.get("/v1/health")
+        assert isinstance(response.json()["analysis_pool"]["warmed_up"], bool)
+
+# ==================== Stage Benchmark Tests ====================
+
+class TestStageBenchmarks:
+    """Test the per-stage benchmark suite and its regression gate (src/benchmark_stages.py)"""
+    
+    @pytest.fixture
+    def suite(self):
+        sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+        try:
+            import benchmark_stages
+            yield benchmark_stages
+        finally:
+            sys.path.pop(0)
+    
+    def test_suite_covers_every_stage(self, suite):
+        results = suite.run_suite(durations=[1], repeat=1)
+        assert set(results) == {f"{stage}@1s" for stage in (
+            "decode_audio", "preprocess_audio", "infer", "analyze_glottal_pulses",
+            "analyze_spectral_gaps", "analyze_breathing_patterns", "analyze_harmonic_structure"
+        )}
+        assert all(r["wall_ms"] > 0 and r["peak_mb"] >= 0 for r in results.values())
+    
+    def test_synthetic_clips_are_deterministic(self, suite):
+        np.testing.assert_array_equal(suite.synthetic_clip(1, 16000), suite.synthetic_clip(1, 16000))
+    
+    def test_regression_gate(self, suite):
+        """Only slowdowns past both the tolerance and the noise floor fail"""
+        baseline = {
+            "infer@5s": {"wall_ms": 10.0, "peak_mb": 4.0},
+            "decode_audio@5s": {"wall_ms": 0.2, "peak_mb": 1.0},
+        }
+        current = {
+            "infer@5s": {"wall_ms": 14.0, "peak_mb": 4.1},
+            "decode_audio@5s": {"wall_ms": 0.6, "peak_mb": 1.0},  # +200% but under min_ms
+            "infer@120s": {"wall_ms": 99.0, "peak_mb": 9.0},  # no baseline yet
+        }
+        assert suite.find_regressions(current, baseline, tolerance=0.25) == [("infer@5s", "wall_ms", 10.0, 14.0)]
+        assert suite.find_regressions(current, baseline, tolerance=0.5) == []
+
+# ==================== Load Harness Tests ====================
+
+class TestLoadHarness:
+    """Test the closed-loop saturation harness (src/loadtest.py)"""
+    
+    @pytest.fixture
+    def harness(self):
+        sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+        try:
+            import loadtest
+            yield loadtest
+        finally:
+            sys.path.pop(0)
+    
+    def test_clip_mix_is_deterministic_and_distinct(self, harness):
+        clips = harness.make_clips(16)
+        assert [c["wav"] for c in clips] == [c["wav"] for c in harness.make_clips(16)]
+        assert len({c["wav"] for c in clips}) == 16  # distinct clips never hit the result cache
+        assert {c["seconds"] for c in clips} <= {s for s, _ in harness.CLIP_MIX}
+    
+    @pytest.mark.asyncio
+    async def test_level_summary(self, harness, asgi_client):
+        """One level against the in-process app yields a complete curve point"""
+        async with asgi_client as ac:
+            sample = await harness.run_level(ac, harness.make_clips(4), concurrency=2, duration=0.5, endpoint="upload")
+        level = harness.summarize(sample)
+        assert level["requests"] >= 2
+        assert level["error_rate"] == 0.0
+        assert level["throughput_rps"] > 0 and level["p50_ms"] <= level["p95_ms"] <= level["p99_ms"]
+    
+    def test_knee_and_regressions(self, harness):
+        curve = [{"concurrency": c, "throughput_rps": r} for c, r in ((1, 20.0), (2, 38.0), (4, 50.0), (8, 52.0), (16, 49.0))]
+        assert harness.find_knee(curve) == 4
+        slower = [{"concurrency": 4, "throughput_rps": 40.0}, {"concurrency": 8, "throughput_rps": 50.0}]
+        assert harness.compare_curves(slower, curve, tolerance=0.15) == [(4, 50.0, 40.0)]
+
+# ==================== Production Server Tests ====================
+
+class TestServerProfile:
+    """Test the gunicorn profile and the state it relies on being fork-safe"""
+    
+    @staticmethod
+    def load_profile(monkeypatch, tmp_path, **env):
+        import os
+        import runpy
+        environ = {k: v for k, v in os.environ.items() if k not in ("ANALYSIS_WORKERS", "ONNX_INTRA_OP_THREADS", "JOB_STORE")}
+        environ.update(PROMETHEUS_MULTIPROC_DIR=str(tmp_path), **env)
+        monkeypatch.setattr(os, "environ", environ)
+        profile = runpy.run_path(str(Path(__file__).parent.parent / "gunicorn.conf.py"))
+        return profile, environ
+    
+    def test_profile_settings(self, monkeypatch, tmp_path):
+        """Preloaded uvicorn workers, recycling, and cores split between workers"""
+        (tmp_path / "counter_1.db").write_bytes(b"stale")
+        profile, environ = self.load_profile(monkeypatch, tmp_path, WEB_CONCURRENCY="3", MAX_REQUESTS="500")
+        assert profile["workers"] == 3
+        assert profile["preload_app"] is True
+        assert profile["worker_class"] == "uvicorn.workers.UvicornWorker"
+        assert profile["max_requests"] == 500 and profile["max_requests_jitter"] > 0
+        assert profile["keepalive"] > 60
+        assert environ["ANALYSIS_WORKERS"] == str(max(1, profile["cpus"] // 3))
+        assert not list(tmp_path.glob("*.db"))
+    
+    def test_profile_defaults_to_available_cpus(self, monkeypatch, tmp_path):
+        profile, _ = self.load_profile(monkeypatch, tmp_path)
+        assert profile["workers"] == profile["available_cpus"]() >= 1
+    
+    def test_several_workers_share_a_job_store(self, monkeypatch, tmp_path):
+        """Per-worker memory stores would 404 polls that land on a sibling worker"""
+        from types import SimpleNamespace
+        _, environ = self.load_profile(monkeypatch, tmp_path, WEB_CONCURRENCY="2")
+        assert environ["JOB_STORE"] == "sqlite"
+        _, environ = self.load_profile(monkeypatch, tmp_path, WEB_CONCURRENCY="1")
+        assert "JOB_STORE" not in environ
+        profile, _ = self.load_profile(monkeypatch, tmp_path, WEB_CONCURRENCY="2", JOB_STORE="memory")
+        warnings = []
+        server = SimpleNamespace(cfg=SimpleNamespace(workers=2), log=SimpleNamespace(warning=lambda *args: warnings.append(args)))
+        monkeypatch.setattr(main, "JOB_STORE", "memory")
+        monkeypatch.setattr(main, "WARMUP_ON_START", False)
+        monkeypatch.setattr(main.job_runner, "requeue_running", True)
+        profile["when_ready"](server)  # an explicit memory store starts, with a warning
+        assert warnings
+    
+    @pytest.mark.asyncio
+    async def test_recycled_worker_requeues_unfinished_jobs(self, tmp_path, monkeypatch):
+        """A worker stopped mid-job (max_requests recycling) hands the job back for its replacement"""
+        started = asyncio.Event()
+        
+        async def hang(request, executor):
+            started.set()
+            await asyncio.sleep(3600)
+        
+        monkeypatch.setattr(main, "execute_job", hang)
+        path = str(tmp_path / "jobs.sqlite3")
+        runner = main.JobRunner(main.SQLiteJobStore(path), workers=1)
+        runner.requeue_running = False
+        runner.start()
+        job = await runner.submit(main.JobRequest(audioBase64="AAAA", language="english"))
+        await asyncio.wait_for(started.wait(), 5)
+        assert runner.store.get(job["job_id"])["status"] == "running"
+        await runner.stop()
+        
+        store = main.SQLiteJobStore(path)
+        assert store.get(job["job_id"])["status"] == "queued"
+        assert store.resumable() == [job["job_id"]]
+    
+    def test_sqlite_store_reconnects_in_forked_worker(self, tmp_path):
+        """A store inherited across fork opens its own connection on first use"""
+        store = main.SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+        inherited = store._conn
+        store._pid = -1  # as seen from a forked child
+        assert store.get("missing") is None
+        assert store._conn is not inherited
+        assert store._pid > 0
+    
+    @pytest.mark.asyncio
+    async def test_worker_leaves_running_jobs_to_siblings(self, tmp_path):
+        """With requeue_running off, a starting worker does not take over running jobs"""
+        path = str(tmp_path / "jobs.sqlite3")
+        main.SQLiteJobStore(path).create({
+            "job_id": "sibling-job", "status": "running", "created_at": time.time(), "started_at": time.time(),
+            "finished_at": None, "request": None, "callback_url": None, "result": None, "error": None, "callback": None
+        })
+        runner = main.JobRunner(main.SQLiteJobStore(path), workers=1)
+        runner.requeue_running = False
+        runner.start()
+        try:
+            await runner._resuming
+            assert runner.queue_depth == 0
+        finally:
+            await runner.stop()
+        assert main.SQLiteJobStore(path).get("sibling-job")["status"] == "running"
+
 # ==================== Load Testing with Locust ====================
 
 # To run load tests: locust -f tests/test_main.py -u 50 -r 10 --run-time 1m